@@ -1,12 +1,11 @@
-from supabase import create_client, Client
-import os
+from supabase import Client
 from dotenv import load_dotenv
 
+from core.utils.supabase_clients import close_http_client, supabase_client
+
 load_dotenv()
 
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-supabase: Client = create_client(url, key)
+supabase: Client = supabase_client()
 
 # Replace with your test user's email and password
 response = supabase.auth.sign_in_with_password(
@@ -15,3 +14,5 @@ response = supabase.auth.sign_in_with_password(
 
 print("Access Token:", response.session.access_token)
 print("Refresh Token:", response.session.refresh_token)
+
+close_http_client()
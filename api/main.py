@@ -24,9 +24,12 @@ The API follows a clean layered architecture with clear separation of concerns:
 Endpoints:
 - `GET /`: Health check endpoint
 - `POST /generate_content`: Main content generation with streaming response
+- `POST /webhooks/beehiiv`: Beehiiv post events; pre-warms the pipeline
+- `GET /metrics`: In-process pipeline metrics
 
 Authentication:
-All endpoints (except health check) require JWT Bearer token authentication.
+All endpoints (except health check and webhooks) require JWT Bearer token
+authentication. Webhooks are authenticated by their HMAC signature instead.
 Tokens are obtained through Supabase authentication and passed in the
 Authorization header: "Bearer <jwt_token>"
 
@@ -60,6 +63,8 @@ Environment Setup:
     - SUPABASE_URL: Supabase project URL
     - SUPABASE_SERVICE_ROLE_KEY: Service role key for admin operations
     - ANTHROPIC_API_KEY or OPENAI_API_KEY: AI provider credentials
+    - BEEHIIV_WEBHOOK_SECRET: Signing secret of the Beehiiv webhook
+    - BEEHIIV_WEBHOOK_TOLERANCE_SECONDS: Maximum age of a Beehiiv webhook event
     - Additional optional configuration variables
 
 Deployment:
@@ -69,30 +74,40 @@ and 1GB memory allocation for AI processing operations.
 
 import json
 import asyncio
+import hashlib
 import time
 import os
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Literal, Optional
-from supabase import create_client, Client, ClientOptions
+from supabase import Client
+from core.auth.jwt_verifier import (
+    VerificationUnavailable,
+    get_token_verifier,
+)
+from core.auth.webhook_signature import ReplayGuard, verify_hmac_signature
 from core.config.init_storage import init_storage
 from core.models.account_profile import AccountProfile
 from core.services.account_profile_service import AccountProfileService
 import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from core.main_process import run_main_process
+from core.main_process import run_main_process, start_prewarm
 from core.services.status_updates import StatusService
 from core.content.image_generation.carousel_generator import CarouselGenerator
-
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from core.content.image_generation.render_pool import shutdown_render_pool
+from core.utils import metrics
+from core.utils.logging_utils import configure_logging, payload
+from core.utils.supabase_clients import (
+    close_http_client,
+    service_client,
+    supabase_client,
 )
 
-print("All env vars:", os.environ)
-print("Specific key:", os.getenv("SUPABASE_SERVICE_ROLE_KEY"))
+configure_logging()
+
 logger = logging.getLogger(__name__)
 load_dotenv()  # Force reload from .env
 
@@ -102,7 +117,7 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing application...")
     try:
-        await init_storage(supabase)
+        await init_storage(service_client())
         logger.info("Storage initialization completed")
     except Exception as e:
         logger.error(f"Failed to initialize storage: {str(e)}")
@@ -113,7 +128,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down application...")
-    # Add any cleanup code here if needed
+    shutdown_render_pool()
+    close_http_client()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -124,7 +140,6 @@ logger.info(f"SUPABASE_URL: {os.getenv('SUPABASE_URL')}")
 logger.info(
     f"SUPABASE_SERVICE_ROLE_KEY present: {'Yes' if os.getenv('SUPABASE_SERVICE_ROLE_KEY') else 'No'}"
 )
-logger.info(f"All env vars: {dict(os.environ)}")
 
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -135,11 +150,29 @@ if not supabase_url or not supabase_key:
     )
     raise ValueError("Missing required Supabase environment variables")
 
-# Global setup - use service role key
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
-)
+
+def _authenticate(
+    credentials: HTTPAuthorizationCredentials, remote: bool
+) -> tuple[Client, dict]:
+    try:
+        if credentials.scheme != "Bearer":
+            raise ValueError("Invalid authorization scheme")
+        token = credentials.credentials
+        verifier = get_token_verifier()
+        if remote:
+            user = verifier.verify_remote(token, service_client())
+        else:
+            try:
+                user = verifier.verify(token)
+            except VerificationUnavailable as e:
+                logger.warning(f"Verifying token with Supabase Auth: {str(e)}")
+                user = verifier.verify_remote(token, service_client())
+        # A view on the shared HTTP pool that sends the user's token, so row
+        # level security applies (see core/utils/supabase_clients.py)
+        return supabase_client(token), user
+    except Exception as e:
+        logger.error(f"Authentication error: {str(e)}")
+        raise HTTPException(status_code=401, detail="Failed to authenticate")
 
 
 def authenticate(
@@ -148,9 +181,11 @@ def authenticate(
     """
     Authenticate incoming API requests using JWT Bearer tokens.
 
-    This function validates JWT tokens obtained from Supabase authentication
-    and returns both a Supabase client configured for the authenticated user
-    and the user information.
+    The Supabase access token is verified locally (signature, expiry and
+    audience; see core/auth/jwt_verifier.py), so authentication makes no
+    network call. A token revoked by signing out stays accepted for at most
+    AUTH_TOKEN_CACHE_TTL_SECONDS or until it expires; endpoints where that
+    matters depend on `authenticate_remote` instead.
 
     Args:
         credentials: HTTP Bearer token credentials from request header
@@ -158,7 +193,7 @@ def authenticate(
     Returns:
         Tuple containing:
         - Supabase client configured with user authentication
-        - User object containing user information and metadata
+        - The token's claims ("sub" is the user id)
 
     Raises:
         HTTPException: 401 Unauthorized if authentication fails
@@ -171,23 +206,23 @@ def authenticate(
             # Use authenticated client for operations
         ```
     """
-    try:
-        if credentials.scheme != "Bearer":
-            raise ValueError("Invalid authorization scheme")
-        supabase = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
-            options=ClientOptions(
-                headers={"Authorization": f"Bearer {credentials.credentials}"}
-            ),
-        )
-        user_response = supabase.auth.get_user(credentials.credentials)
-        if not user_response or not user_response.user:
-            raise ValueError("User not found")
-        return supabase, user_response.user
-    except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
-        raise HTTPException(status_code=401, detail="Failed to authenticate")
+    return _authenticate(credentials, remote=False)
+
+
+def authenticate_remote(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> tuple[Client, dict]:
+    """
+    Like `authenticate`, but asks Supabase Auth whether the session is still
+    valid (one round trip), for revocation-sensitive endpoints: anything that
+    changes account profiles, stored credentials or sessions.
+
+    No endpoint needs it yet. /generate_content and /metrics only read, and
+    their database access goes through the user's client, where PostgREST
+    itself accepts the token until it expires, so a remote check would not
+    shorten a revoked session's reach.
+    """
+    return _authenticate(credentials, remote=True)
 
 
 @app.get("/")
@@ -195,6 +230,80 @@ async def root():
     return {"message": "PostOnce API is running"}
 
 
+BEEHIIV_WEBHOOK_SECRET = os.getenv("BEEHIIV_WEBHOOK_SECRET")
+BEEHIIV_SIGNATURE_HEADER = "X-Beehiiv-Signature"
+# Events sent longer ago than this (seconds) are rejected as possible replays
+BEEHIIV_WEBHOOK_TOLERANCE_SECONDS = float(
+    os.getenv("BEEHIIV_WEBHOOK_TOLERANCE_SECONDS", "300")
+)
+beehiiv_replay_guard = ReplayGuard(BEEHIIV_WEBHOOK_TOLERANCE_SECONDS)
+
+# Beehiiv events after which a post's content is final enough to pre-warm
+PREWARM_EVENT_TYPES = {"post.sent", "post.updated"}
+
+
+@app.post("/webhooks/beehiiv", status_code=status.HTTP_202_ACCEPTED)
+async def beehiiv_webhook(request: Request):
+    """
+    Receive Beehiiv post events and pre-warm the pipeline for the post.
+
+    Fetching, cleaning, structure analysis and strategy run in background
+    tasks for every account connected to the publication, so the user's first
+    generate request only runs the per-section steps.
+    """
+    body = await request.body()
+    if not verify_hmac_signature(
+        body, request.headers.get(BEEHIIV_SIGNATURE_HEADER), BEEHIIV_WEBHOOK_SECRET
+    ):
+        metrics.increment("beehiiv_webhook", result="bad_signature")
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    try:
+        event = json.loads(body)
+        event_type = event.get("event_type")
+        data = event.get("data") or {}
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    # Events without an id are deduplicated on their exact body
+    event_id = str(event.get("uid") or hashlib.sha256(body).hexdigest())
+    rejection = beehiiv_replay_guard.check(event_id, event.get("created"))
+    if rejection:
+        metrics.increment("beehiiv_webhook", result=rejection)
+        logger.warning(f"Rejected {rejection} Beehiiv event {event_id}")
+        if rejection == "stale":
+            raise HTTPException(status_code=400, detail="Stale or missing timestamp")
+        return {"accepted": 0}
+
+    if event_type not in PREWARM_EVENT_TYPES:
+        metrics.increment("beehiiv_webhook", result="ignored")
+        return {"accepted": 0}
+
+    post_id = data.get("id")
+    publication_id = data.get("publication_id")
+    if not post_id or not publication_id:
+        raise HTTPException(status_code=400, detail="Missing post or publication id")
+
+    supabase = service_client()
+    account_profiles = await AccountProfileService(
+        supabase
+    ).get_account_profiles_by_publication(publication_id)
+    if account_profiles:
+        start_prewarm(account_profiles, post_id, supabase)
+
+    metrics.increment("beehiiv_webhook", result="accepted")
+    logger.info(
+        f"Beehiiv {event_type} for post {post_id}: pre-warming "
+        f"{len(account_profiles)} account(s)"
+    )
+    return {"accepted": len(account_profiles)}
+
+
+@app.get("/metrics")
+async def get_metrics(client_user: tuple[Client, dict] = Depends(authenticate)):
+    return metrics.snapshot()
+
+
 class ContentGenerationRequest(BaseModel):
     account_id: str
     content_id: str  # Add this
@@ -210,6 +319,8 @@ class ContentGenerationRequest(BaseModel):
         "carousel_tweet",  # Add these two
         "carousel_post",
     ]
+    # Generate everything again instead of reusing earlier generations
+    regenerate: bool = False
 
     def validate_request(self) -> None:
         """
@@ -254,7 +365,12 @@ async def generate_content_endpoint(
     client_user: tuple[Client, dict] = Depends(authenticate),
 ):
     try:
-        logger.info(f"Received request: {request}")
+        logger.info(
+            "Received request: content_id=%s, post_id=%s, content_type=%s",
+            request.content_id,
+            request.post_id,
+            request.content_type,
+        )
 
         # Validate request format
         request.validate_request()
@@ -271,7 +387,7 @@ async def generate_content_endpoint(
             )
             raise HTTPException(status_code=404, detail="Account profile not found")
 
-        logger.info(f"Account profile found: {account_profile}")
+        logger.info("Account profile found for account_id: %s", request.account_id)
 
         return StreamingResponse(
             content_generator(
@@ -281,6 +397,7 @@ async def generate_content_endpoint(
                 request.content_type,
                 client_user[0],
                 request.content,
+                request.regenerate,
             ),
             media_type="text/event-stream",
         )
@@ -299,6 +416,7 @@ async def content_generator(
     content_type: str,
     supabase: Client,
     content: Optional[str] = None,
+    regenerate: bool = False,
 ):
     start_time = time.time()
     status_service = StatusService(supabase)
@@ -338,11 +456,12 @@ async def content_generator(
             content_type,
             supabase,
             content,
+            regenerate,
         )
-        logger.info(f"Result from run_main_process: {result}")
+        logger.info("Result from run_main_process: %s", payload(result))
 
         if not isinstance(result, dict):
-            logger.error(f"Invalid result format returned: {result}")
+            logger.error("Invalid result format returned: %s", payload(result))
             await status_service.update_status(content_id, "failed")
             error_message = {
                 "status": "failed",
@@ -355,14 +474,14 @@ async def content_generator(
             return
 
         if result.get("success", False):
-            logger.info(f"Content generation succeeded: {result}")
+            logger.info("Content generation succeeded for content_id: %s", content_id)
             await status_service.update_status(content_id, "generated")
             success_message = {
                 "status": "completed",
                 "result": result,
                 "total_time": f"{time.time() - start_time:.2f} seconds",
             }
-            logger.info(f"Sending success message: {success_message}")
+            logger.info("Sending success message: %s", payload(success_message))
             yield json.dumps(success_message) + "\n"
             logger.info("Success message sent")
         else:
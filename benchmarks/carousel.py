@@ -0,0 +1,134 @@
+"""
+Benchmark for carousel slide rendering, phase by phase.
+
+Splits `CarouselGenerator._create_slide` plus encoding into its phases and
+times each one per slide:
+
+- blank: the full-size background and the arrow, as `_create_slide` makes
+  them, next to copying a pre-rendered template of the same (the
+  copy-on-write alternative)
+- layout: fitting and wrapping the text (`_plan_slide`, bypassing the plan
+  cache of `_layout_slide`)
+- text: drawing the laid-out plan
+- png: encoding the slide as RGB PNG (the encoding before slide encoders)
+- encode: encoding the slide with its platform's encoder (`encode_image`)
+
+Usage:
+    python -m benchmarks.carousel
+    python -m benchmarks.carousel --platform twitter --repeat 10
+"""
+
+import argparse
+import io
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from PIL import Image, ImageDraw
+
+from core.content.image_generation.carousel_generator import CarouselGenerator
+from core.content.image_generation.encoders import encode_image
+
+WORDS = (
+    "the a newsletter growth audience creators weekly readers subscribe "
+    "engagement monetization strategy sponsorship referral open rate click "
+    "through premium content writing publishing platform analytics insights"
+).split()
+
+
+def synthetic_slides(count: int, seed: int = 11) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "heading": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14))),
+            "subheading": " ".join(
+                rng.choice(WORDS) for _ in range(rng.randint(10, 70))
+            ),
+        }
+        for _ in range(count)
+    ]
+
+
+def blank_slide(generator: CarouselGenerator, slide_index: int) -> Image.Image:
+    img = Image.new("RGB", generator.image_size, generator.primary_dark)
+    if slide_index < generator.max_slides - 1:
+        generator._create_arrow(ImageDraw.Draw(img))
+    return img
+
+
+def best_time(func: Callable[[], None], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--platform", default="linkedin", choices=["linkedin", "twitter"]
+    )
+    parser.add_argument("--slides", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = CarouselGenerator(args.platform)
+    slides = synthetic_slides(args.slides)
+    count = len(slides)
+    templates = {
+        with_arrow: blank_slide(generator, 0 if with_arrow else generator.max_slides)
+        for with_arrow in (True, False)
+    }
+    plans = [generator._plan_slide(slide) for slide in slides]
+    images = [generator._create_slide(slide, idx) for idx, slide in enumerate(slides)]
+
+    def run_blank() -> None:
+        for idx in range(count):
+            blank_slide(generator, idx)
+
+    def run_template() -> None:
+        for idx in range(count):
+            templates[idx < generator.max_slides - 1].copy()
+
+    def run_layout() -> None:
+        for slide in slides:
+            generator._plan_slide(slide)
+
+    def run_text() -> None:
+        draw = ImageDraw.Draw(blank_slide(generator, 0))
+        for plan in plans:
+            plan.draw(draw, fill=generator.text_color)
+
+    def run_png() -> None:
+        for image in images:
+            image.save(io.BytesIO(), format="PNG")
+
+    def run_encode() -> None:
+        for image in images:
+            encode_image(image, f"slide_{args.platform}")
+
+    phases = {
+        "blank": run_blank,
+        "template copy": run_template,
+        "layout": run_layout,
+        "text": run_text,
+        "png": run_png,
+        "encode": run_encode,
+    }
+    timings = {
+        name: best_time(func, args.repeat) / count for name, func in phases.items()
+    }
+    print(
+        f"{args.platform}, {count} slides, per slide: "
+        + ", ".join(
+            f"{name} {seconds * 1000:.2f} ms" for name, seconds in timings.items()
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Benchmark and regression check for reusing earlier generations.
+
+Drives `core.content.generation_cache` the way `run_main_process` does, for a
+synthetic edition of several sections, and checks what is reused:
+
+- the same text sent again reuses the structure and strategy
+- an edition with one corrected figure does not, and only the edited section
+  misses the section index
+- the edition cross-posted as another post, with its own web URL, reuses
+  every section with links pointed at the new URL
+- generating the same post again reuses no section
+- a carousel is only reused for the same web URL
+
+It also reports the time of a section lookup with a full index.
+
+Usage:
+    python -m benchmarks.generation_cache    # exit 1 on an unexpected result
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.content.generation_cache import (
+    GenerationCache,
+    edition_key,
+    section_scope,
+)
+from core.models.account_profile import AccountProfile
+
+WORDS = (
+    "market growth founders revenue launch product users model pricing "
+    "strategy team funding signal churn retention newsletter audience"
+).split()
+
+ACCOUNT = AccountProfile(
+    account_id="account-1",
+    beehiiv_api_key="key",
+    subscribe_url="https://example.com/subscribe",
+    publication_id="pub-1",
+)
+
+
+def synthetic_sections(count: int = 5, seed: int = 3) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(120, 200)))
+        + f" Revenue grew {index + 10}% this quarter."
+        for index in range(count)
+    ]
+
+
+def generate(
+    cache: GenerationCache,
+    sections: List[str],
+    post_id: str,
+    web_url: Optional[str],
+    content_type: str = "thread_tweet",
+) -> Tuple[int, List[Any]]:
+    """(reused sections, outputs) for one run over `sections`."""
+    scope = section_scope(ACCOUNT, content_type, web_url)
+    edition = edition_key(post_id, "".join(sections))
+    reused = 0
+    outputs: List[Any] = []
+    for index, section in enumerate(sections):
+        output = cache.lookup_section(scope, section, edition, web_url)
+        if output is not None:
+            reused += 1
+        else:
+            output = [{"post_content": f"Post {index}. Read more: {web_url}"}]
+            cache.store_section(scope, section, output, edition, web_url)
+        outputs.append(output)
+    return reused, outputs
+
+
+def run_checks() -> Dict[str, bool]:
+    cache = GenerationCache()
+    sections = synthetic_sections()
+    text = "".join(sections)
+    url_a = "https://example.beehiiv.com/p/original"
+    url_b = "https://example.beehiiv.com/p/cross-post"
+
+    cache.store_document(ACCOUNT.account_id, text, "structure", "[]")
+    generate(cache, sections, "post-a", url_a)
+
+    edited = list(sections)
+    edited[2] = edited[2].replace("12%", "21%")
+    edited_reused, _ = generate(cache, edited, "post-c", url_a)
+
+    cross_reused, cross_outputs = generate(cache, sections, "post-b", url_b)
+    same_reused, _ = generate(cache, sections, "post-a", url_a)
+
+    generate(cache, sections, "post-a", url_a, "carousel_tweet")
+    carousel_reused, _ = generate(cache, sections, "post-b", url_b, "carousel_tweet")
+    carousel_same_url, _ = generate(
+        cache, sections, "post-d", url_a, "carousel_tweet"
+    )
+
+    return {
+        "identical text reuses the strategy": cache.lookup_document(
+            ACCOUNT.account_id, text
+        )
+        is not None,
+        "edited text reruns the strategy": cache.lookup_document(
+            ACCOUNT.account_id, "".join(edited)
+        )
+        is None,
+        "only the edited section is regenerated": edited_reused == len(sections) - 1,
+        "cross-post reuses every section": cross_reused == len(sections),
+        "cross-post links to its own URL": all(
+            url_b in post and url_a not in post
+            for post in (output[0]["post_content"] for output in cross_outputs)
+        ),
+        "same post regenerates its sections": same_reused == 0,
+        "carousel with another URL is regenerated": carousel_reused == 0,
+        "carousel with the same URL is reused": carousel_same_url == len(sections),
+    }
+
+
+def lookup_time(entries: int, repeat: int) -> float:
+    cache = GenerationCache(max_sections=entries)
+    rng = random.Random(5)
+    scope = section_scope(ACCOUNT, "thread_tweet", None)
+    for index in range(entries):
+        section = " ".join(rng.choice(WORDS) for _ in range(150))
+        cache.store_section(scope, section, ["output"], f"post:{index}")
+    probe = " ".join(rng.choice(WORDS) for _ in range(150))
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cache.lookup_section(scope, probe, "post:probe")
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, ok in run_checks().items():
+        failures += not ok
+        print(f"{name}: {'ok' if ok else 'UNEXPECTED'}")
+    print(
+        f"section lookup with {args.entries} entries: "
+        f"{lookup_time(args.entries, args.repeat) * 1000:.2f} ms"
+    )
+
+    if failures:
+        print(f"{failures} check(s) gave an unexpected result")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
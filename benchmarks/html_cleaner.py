@@ -0,0 +1,174 @@
+"""
+Benchmark and golden check for the single-pass HTML cleaner.
+
+Compares `core.content.html_cleaner.clean_html_content` with the BeautifulSoup
+implementation it replaced (clean, then transform images into placeholders,
+then the pipeline's repeat of that transform) for speed and byte-identical
+output. Without --corpus a synthetic Beehiiv-style edition is generated.
+
+Usage:
+    python -m benchmarks.html_cleaner
+    python -m benchmarks.html_cleaner --corpus path/to/html_dir --repeat 5
+"""
+
+import argparse
+import pathlib
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup, Comment
+
+from core.content.html_cleaner import ALLOWED_TAGS, clean_html_content
+
+
+def legacy_clean_html_content(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in soup(["script", "style", "meta", "title", "head"]):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    if (
+        soup.contents
+        and soup.contents[0].name is None
+        and "DOCTYPE" in str(soup.contents[0])
+    ):
+        soup.contents[0].extract()
+    for tag in soup.find_all():
+        if tag.name not in ALLOWED_TAGS:
+            tag.unwrap()
+    for tag in soup.find_all(True):
+        allowed_attrs = {}
+        if tag.name == "a" and tag.has_attr("href"):
+            allowed_attrs["href"] = tag["href"]
+        if tag.name == "img":
+            if tag.has_attr("src"):
+                allowed_attrs["src"] = tag["src"]
+            if tag.has_attr("alt"):
+                allowed_attrs["alt"] = tag["alt"]
+        tag.attrs = allowed_attrs
+    cleaned = str(soup)
+    cleaned = cleaned.replace("\u200c", "").replace("\u00a0", " ")
+    return re.sub(r"\s+", " ", cleaned).strip()
+
+
+def legacy_transform_images_into_placeholders(html_str: str) -> str:
+    soup = BeautifulSoup(html_str, "html.parser")
+    for img_tag in soup.find_all("img"):
+        src = img_tag.get("src", "")
+        alt = img_tag.get("alt", "")
+        img_tag.replace_with(f'[image:{src} alt="{alt}"]')
+    return str(soup)
+
+
+def legacy_pipeline(html: str) -> str:
+    """What get_beehiiv_post_content returned before the single-pass cleaner."""
+    return legacy_transform_images_into_placeholders(legacy_clean_html_content(html))
+
+
+def legacy_pipeline_with_repeat(html: str) -> str:
+    """Including the second placeholder pass run_main_process used to apply."""
+    return legacy_transform_images_into_placeholders(legacy_pipeline(html))
+
+
+def single_pass(html: str) -> str:
+    return clean_html_content(html, images_as_placeholders=True)
+
+
+def synthetic_edition(sections: int = 40, seed: int = 7) -> str:
+    """A table-heavy email in the shape Beehiiv sends, with styles and trackers."""
+    rng = random.Random(seed)
+    words = (
+        "market growth founders revenue launch product users model pricing "
+        "strategy team funding signal churn retention newsletter audience"
+    ).split()
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 22))) + "."
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Edition</title>",
+        "<style>" + "td{padding:0}" * 200 + "</style></head><body>",
+        "<!--[if mso]><table><tr><td><![endif]-->",
+    ]
+    for index in range(sections):
+        parts.append(
+            '<table role="presentation" width="100%" style="border-collapse:collapse">'
+            f'<tr><td class="section" style="padding:12px 24px;font-family:Georgia">'
+            f'<h2 style="color:#222">Section {index}: {sentence()}</h2>'
+        )
+        for _ in range(rng.randint(2, 5)):
+            parts.append(
+                f'<p style="font-size:16px;line-height:24px">{sentence()} '
+                f'<a href="https://example.com/{index}?utm_source=x&amp;id={rng.random()}" '
+                f'target="_blank" style="color:#06c"><span>{sentence()}</span></a>'
+                "&nbsp;&#8203;&zwnj;</p>"
+            )
+        if index % 3 == 0:
+            parts.append(
+                f'<img src="https://media.beehiiv.com/uploads/{index}/chart.png" '
+                f'alt="{sentence()}" width="600" style="display:block"/>'
+            )
+        parts.append(
+            '<div style="height:1px;background:#eee">&zwnj;</div></td></tr></table>'
+        )
+    parts.append(
+        '<img src="https://link.mail.beehiiv.com/open/track.gif" width="1" height="1">'
+        "<script>var x = 1;</script></body></html>"
+    )
+    return "".join(parts)
+
+
+def load_corpus(directory: str) -> Dict[str, str]:
+    paths = sorted(pathlib.Path(directory).glob("*.html"))
+    return {path.name: path.read_text(encoding="utf-8") for path in paths}
+
+
+def best_time(func: Callable[[str], str], html: str, repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="Directory of raw .html editions")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = (
+        load_corpus(args.corpus)
+        if args.corpus
+        else {"synthetic": synthetic_edition()}
+    )
+    if not corpus:
+        print("No .html files found")
+        return 1
+
+    mismatches = 0
+    for name, html in corpus.items():
+        expected_clean = legacy_clean_html_content(html)
+        expected = legacy_pipeline(html)
+        identical = clean_html_content(html) == expected_clean and (
+            single_pass(html) == expected
+        )
+        mismatches += not identical
+
+        old = best_time(legacy_pipeline_with_repeat, html, args.repeat)
+        new = best_time(single_pass, html, args.repeat)
+        print(
+            f"{name}: {len(html) / 1024:.0f} KiB, legacy {old * 1000:.1f} ms, "
+            f"single-pass {new * 1000:.1f} ms, {old / new:.1f}x, "
+            f"{'identical' if identical else 'OUTPUT DIFFERS'}"
+        )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark and regression check for the local pre-sectioner.
+
+Runs `core.content.pre_sectioner.pre_section` on fixed editions and checks
+whether each one skips the structure-analysis model call, as expected:
+
+- a typical edition (a few h2 stories, a sponsor block, footer boilerplate)
+  is confident and loses its sponsor and footer
+- the synthetic edition of benchmarks/html_cleaner.py, one h2 per headline,
+  exceeds MAX_SECTIONS and must go to the model
+- an edition without repeated headings must go to the model
+
+Usage:
+    python -m benchmarks.pre_sectioner    # exit 1 on an unexpected result
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from benchmarks.html_cleaner import synthetic_edition
+from core.content.html_cleaner import clean_html_content
+from core.content.pre_sectioner import MAX_SECTIONS, PreSectioning, pre_section
+
+STORY = (
+    "<p>Founders shipped a pricing change this week and retention moved more "
+    "than anyone on the team expected. We looked at the cohorts, the churn "
+    "curve and what customers said in interviews before and after.</p>"
+    "<p>The short version: annual plans with a visible discount converted "
+    "better than monthly plans with a free month.</p>"
+)
+
+
+def typical_edition() -> str:
+    parts = ["<p>View this email in your browser</p>", "<h1>The Weekly</h1>"]
+    for index in range(4):
+        parts.append(f"<h2>Story {index}: what we learned</h2>{STORY}")
+    parts.append(
+        "<h2>Together with Acme</h2><p>Acme helps you send better email. "
+        "Try it today.</p>"
+    )
+    parts.append("<p>Unsubscribe | Update your preferences</p>")
+    return "".join(parts)
+
+
+def flat_edition() -> str:
+    return "<h2>Notes</h2>" + STORY * 6
+
+
+def expectations() -> List[Tuple[str, str, Callable[[PreSectioning], bool]]]:
+    """(name, cleaned content, check) for every case."""
+    return [
+        (
+            "typical",
+            clean_html_content(typical_edition(), images_as_placeholders=True),
+            lambda result: result.is_confident()
+            and len(result.sections) == 4
+            and "Acme" not in result.trimmed_content
+            and "Unsubscribe" not in result.trimmed_content,
+        ),
+        (
+            "headline per h2",
+            clean_html_content(synthetic_edition(), images_as_placeholders=True),
+            lambda result: len(result.sections) > MAX_SECTIONS
+            and not result.is_confident(),
+        ),
+        (
+            "no repeated headings",
+            clean_html_content(flat_edition(), images_as_placeholders=True),
+            lambda result: not result.is_confident(),
+        ),
+    ]
+
+
+def best_time(content: str, repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pre_section(content)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, content, check in expectations():
+        result = pre_section(content)
+        ok = check(result)
+        failures += not ok
+        print(
+            f"{name}: {len(result.sections)} section(s), confidence "
+            f"{result.confidence:.2f} ({'; '.join(result.reasons) or 'no penalties'}), "
+            f"{best_time(content, args.repeat) * 1000:.2f} ms, "
+            f"{'ok' if ok else 'UNEXPECTED'}"
+        )
+
+    if failures:
+        print(f"{failures} case(s) gave an unexpected result")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
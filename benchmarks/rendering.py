@@ -0,0 +1,218 @@
+"""
+Rendering benchmark and golden-image regression check.
+
+Renders a fixed corpus (short, long, unicode and very-long-word texts) with
+every renderer, without network or Supabase:
+
+- `CarouselGenerator._create_slide` for LinkedIn and Twitter slides, plus the
+  platform's slide encoder
+- `CarouselGenerator.generate_pdf_from_slides` for the LinkedIn PDF
+- `image_generator.generate_image_list`
+
+For each case it reports render time, encoded size and the process's peak
+resident memory after the case (Pillow allocates pixels outside the Python
+heap, so tracemalloc would miss them; the peak only rises, so growth between
+cases is what a case added). It also compares the rendered image with its
+golden under benchmarks/golden/. Goldens are stored as half-size grayscale
+PNGs and compared perceptually: a case passes when the mean absolute
+difference and the share of strongly differing pixels stay within tolerance,
+so encoder or antialiasing noise passes while moved, missing or resized text
+fails.
+
+Usage:
+    python -m benchmarks.rendering                  # exit 1 on a mismatch
+    python -m benchmarks.rendering --update-golden  # after intended changes
+"""
+
+import argparse
+import pathlib
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+from core.content.image_generation.carousel_generator import CarouselGenerator
+from core.content.image_generation.encoders import encode_image
+from core.content.image_generator import generate_image_list
+
+GOLDEN_DIR = pathlib.Path(__file__).parent / "golden"
+
+# Mean absolute difference (0-255) and share of pixels differing by more than
+# STRONG_DIFFERENCE allowed before a case counts as changed
+MAX_MEAN_DIFFERENCE = 1.5
+STRONG_DIFFERENCE = 96
+MAX_STRONG_SHARE = 0.002
+
+SLIDE_CORPUS: Dict[str, Dict[str, str]] = {
+    "short": {"heading": "Ship it", "subheading": "Small steps compound."},
+    "long": {
+        "heading": (
+            "Why the newsletters that grow fastest treat every issue like a "
+            "product launch instead of a weekly chore"
+        ),
+        "subheading": (
+            "They write the subject line first, test it against two "
+            "alternatives, cut every paragraph that does not earn its place, "
+            "end with one clear ask and then look at what readers actually "
+            "clicked before planning the next issue. None of it is "
+            "complicated, but doing all of it every single week is what "
+            "separates a list that compounds from one that stalls at a few "
+            "hundred subscribers and never quite recovers its momentum."
+        ),
+    },
+    "unicode": {
+        "heading": "Café naïveté — “quoted” ½ · № 1 ✓",
+        "subheading": (
+            "Ünïcödé façade, déjà vu, smörgåsbord, Łódź, Ørsted and São "
+            "Paulo… plus glyphs the font lacks: 日本語 🚀"
+        ),
+    },
+    "long_words": {
+        "heading": "Supercalifragilisticexpialidocious",
+        "subheading": (
+            "Pneumonoultramicroscopicsilicovolcanoconiosis and "
+            "https://example.com/a/really/long/url/without/any/spaces/at/all "
+            "Antidisestablishmentarianism"
+        ),
+    },
+}
+
+IMAGE_LIST_CORPUS: Dict[str, Dict] = {
+    "image_list": {
+        "title": "Five habits of newsletters that keep growing",
+        "body": [
+            "Write the subject line before the issue",
+            "Cut every paragraph that does not earn its place",
+            "End with one clear ask",
+            "Read what readers clicked before planning the next issue",
+            "Ünïcödé and a verylongwordthatcannotbewrappedanywhereatall",
+        ],
+    }
+}
+
+
+def golden_form(image: Image.Image) -> Image.Image:
+    return image.convert("L").reduce(2)
+
+
+def compare(image: Image.Image, golden_path: pathlib.Path) -> Tuple[str, str]:
+    """(status, detail) of `image` against its golden."""
+    if not golden_path.exists():
+        return "missing", "no golden (run with --update-golden)"
+    with Image.open(golden_path) as golden:
+        golden = golden.convert("L")
+        current = golden_form(image)
+        if current.size != golden.size:
+            return "changed", f"size {current.size} != {golden.size}"
+        diff = ImageChops.difference(current, golden)
+    mean = ImageStat.Stat(diff).mean[0]
+    histogram = diff.histogram()
+    strong = sum(histogram[STRONG_DIFFERENCE:]) / (diff.width * diff.height)
+    detail = f"mean diff {mean:.2f}, strong {strong:.3%}"
+    if mean > MAX_MEAN_DIFFERENCE or strong > MAX_STRONG_SHARE:
+        return "changed", detail
+    return "ok", detail
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[object, float, int]:
+    """(result, best seconds, peak resident bytes so far) of `func`."""
+    result = None
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return result, min(timings), peak
+
+
+def report(
+    name: str,
+    seconds: float,
+    peak: int,
+    size: int,
+    status: Optional[Tuple[str, str]] = None,
+) -> None:
+    line = (
+        f"{name:28s} {seconds * 1000:7.1f} ms  "
+        f"rss {peak / 1024 / 1024:6.1f} MiB  {size / 1024:7.1f} KiB"
+    )
+    if status:
+        line += f"  {status[0]} ({status[1]})"
+    print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--update-golden",
+        action="store_true",
+        help="Overwrite the golden images with the current output",
+    )
+    args = parser.parse_args()
+    GOLDEN_DIR.mkdir(exist_ok=True)
+
+    failures = 0
+
+    def check(name: str, image: Image.Image) -> Tuple[str, str]:
+        nonlocal failures
+        path = GOLDEN_DIR / f"{name}.png"
+        if args.update_golden:
+            golden_form(image).save(path, optimize=True)
+            return "updated", str(path.relative_to(GOLDEN_DIR.parent.parent))
+        status = compare(image, path)
+        failures += status[0] != "ok"
+        return status
+
+    for platform in ("linkedin", "twitter"):
+        generator = CarouselGenerator(platform)
+        encoded_slides = []
+        for index, (case, content) in enumerate(SLIDE_CORPUS.items()):
+            image, seconds, peak = measure(
+                lambda: generator._create_slide(content, index), args.repeat
+            )
+            encoded, encode_seconds, encode_peak = measure(
+                lambda: encode_image(image, f"slide_{platform}"), args.repeat
+            )
+            encoded_slides.append(encoded.data)
+            name = f"slide_{platform}_{case}"
+            report(
+                name,
+                seconds + encode_seconds,
+                max(peak, encode_peak),
+                len(encoded.data),
+                check(name, image),
+            )
+
+        if platform == "linkedin":
+            pdf, seconds, peak = measure(
+                lambda: generator.generate_pdf_from_slides(encoded_slides),
+                args.repeat,
+            )
+            pages = pdf.count(b"/Type /Page ")
+            status = (
+                ("ok", f"{pages} pages")
+                if pages == len(encoded_slides)
+                else ("changed", f"{pages} pages for {len(encoded_slides)} slides")
+            )
+            failures += status[0] != "ok"
+            report("pdf_linkedin", seconds, peak, len(pdf), status)
+
+    for case, content in IMAGE_LIST_CORPUS.items():
+        image, seconds, peak = measure(
+            lambda: generate_image_list(content), args.repeat
+        )
+        encoded = encode_image(image, "image_list")
+        report(case, seconds, peak, len(encoded.data), check(case, image))
+
+    if failures:
+        print(f"{failures} case(s) differ from their golden")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
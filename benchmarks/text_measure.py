@@ -0,0 +1,115 @@
+"""
+Benchmark for the shared text measurement layer.
+
+Compares wrapping with `core.content.image_generation.text_measure` against
+the approach it replaced, which re-measured the whole growing line after every
+word (`ImageDraw.textsize` before it was removed from Pillow; emulated here
+with `font.getlength` on the joined line). Also reports how often the two
+disagree on line breaks, which can only happen through kerning across word
+boundaries.
+
+Usage:
+    python -m benchmarks.text_measure
+    python -m benchmarks.text_measure --font fonts/Lora-VariableFont_wght.ttf --repeat 10
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List
+
+from PIL.ImageFont import FreeTypeFont
+
+from core.content.image_generation import text_measure
+from core.content.image_generation.fonts import load_font
+from core.content.image_generation.text_measure import get_measurer
+
+WORDS = (
+    "the a newsletter growth audience creators weekly readers subscribe "
+    "engagement monetization strategy sponsorship referral open rate click "
+    "through premium content writing publishing platform analytics insights "
+    "experiment retention community launch"
+).split()
+
+
+def legacy_wrap(font: FreeTypeFont, text: str, max_width: float) -> List[str]:
+    lines = []
+    current_line: List[str] = []
+    for word in text.split():
+        candidate = " ".join(current_line + [word])
+        if current_line and font.getlength(candidate) > max_width:
+            lines.append(" ".join(current_line))
+            current_line = [word]
+        else:
+            current_line.append(word)
+    lines.append(" ".join(current_line))
+    return lines
+
+
+def synthetic_texts(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 80)))
+        for _ in range(count)
+    ]
+
+
+def best_time(func: Callable[[], None], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--font", default="fonts/Lora-VariableFont_wght.ttf")
+    parser.add_argument("--size", type=int, default=48)
+    parser.add_argument("--width", type=int, default=880)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    font = load_font(args.font, args.size)
+    texts = synthetic_texts(args.texts)
+
+    def run_legacy() -> None:
+        for text in texts:
+            legacy_wrap(font, text, args.width)
+
+    def run_cold() -> None:
+        # Fresh measurer each run: includes measuring every distinct word
+        text_measure._measurers.clear()
+        measurer = get_measurer(font)
+        for text in texts:
+            measurer.wrap(text, args.width)
+
+    measurer = get_measurer(font)
+
+    def run_warm() -> None:
+        for text in texts:
+            measurer.wrap(text, args.width)
+
+    differing = sum(
+        legacy_wrap(font, text, args.width) != measurer.wrap(text, args.width)
+        for text in texts
+    )
+
+    legacy = best_time(run_legacy, args.repeat)
+    cold = best_time(run_cold, args.repeat)
+    warm = best_time(run_warm, args.repeat)
+    print(
+        f"{len(texts)} texts at {args.size}px in {args.width}px: "
+        f"legacy {legacy * 1000:.1f} ms, "
+        f"incremental {cold * 1000:.1f} ms cold ({legacy / cold:.1f}x), "
+        f"{warm * 1000:.1f} ms warm ({legacy / warm:.1f}x), "
+        f"{differing} with different line breaks"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
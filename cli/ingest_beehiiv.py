@@ -0,0 +1,85 @@
+import sys
+import os
+import asyncio
+import argparse
+import json
+
+# Add the project root directory to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from core.constants import INGEST_CONCURRENCY, INGEST_PAGE_SIZE
+from core.content.beehiiv_ingestion import ingest_publication
+from core.content.post_cache import PostContentCache
+from core.models.account_profile import AccountProfile
+from core.utils.logging_utils import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest every post of a Beehiiv publication into the post content store."
+    )
+    parser.add_argument("publication_id", help="Beehiiv publication id (pub_...)")
+    parser.add_argument(
+        "--api-key",
+        default=os.getenv("BEEHIIV_API_KEY"),
+        help="Beehiiv API key (default: $BEEHIIV_API_KEY)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("BEEHIIV_CACHE_DIR"),
+        help="Post content store directory (default: $BEEHIIV_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file to resume from (default: <cache-dir>/ingest-<publication_id>.json)",
+    )
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--page-size", type=int, default=INGEST_PAGE_SIZE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Cleaning processes (default: one per CPU, 0 to clean in threads)",
+    )
+    parser.add_argument(
+        "--status",
+        default="confirmed",
+        help="Beehiiv post status to ingest (default: confirmed)",
+    )
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("a Beehiiv API key is required (--api-key or $BEEHIIV_API_KEY)")
+    if not args.cache_dir:
+        parser.error("a store directory is required (--cache-dir or $BEEHIIV_CACHE_DIR)")
+
+    checkpoint = args.checkpoint or os.path.join(
+        args.cache_dir, f"ingest-{args.publication_id}.json"
+    )
+    account_profile = AccountProfile(
+        account_id="",
+        beehiiv_api_key=args.api_key,
+        subscribe_url="",
+        publication_id=args.publication_id,
+    )
+
+    configure_logging()
+    summary = asyncio.run(
+        ingest_publication(
+            account_profile,
+            checkpoint_path=checkpoint,
+            cache=PostContentCache(directory=args.cache_dir),
+            concurrency=args.concurrency,
+            page_size=args.page_size,
+            workers=args.workers,
+            status=args.status,
+        )
+    )
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Local verification of Supabase access tokens.
+
+Asking Supabase Auth (`auth.get_user`) about every request adds a network
+round trip before any work starts. Access tokens are JWTs signed by the
+project, so their signature, expiry and audience can be checked locally:
+
+- HS256 tokens with the project's JWT secret (SUPABASE_JWT_SECRET)
+- asymmetric tokens (RS256 / ES256) with the project's signing keys, fetched
+  from its JWKS endpoint (SUPABASE_JWKS_URL, default
+  <SUPABASE_URL>/auth/v1/.well-known/jwks.json) and cached
+
+Verified claims are kept in a short-TTL LRU keyed by a hash of the token, so
+repeat requests with the same token skip even the signature check. Entries
+never outlive the token's `exp`.
+
+Local verification cannot see a revoked session (sign-out, deleted user)
+until the token expires. Paths where that matters use `verify_remote`, which
+asks Supabase Auth. It is also the fallback for tokens whose key is not
+available (an HS256 token without SUPABASE_JWT_SECRET, JWKS unreachable);
+tokens it confirms are cached like local verifications, so such projects pay
+the round trip once per token and cache TTL rather than on every request.
+
+Usage:
+    claims = get_token_verifier().verify(token)
+    user_id = claims["sub"]
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+from cachetools import TTLCache
+from supabase import Client
+
+from core.constants import (
+    AUTH_CLOCK_LEEWAY_SECONDS,
+    AUTH_JWKS_CACHE_SECONDS,
+    AUTH_TOKEN_AUDIENCE,
+    AUTH_TOKEN_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+from core.utils import metrics
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+class TokenInvalid(Exception):
+    pass
+
+
+class TokenExpired(TokenInvalid):
+    pass
+
+
+class VerificationUnavailable(TokenInvalid):
+    """The token may be valid, but no key to check it locally is configured."""
+
+
+def token_key(token: str) -> str:
+    """Cache key for a token; tokens themselves are not kept as keys."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: str = AUTH_TOKEN_AUDIENCE,
+        cache_size: int = AUTH_TOKEN_CACHE_SIZE,
+        cache_ttl: float = AUTH_TOKEN_CACHE_TTL_SECONDS,
+    ):
+        self.secret = secret
+        self.audience = audience
+        self._jwks = (
+            jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=AUTH_JWKS_CACHE_SECONDS)
+            if jwks_url
+            else None
+        )
+        self._verified: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._lock = threading.Lock()
+
+    def _signing_key(self, token: str, algorithm: str) -> Any:
+        if algorithm == "HS256":
+            if not self.secret:
+                raise VerificationUnavailable("SUPABASE_JWT_SECRET is not set")
+            return self.secret
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            if self._jwks is None:
+                raise VerificationUnavailable("No JWKS endpoint is configured")
+            try:
+                return self._jwks.get_signing_key_from_jwt(token).key
+            except jwt.PyJWKClientConnectionError as e:
+                raise VerificationUnavailable(f"JWKS unavailable: {str(e)}")
+            except jwt.PyJWKClientError as e:
+                raise TokenInvalid(f"No signing key for token: {str(e)}")
+        raise TokenInvalid(f"Unsupported token algorithm {algorithm}")
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        try:
+            algorithm = jwt.get_unverified_header(token).get("alg")
+            claims = jwt.decode(
+                token,
+                self._signing_key(token, algorithm),
+                algorithms=[algorithm],
+                audience=self.audience,
+                leeway=AUTH_CLOCK_LEEWAY_SECONDS,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenExpired(str(e))
+        except jwt.InvalidTokenError as e:
+            raise TokenInvalid(str(e))
+        return claims
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims of a valid token, checked locally. Raises TokenExpired for
+        expired tokens, TokenInvalid for bad signatures, other audiences and
+        tokens without a user (`sub`), such as the anon and service role keys,
+        and VerificationUnavailable when the token's key is not configured.
+        """
+        key = token_key(token)
+        with self._lock:
+            claims = self._verified.get(key)
+        if claims is not None:
+            if claims["exp"] + AUTH_CLOCK_LEEWAY_SECONDS > time.time():
+                metrics.increment("auth_verifications", result="cached")
+                return claims
+            with self._lock:
+                self._verified.pop(key, None)
+
+        try:
+            claims = self._decode(token)
+        except VerificationUnavailable:
+            metrics.increment("auth_verifications", result="unavailable")
+            raise
+        except TokenInvalid:
+            metrics.increment("auth_verifications", result="invalid")
+            raise
+        metrics.increment("auth_verifications", result="local")
+        with self._lock:
+            self._verified[key] = claims
+        return claims
+
+    def verify_remote(self, token: str, supabase: Client) -> Dict[str, Any]:
+        """
+        Ask Supabase Auth whether the token's session is still valid (one
+        network round trip) and return its claims. For revocation-sensitive
+        paths, and where tokens cannot be checked locally. Tokens that fail
+        the local check are rejected without a round trip.
+        """
+        try:
+            claims: Optional[Dict[str, Any]] = self.verify(token)
+        except VerificationUnavailable:
+            claims = None
+
+        try:
+            user = supabase.auth.get_user(token).user
+        except Exception as e:
+            metrics.increment("auth_verifications", result="invalid")
+            raise TokenInvalid(str(e))
+        if user is None:
+            metrics.increment("auth_verifications", result="invalid")
+            raise TokenInvalid("User not found")
+
+        metrics.increment("auth_verifications", result="remote")
+        verified_locally = claims is not None
+        if claims is None:
+            claims = self._confirmed_claims(token)
+            if claims is None:
+                return {"sub": user.id, "email": user.email, "role": user.role}
+        if claims["sub"] != user.id:
+            raise TokenInvalid("Token subject does not match its user")
+        if not verified_locally:
+            # Cached until `exp` (checked by `verify`) or the cache TTL
+            with self._lock:
+                self._verified[token_key(token)] = claims
+        return claims
+
+    @staticmethod
+    def _confirmed_claims(token: str) -> Optional[Dict[str, Any]]:
+        """
+        Claims of a token Supabase Auth has just accepted, read without a key
+        (the signature was checked remotely), or None if they lack `exp` or
+        `sub` and so cannot be cached.
+        """
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None
+        if not isinstance(claims.get("exp"), (int, float)) or not claims.get("sub"):
+            return None
+        return claims
+
+    def forget(self, token: str) -> None:
+        """Drop a token's cached verification, e.g. after a sign-out."""
+        with self._lock:
+            self._verified.pop(token_key(token), None)
+
+
+_verifier: Optional[TokenVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Process-wide verifier configured from the environment."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                supabase_url = os.getenv("SUPABASE_URL")
+                jwks_url = os.getenv("SUPABASE_JWKS_URL") or (
+                    f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+                    if supabase_url
+                    else None
+                )
+                _verifier = TokenVerifier(
+                    secret=os.getenv("SUPABASE_JWT_SECRET"), jwks_url=jwks_url
+                )
+    return _verifier
@@ -1,35 +1,37 @@
-import os
-from supabase import create_client, Client
-import jwt
 from fastapi import HTTPException
 from dotenv import load_dotenv
 
+from core.auth.jwt_verifier import (
+    TokenExpired,
+    TokenInvalid,
+    VerificationUnavailable,
+    get_token_verifier,
+)
+from core.utils.supabase_clients import service_client
+
 # Load environment variables
 load_dotenv()
 
-supabase_url = os.environ.get("SUPABASE_URL")
-supabase_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 
-def verify_token(token: str):
+def verify_token(token: str, remote: bool = False) -> dict:
+    """
+    Claims of a valid Supabase access token, verified locally (see
+    core/auth/jwt_verifier.py). With `remote`, or when the token's key is not
+    configured, Supabase Auth confirms the session instead.
+    """
+    verifier = get_token_verifier()
     try:
-        # Decode the JWT token
-        decoded_token = jwt.decode(token, supabase_key, algorithms=["HS256"])
-
-        # Check if the token is valid
-        user = supabase.auth.get_user(token)
-
-        if user and user.id == decoded_token.get("sub"):
-            return user
-        else:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except jwt.ExpiredSignatureError:
+        if not remote:
+            try:
+                return verifier.verify(token)
+            except VerificationUnavailable:
+                pass
+        return verifier.verify_remote(token, service_client())
+    except TokenExpired:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.InvalidTokenError:
+    except TokenInvalid:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
 def get_user_id(token: str):
-    user = verify_token(token)
-    return user.id
+    return verify_token(token)["sub"]
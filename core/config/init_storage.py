@@ -1,6 +1,6 @@
 import logging
 from supabase import Client
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,23 @@ BUCKET_CONFIGS = {
 }
 
 
+SIZE_UNITS = {"KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+
+
+def file_size_limit_bytes(bucket_name: str) -> Optional[int]:
+    """A bucket's configured `fileSizeLimit` in bytes, or None if it has none."""
+    limit = BUCKET_CONFIGS.get(bucket_name, {}).get("fileSizeLimit")
+    if limit is None:
+        return None
+    if isinstance(limit, int):
+        return limit
+    limit = limit.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if limit.endswith(unit):
+            return int(float(limit[: -len(unit)]) * factor)
+    return int(limit)
+
+
 async def init_storage(supabase: Client):
     logger.info("Starting storage initialization...")
     try:
@@ -1,19 +1,14 @@
-from supabase import create_client, Client
-import os
 import logging
 
-logger = logging.getLogger(__name__)
+from core.utils.supabase_clients import service_client
 
-supabase: Client = create_client(
-    supabase_url=os.getenv("SUPABASE_URL"),
-    supabase_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
-)
+logger = logging.getLogger(__name__)
 
 
 def load_user_config(account_id: str) -> dict:
     try:
         response = (
-            supabase.table("user_profiles")
+            service_client().table("user_profiles")
             .select("*")
             .eq("account_id", account_id)
             .execute()
@@ -34,7 +29,7 @@ def load_user_config(account_id: str) -> dict:
 
 def save_user_config(account_id: str, config: dict) -> bool:
     try:
-        supabase.table("user_profiles").upsert(
+        service_client().table("user_profiles").upsert(
             {"account_id": account_id, **config}
         ).execute()
         return True
@@ -6,7 +6,7 @@ constants used throughout the application to improve maintainability
 and prevent hardcoded values.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Set
 
 # ============= Content Generation Limits =============
 
@@ -45,6 +45,15 @@ ARROW_SIZE = (60, 30)
 ARROW_MARGIN = 60
 IMAGE_MARGIN = 100
 
+# Text layout plans (positioned lines per slide or image list) kept in memory
+# per process, keyed by a hash of the text and layout settings
+TEXT_LAYOUT_CACHE_SIZE = 512
+
+# Part of every rendered artifact's content hash (see
+# core/content/image_generation/render_cache.py); bump it when a drawing change
+# should stop earlier renders of the same text from being reused
+RENDERER_VERSION = 1
+
 # ============= API Configuration =============
 
 # Timeout settings (in seconds)
@@ -128,6 +137,139 @@ MODEL_TIERS: Dict[str, Dict[str, Dict[str, Any]]] = {
 DEFAULT_TEMPERATURE = 0.5
 HIGH_CREATIVITY_TEMPERATURE = 0.7
 
+# Expected output size (in tokens) of one post container per content type.
+# Every per-section step (generation, image relevance, personalization, hooks,
+# polish) returns a container of roughly this size, so the request's max_tokens
+# is derived from it instead of reserving the tier's full output window.
+CONTENT_TYPE_OUTPUT_TOKENS: Dict[str, int] = {
+    "precta_tweet": 400,
+    "postcta_tweet": 400,
+    "thread_tweet": 1500,
+    "long_form_tweet": 1200,
+    "long_form_post": 1500,
+    "image_list": 600,
+    "carousel_tweet": 900,
+    "carousel_post": 1800,
+}
+DEFAULT_OUTPUT_TOKENS = 1500
+
+# Headroom applied on top of an output budget, and the smallest max_tokens sent
+OUTPUT_TOKEN_MARGIN = 1.3
+MIN_OUTPUT_TOKENS = 256
+
+# Rough characters-per-token ratio used to size steps that echo their input
+CHARS_PER_TOKEN = 4
+
+# Continuation requests allowed when a response stops on the token limit
+MAX_CONTINUATIONS = 2
+
+# ============= Beehiiv Post Cache =============
+
+# Entries kept in memory, and how long before they are evicted (seconds)
+POST_CACHE_MAX_ENTRIES = 256
+POST_CACHE_TTL_SECONDS = 30 * 60
+
+# An entry validated less than this many seconds ago is served without
+# asking Beehiiv whether the post changed
+POST_CACHE_FRESH_SECONDS = 60
+
+# ============= Beehiiv Publication Ingestion =============
+
+# Beehiiv allows 180 requests per minute per API key; stay below it so the
+# interactive pipeline keeps some headroom during a backfill
+BEEHIIV_REQUESTS_PER_MINUTE = 150
+
+# Posts listed per page, and post downloads in flight at once
+INGEST_PAGE_SIZE = 50
+INGEST_CONCURRENCY = 4
+
+# Attempts per request on 429 / 5xx / network errors, and the backoff cap
+INGEST_MAX_ATTEMPTS = 5
+INGEST_MAX_BACKOFF_SECONDS = 60
+
+# ============= Thumbnails =============
+
+# Largest thumbnail downloaded (bytes); bigger files are not mirrored
+THUMBNAIL_MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+
+# Thumbnails wider or taller than this are downscaled and re-encoded with the
+# "thumbnail" entry of IMAGE_ENCODERS (JPEG at THUMBNAIL_JPEG_QUALITY) before
+# upload; smaller ones are stored as downloaded
+THUMBNAIL_MAX_DIMENSION = 1600
+THUMBNAIL_JPEG_QUALITY = 85
+
+# ============= Image Encoding =============
+
+# Encoder settings per output (see core/content/image_generation/encoders.py):
+# encoding is png, png-palette, webp or jpeg; quality applies to webp/jpeg,
+# colors to png-palette, and max_bytes is an optional size target
+IMAGE_ENCODERS: Dict[str, Dict[str, Any]] = {
+    # Twitter accepts PNG, JPEG and WebP images up to 5MB
+    "slide_twitter": {
+        "encoding": "png-palette",
+        "colors": 16,
+        "max_bytes": 5 * 1024 * 1024,
+    },
+    # Embedded in the carousel PDF, which takes PNG and JPEG as they are
+    "slide_linkedin": {"encoding": "png-palette", "colors": 16},
+    # Flat text graphics like the slides: JPEG rings around the text and is
+    # about 4x larger than a 16-color palette
+    "image_list": {"encoding": "png-palette", "colors": 16},
+    "thumbnail": {"encoding": "jpeg", "quality": THUMBNAIL_JPEG_QUALITY},
+}
+
+# Encodings each output's destination accepts (limits IMAGE_ENCODING_* overrides)
+ACCEPTED_IMAGE_ENCODINGS: Dict[str, Set[str]] = {
+    "slide_twitter": {"png", "png-palette", "webp", "jpeg"},
+    "slide_linkedin": {"png", "png-palette", "jpeg"},
+    "image_list": {"png", "png-palette", "webp", "jpeg"},
+    "thumbnail": {"png", "webp", "jpeg"},
+}
+
+# ============= Storage Uploads =============
+
+# Attempts per upload, and the delay before the first retry (doubling after)
+STORAGE_UPLOAD_ATTEMPTS = 3
+STORAGE_UPLOAD_BACKOFF_SECONDS = 0.5
+
+# Carousel slides uploaded at once
+CAROUSEL_UPLOAD_CONCURRENCY = 4
+
+# LinkedIn carousel PDFs over the carousels bucket's size limit are re-encoded
+# as JPEG at these qualities, then downscaled by these factors at the lowest
+CAROUSEL_PDF_JPEG_QUALITIES = (90, 80, 70)
+CAROUSEL_PDF_DOWNSCALES = (0.75, 0.5)
+
+# ============= Outreach Images =============
+
+# Newsletters in their LLM stages at once in batch mode (each makes two
+# sequential "high" tier calls), and how often progress is logged
+OUTREACH_LLM_CONCURRENCY = 4
+OUTREACH_PROGRESS_EVERY = 10
+
+# ============= Generation Reuse =============
+
+# Section SimHash fingerprints (64 bit) within this many differing bits are
+# candidate matches (verified before reuse); short texts flip several bits per
+# edit
+SECTION_MAX_DISTANCE = 7
+
+# Candidate sections must also share this fraction of their word shingles;
+# high enough that an edited section is regenerated, while markup and
+# punctuation differences in the strategy's echo of it are ignored
+SECTION_MIN_SIMILARITY = 0.97
+
+# Entries kept in memory, and for how long (seconds)
+GENERATION_CACHE_MAX_DOCUMENTS = 512
+GENERATION_CACHE_MAX_SECTIONS = 4096
+GENERATION_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# ============= Pre-warming =============
+
+# How long a generate request waits for an in-flight pre-warm of its post
+# before running steps 1-3 itself
+PREWARM_WAIT_SECONDS = 20
+
 # ============= Content Processing Settings =============
 
 # HTML cleaning settings - allowed tags for content processing
@@ -151,18 +293,6 @@ ALLOWED_HTML_TAGS = {
     "li",
 }
 
-# Content type mapping for social media platforms
-CONTENT_TYPE_MAP: Dict[str, str] = {
-    "precta_tweet": "core.social_media.twitter.precta_tweet",
-    "postcta_tweet": "core.social_media.twitter.postcta_tweet",
-    "thread_tweet": "core.social_media.twitter.thread_tweet",
-    "long_form_tweet": "core.social_media.twitter.long_form_tweet",
-    "long_form_post": "core.social_media.linkedin.long_form_post",
-    "image_list": "core.social_media.image_list",
-    "carousel_tweet": "core.social_media.twitter.carousel_tweet",
-    "carousel_post": "core.social_media.linkedin.carousel_post",
-}
-
 # Content types that skip hook writing
 CAROUSEL_CONTENT_TYPES = ["carousel_tweet", "carousel_post"]
 
@@ -205,6 +335,21 @@ ERROR_MESSAGES = {
     "storage_error": "File storage operation failed",
 }
 
+# ============= Authentication =============
+
+# Supabase access tokens are issued for this audience
+AUTH_TOKEN_AUDIENCE = "authenticated"
+
+# Verified tokens remembered per process, and for how long (never past the
+# token's expiry); a revoked session stays usable at most this long
+AUTH_TOKEN_CACHE_SIZE = 4096
+AUTH_TOKEN_CACHE_TTL_SECONDS = 60
+
+# How long fetched JWKS signing keys are reused, and the clock skew allowed
+# when checking exp / iat
+AUTH_JWKS_CACHE_SECONDS = 10 * 60
+AUTH_CLOCK_LEEWAY_SECONDS = 10
+
 # ============= Environment Variables =============
 
 # Required environment variables
@@ -216,6 +361,8 @@ AI_PROVIDER_ENV_VARS = ["ANTHROPIC_API_KEY", "OPENAI_API_KEY"]
 # Optional environment variables
 OPTIONAL_ENV_VARS = [
     "LANGUAGE_MODEL_PROVIDER",
+    "SUPABASE_JWT_SECRET",
+    "SUPABASE_JWKS_URL",
     "GUILD_ID",
     "TWITTER_API_KEY",
     "TWITTER_API_SECRET",
@@ -1,126 +1,23 @@
+import asyncio
 import http.client
 import json
 import logging
 import re
-import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from urllib.parse import urlencode
 
-import aiohttp
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup
 from supabase import Client
 
+from core.content.html_cleaner import clean_html_content
+from core.content.post_cache import CachedPost, content_hash, get_post_cache
+from core.content.thumbnails import mirror_thumbnail
 from core.models.account_profile import AccountProfile
+from core.utils import metrics
+from core.utils.logging_utils import payload
 
 logger = logging.getLogger(__name__)
 
-# Define a whitelist of allowed tags for a cleaner, leaner HTML
-# We keep basic formatting, headings, paragraphs, lists, images, and links.
-ALLOWED_TAGS = {
-    "a",
-    "b",
-    "i",
-    "u",
-    "em",
-    "strong",
-    "img",
-    "p",
-    "h1",
-    "h2",
-    "h3",
-    "h4",
-    "h5",
-    "h6",
-    "ul",
-    "ol",
-    "li",
-}
-
-
-def clean_html_content(html_content: str) -> str:
-    """
-    Aggressively clean HTML content to optimize for AI processing.
-
-    This function performs comprehensive HTML sanitization to reduce token usage
-    while preserving essential content structure and formatting needed for
-    social media content generation.
-
-    Preserves:
-        - Basic semantic structure: headers (h1-h6), paragraphs, lists (ul, ol, li)
-        - Links (a) with href attributes for URL preservation
-        - Images (img) with src and alt attributes for image processing
-        - Text formatting: bold/italic (b, i, em, strong, u)
-
-    Removes:
-        - Script, style, meta, title, head tags and comments
-        - All attributes except 'href' for <a>, 'src' and 'alt' for <img>
-        - Non-whitelisted tags (but preserves their content)
-        - Zero-width spaces and excessive unicode whitespace
-        - DOCTYPE declarations and container tags (html, body, div, table, etc.)
-
-    Args:
-        html_content: Raw HTML content from newsletter or web source
-
-    Returns:
-        Cleaned HTML string optimized for AI processing with essential
-        structure preserved and token count minimized
-
-    Example:
-        ```python
-        raw_html = '''
-        <html><head><title>Newsletter</title></head>
-        <body><div><h1>Title</h1><p>Content</p></div></body>
-        </html>
-        '''
-        clean_html = clean_html_content(raw_html)
-        # Returns: '<h1>Title</h1><p>Content</p>'
-        ```
-    """
-
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # Remove script, style, meta, title, head, comments
-    for tag in soup(["script", "style", "meta", "title", "head"]):
-        tag.decompose()
-
-    for comment in soup.find_all(text=lambda text: isinstance(text, Comment)):
-        comment.extract()
-
-    # Remove doctype if present
-    if (
-        soup.contents
-        and soup.contents[0].name is None
-        and "DOCTYPE" in str(soup.contents[0])
-    ):
-        soup.contents[0].extract()
-
-    # Strip non-whitelisted tags, but keep their children
-    for tag in soup.find_all():
-        if tag.name not in ALLOWED_TAGS:
-            tag.unwrap()
-
-    # Clean attributes: only allow href on a, src/alt on img
-    for tag in soup.find_all(True):
-        allowed_attrs = {}
-        if tag.name == "a" and tag.has_attr("href"):
-            allowed_attrs["href"] = tag["href"]
-        if tag.name == "img":
-            if tag.has_attr("src"):
-                allowed_attrs["src"] = tag["src"]
-            if tag.has_attr("alt"):
-                allowed_attrs["alt"] = tag["alt"]
-        tag.attrs = allowed_attrs
-
-    # Get the HTML as a string
-    cleaned = str(soup)
-
-    # Remove zero-width spaces and excessive unicode whitespace
-    cleaned = cleaned.replace("\u200c", "").replace("\u00a0", " ")
-    # Normalize multiple spaces/newlines
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-
-    return cleaned
-
 
 def transform_images_into_placeholders(html_str: str) -> str:
     """
@@ -160,34 +57,101 @@ def transform_images_into_placeholders(html_str: str) -> str:
     return str(soup)
 
 
+def _beehiiv_get(
+    account_profile: AccountProfile, path: str, extra_headers: Dict[str, str] = None
+) -> Tuple[int, Dict[str, str], bytes]:
+    conn = http.client.HTTPSConnection("api.beehiiv.com")
+    headers = {
+        "Accept": "application/json",
+        "Authorization": f"Bearer {account_profile.beehiiv_api_key}",
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+    try:
+        conn.request("GET", path, headers=headers)
+        res = conn.getresponse()
+        body = res.read()
+        return res.status, dict(res.getheaders()), body
+    finally:
+        conn.close()
+
+
+def _post_path(account_profile: AccountProfile, post_id: str, expand: bool) -> str:
+    path = f"/v2/publications/{account_profile.publication_id}/posts/{post_id}"
+    if expand:
+        path += "?" + urlencode({"expand[]": "free_email_content"})
+    return path
+
+
+def _fetch_post_updated_at(account_profile: AccountProfile, post_id: str) -> Any:
+    """Post metadata without the email content; None if it can't be determined."""
+    try:
+        status, _, body = _beehiiv_get(
+            account_profile, _post_path(account_profile, post_id, expand=False)
+        )
+        if status != 200:
+            return None
+        return json.loads(body.decode("utf-8")).get("data", {}).get("updated_at")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Beehiiv metadata check failed for post {post_id}: {e}")
+        return None
+
+
 def get_beehiiv_post_content(
     account_profile: AccountProfile, post_id: str
 ) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a post's free email content, cleaned with image placeholders.
+
+    Results are cached per publication and post (see core/content/post_cache.py).
+    A cached post is served as-is right after it was validated; otherwise it is
+    revalidated with a conditional request (ETag / Last-Modified), or with the
+    post's `updated_at` from a metadata call when Beehiiv sent no validators.
+    Content that downloads unchanged is not cleaned again.
+    """
     try:
         if not account_profile.beehiiv_api_key:
             raise ValueError("Missing configuration key: 'beehiiv_api_key'")
         if not account_profile.publication_id:
             raise ValueError("Missing configuration key: 'publication_id'")
 
-        conn = http.client.HTTPSConnection("api.beehiiv.com")
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {account_profile.beehiiv_api_key}",
-        }
-
-        params = urlencode({"expand[]": "free_email_content"})
-        url = f"/v2/publications/{account_profile.publication_id}/posts/{post_id}?{params}"
-        conn.request("GET", url, headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-
-        if res.status != 200:
-            logger.error(f"Failed to fetch Beehiiv post content: HTTP {res.status}")
+        cache = get_post_cache()
+        cached = cache.get(account_profile.publication_id, post_id)
+        conditional_headers = {}
+        if cached is not None:
+            if cached.is_fresh():
+                metrics.increment("beehiiv_post_cache", result="fresh")
+                return cached.as_post_content()
+            if cached.has_validators():
+                if cached.etag:
+                    conditional_headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    conditional_headers["If-Modified-Since"] = cached.last_modified
+            elif cached.updated_at is not None and (
+                _fetch_post_updated_at(account_profile, post_id) == cached.updated_at
+            ):
+                cache.touch(cached)
+                metrics.increment("beehiiv_post_cache", result="unchanged")
+                return cached.as_post_content()
+
+        status, response_headers, data = _beehiiv_get(
+            account_profile,
+            _post_path(account_profile, post_id, expand=True),
+            conditional_headers,
+        )
+
+        if status == 304 and cached is not None:
+            cache.touch(cached)
+            metrics.increment("beehiiv_post_cache", result="not_modified")
+            return cached.as_post_content()
+
+        if status != 200:
+            logger.error(f"Failed to fetch Beehiiv post content: HTTP {status}")
             logger.error(f"Response body: {data.decode('utf-8')}")
             return None
 
         json_data = json.loads(data.decode("utf-8"))
-        logger.debug(f"Beehiiv API response: {json.dumps(json_data, indent=4)}")
+        logger.debug("Beehiiv API response: %s", payload(json_data))
 
         if "data" not in json_data:
             logger.error("Invalid response structure: 'data' key not found")
@@ -195,23 +159,39 @@ def get_beehiiv_post_content(
 
         data = json_data["data"]
         content = data.get("content", {})
-        free_content = content.get("free", {}).get("email")
-        thumbnail_url = data.get("thumbnail_url")
+        raw_content = content.get("free", {}).get("email")
+        raw_hash = content_hash(raw_content)
 
-        if free_content:
-            free_content = clean_html_content(free_content)
-            free_content = transform_images_into_placeholders(free_content)
+        if cached is not None and cached.content_hash == raw_hash:
+            free_content = cached.cleaned_content
+            metrics.increment("beehiiv_post_cache", result="downloaded_unchanged")
         else:
-            logger.warning(f"No free content found for post {post_id}")
-
-        web_url = data.get("web_url")
-
-        return {
-            "post_id": post_id,
-            "free_content": free_content,
-            "web_url": web_url,
-            "thumbnail_url": thumbnail_url,
-        }
+            free_content = None
+            if raw_content:
+                free_content = clean_html_content(
+                    raw_content, images_as_placeholders=True
+                )
+            else:
+                logger.warning(f"No free content found for post {post_id}")
+            metrics.increment(
+                "beehiiv_post_cache", result="miss" if cached is None else "changed"
+            )
+
+        headers = {name.lower(): value for name, value in response_headers.items()}
+        entry = CachedPost(
+            publication_id=account_profile.publication_id,
+            post_id=post_id,
+            raw_content=raw_content,
+            cleaned_content=free_content,
+            web_url=data.get("web_url"),
+            thumbnail_url=data.get("thumbnail_url"),
+            content_hash=raw_hash,
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            updated_at=data.get("updated_at"),
+        )
+        cache.put(entry)
+        return entry.as_post_content()
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON response: {e}")
@@ -231,7 +211,7 @@ def extract_text(html_str: str) -> str:
         raise ValueError("HTML string cannot be empty or None")
 
     try:
-        logger.info(f"Original HTML content: {html_str[:500]}...")
+        logger.debug("Original HTML content: %s", payload(html_str))
         soup = BeautifulSoup(html_str, "html.parser")
 
         # Extract text content
@@ -240,7 +220,7 @@ def extract_text(html_str: str) -> str:
         text = re.sub(r"https?://\S+", "", text)
         text = re.sub(r"\s+", " ", text).strip()
 
-        logger.info(f"Cleaned text: {text[:500]}...")
+        logger.debug("Cleaned text: %s", payload(text))
         return text
 
     except Exception as e:
@@ -252,32 +232,16 @@ async def fetch_beehiiv_content(
     account_profile: AccountProfile, post_id: str, supabase: Client
 ) -> Dict[str, Any]:
     try:
-        post_content = get_beehiiv_post_content(account_profile, post_id)
+        # The Beehiiv calls are blocking http.client requests
+        post_content = await asyncio.to_thread(
+            get_beehiiv_post_content, account_profile, post_id
+        )
         thumbnail_url = post_content.get("thumbnail_url") if post_content else None
         supabase_thumbnail_url = None
 
         if thumbnail_url:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(thumbnail_url) as resp:
-                        if resp.status == 200:
-                            content = await resp.read()
-                            file_name = f"{uuid.uuid4()}.jpg"
-
-                            # Upload to Supabase storage
-                            upload_result = supabase.storage.from_("thumbnails").upload(
-                                file_name, content
-                            )
-
-                            if upload_result and not isinstance(upload_result, dict):
-                                public_url_result = supabase.storage.from_(
-                                    "thumbnails"
-                                ).get_public_url(file_name)
-                                supabase_thumbnail_url = public_url_result
-                            else:
-                                logger.error(
-                                    f"Error uploading thumbnail: {upload_result}"
-                                )
+                supabase_thumbnail_url = await mirror_thumbnail(supabase, thumbnail_url)
             except Exception as e:
                 logger.error(f"Error processing thumbnail: {str(e)}")
 
@@ -325,9 +289,9 @@ Usage:
         account_profile, post_id, supabase_client
     )
     
-    # Clean HTML content
-    clean_content = clean_html_content(raw_html)
-    
-    # Transform images for AI processing
-    processed_content = transform_images_into_placeholders(clean_content)
+    # Clean HTML content and turn images into placeholders in one pass
+    processed_content = clean_html_content(raw_html, images_as_placeholders=True)
+
+    # Placeholders for content that skips the cleaner (pasted input)
+    processed_content = transform_images_into_placeholders(pasted_html)
 """
@@ -0,0 +1,419 @@
+"""
+Publication-wide Beehiiv ingestion.
+
+Onboarding a publication means pulling in every back issue, not one post id at
+a time. `ingest_publication` pages through the publication's posts list (oldest
+first, so new posts published mid-run land on later pages), downloads each
+post's free email content with bounded concurrency, cleans it into the
+placeholder form the pipeline consumes in a process pool, and stores the result
+in the post content store (core/content/post_cache.py) - the same entries
+`get_beehiiv_post_content` serves from.
+
+Requests go through a shared limiter kept below Beehiiv's per-key rate limit;
+429 and 5xx responses are retried with backoff, honouring Retry-After, and a
+429 pauses every worker, not just the one that hit it.
+
+Progress is checkpointed to a JSON file after every post: the current page (or
+cursor) and the posts of that page already done. A run that crashes at post 400
+resumes on that page and skips what it already stored. Posts whose `updated_at`
+matches the stored entry are not downloaded again, so re-running against an
+ingested publication only fetches what changed.
+
+Usage:
+    summary = await ingest_publication(
+        account_profile,
+        checkpoint_path="/tmp/ingest-pub_123.json",
+        cache=PostContentCache(directory="/var/cache/beehiiv"),
+    )
+
+See cli/ingest_beehiiv.py for the command-line entry point.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from core.constants import (
+    BEEHIIV_REQUESTS_PER_MINUTE,
+    HTTP_REQUEST_TIMEOUT,
+    INGEST_CONCURRENCY,
+    INGEST_MAX_ATTEMPTS,
+    INGEST_MAX_BACKOFF_SECONDS,
+    INGEST_PAGE_SIZE,
+)
+from core.content.html_cleaner import clean_html_content
+from core.content.post_cache import (
+    CachedPost,
+    PostContentCache,
+    content_hash,
+    get_post_cache,
+)
+from core.models.account_profile import AccountProfile
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+BEEHIIV_API_URL = "https://api.beehiiv.com"
+
+
+class RateLimiter:
+    """Spaces request starts evenly and lets any caller pause everyone."""
+
+    def __init__(self, requests_per_minute: int = BEEHIIV_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Push the next request slot back, e.g. after a 429."""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+@dataclass
+class IngestionCheckpoint:
+    publication_id: str
+    page: int = 1
+    cursor: Optional[str] = None
+    # Posts of the current page already stored or skipped
+    completed: List[str] = field(default_factory=list)
+    # Posts that still failed after every retry, with the last error
+    failed: Dict[str, str] = field(default_factory=dict)
+    stored: int = 0
+    unchanged: int = 0
+    finished: bool = False
+
+    @classmethod
+    def load(cls, path: Optional[str], publication_id: str) -> "IngestionCheckpoint":
+        """Resume from `path` if it holds an unfinished run of this publication."""
+        if not path:
+            return cls(publication_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                checkpoint = cls(**json.load(f))
+        except FileNotFoundError:
+            return cls(publication_id)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion checkpoint {path}: {e}")
+            return cls(publication_id)
+
+        if checkpoint.publication_id != publication_id:
+            raise ValueError(
+                f"Checkpoint {path} belongs to publication {checkpoint.publication_id}"
+            )
+        if checkpoint.finished:
+            return cls(publication_id)
+        return checkpoint
+
+    def save(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+class RequestFailed(Exception):
+    pass
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    return min(INGEST_MAX_BACKOFF_SECONDS, 2**attempt) + random.uniform(0, 1)
+
+
+class PublicationIngestion:
+    def __init__(
+        self,
+        account_profile: AccountProfile,
+        session: aiohttp.ClientSession,
+        cache: PostContentCache,
+        checkpoint: IngestionCheckpoint,
+        checkpoint_path: Optional[str],
+        executor: Optional[Executor],
+        concurrency: int = INGEST_CONCURRENCY,
+        page_size: int = INGEST_PAGE_SIZE,
+        status: str = "confirmed",
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.account_profile = account_profile
+        self.publication_id = account_profile.publication_id
+        self.session = session
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.executor = executor
+        self.page_size = page_size
+        self.status = status
+        self.limiter = limiter or RateLimiter()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _get_json(
+        self, path: str, params: List[Tuple[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        headers = {
+            "Accept": "application/json",
+            "Authorization": f"Bearer {self.account_profile.beehiiv_api_key}",
+        }
+        error = ""
+        for attempt in range(1, INGEST_MAX_ATTEMPTS + 1):
+            await self.limiter.acquire()
+            try:
+                async with self.session.get(
+                    BEEHIIV_API_URL + path, params=params, headers=headers
+                ) as resp:
+                    status = resp.status
+                    response_headers = {
+                        name.lower(): value for name, value in resp.headers.items()
+                    }
+                    body = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.increment("beehiiv_ingestion_requests", status="error")
+                error = f"{type(e).__name__}: {e}"
+                delay = _backoff(attempt)
+            else:
+                metrics.increment("beehiiv_ingestion_requests", status=status)
+                if status == 200:
+                    return json.loads(body.decode("utf-8")), response_headers
+                error = f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}"
+                if status != 429 and status < 500:
+                    raise RequestFailed(error)
+                delay = _retry_after(response_headers) or _backoff(attempt)
+                if status == 429:
+                    self.limiter.pause(delay)
+
+            if attempt == INGEST_MAX_ATTEMPTS:
+                break
+            logger.warning(
+                f"Beehiiv request {path} failed ({error}); retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        raise RequestFailed(error)
+
+    async def _list_page(self) -> Tuple[List[Dict[str, Any]], bool, Optional[str]]:
+        """Return (posts, has_more, next_cursor) for the checkpoint's position."""
+        params: List[Tuple[str, Any]] = [
+            ("limit", self.page_size),
+            ("status", self.status),
+            ("order_by", "created"),
+            ("direction", "asc"),
+        ]
+        if self.checkpoint.cursor:
+            params.append(("cursor", self.checkpoint.cursor))
+        else:
+            params.append(("page", self.checkpoint.page))
+
+        body, _ = await self._get_json(
+            f"/v2/publications/{self.publication_id}/posts", params
+        )
+        posts = body.get("data") or []
+        next_cursor = body.get("next_cursor")
+        if "has_more" in body:
+            has_more = bool(body["has_more"])
+        else:
+            has_more = self.checkpoint.page < (body.get("total_pages") or 0)
+        return posts, has_more and bool(posts), next_cursor
+
+    async def _clean(self, raw_content: str) -> str:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        cleaned = await loop.run_in_executor(
+            self.executor, clean_html_content, raw_content, True
+        )
+        metrics.observe("beehiiv_ingestion_clean_seconds", time.perf_counter() - start)
+        return cleaned
+
+    async def _ingest_post(self, post: Dict[str, Any]) -> str:
+        post_id = post["id"]
+        cached = self.cache.get(self.publication_id, post_id)
+        if (
+            cached is not None
+            and cached.updated_at is not None
+            and cached.updated_at == post.get("updated_at")
+        ):
+            return "unchanged"
+
+        async with self._semaphore:
+            body, response_headers = await self._get_json(
+                f"/v2/publications/{self.publication_id}/posts/{post_id}",
+                [("expand[]", "free_email_content")],
+            )
+
+        data = body.get("data") or {}
+        raw_content = data.get("content", {}).get("free", {}).get("email")
+        raw_hash = content_hash(raw_content)
+        if cached is not None and cached.content_hash == raw_hash:
+            cleaned = cached.cleaned_content
+        elif raw_content:
+            cleaned = await self._clean(raw_content)
+        else:
+            logger.warning(f"No free content found for post {post_id}")
+            cleaned = None
+
+        self.cache.put(
+            CachedPost(
+                publication_id=self.publication_id,
+                post_id=post_id,
+                raw_content=raw_content,
+                cleaned_content=cleaned,
+                web_url=data.get("web_url"),
+                thumbnail_url=data.get("thumbnail_url"),
+                content_hash=raw_hash,
+                etag=response_headers.get("etag"),
+                last_modified=response_headers.get("last-modified"),
+                updated_at=data.get("updated_at"),
+            )
+        )
+        return "stored"
+
+    async def _run_post(self, post: Dict[str, Any]) -> None:
+        post_id = post["id"]
+        try:
+            result = await self._ingest_post(post)
+        except (RequestFailed, ValueError) as e:
+            logger.error(f"Failed to ingest post {post_id}: {e}")
+            self.checkpoint.failed[post_id] = str(e)
+            result = "failed"
+        else:
+            self.checkpoint.failed.pop(post_id, None)
+            if result == "stored":
+                self.checkpoint.stored += 1
+            else:
+                self.checkpoint.unchanged += 1
+
+        metrics.increment("beehiiv_ingestion_posts", result=result)
+        if result != "failed":
+            # Failed posts stay pending, so resuming this page retries them
+            self.checkpoint.completed.append(post_id)
+        self.checkpoint.save(self.checkpoint_path)
+
+    async def run(self) -> Dict[str, Any]:
+        checkpoint = self.checkpoint
+        while True:
+            posts, has_more, next_cursor = await self._list_page()
+            done = set(checkpoint.completed)
+            pending = [post for post in posts if post["id"] not in done]
+            logger.info(
+                f"Ingesting page {checkpoint.page} of publication "
+                f"{self.publication_id}: {len(pending)} of {len(posts)} posts pending"
+            )
+            await asyncio.gather(*(self._run_post(post) for post in pending))
+
+            if not has_more:
+                break
+            checkpoint.page += 1
+            checkpoint.cursor = next_cursor
+            checkpoint.completed = []
+            checkpoint.save(self.checkpoint_path)
+
+        checkpoint.finished = True
+        checkpoint.save(self.checkpoint_path)
+        return {
+            "publication_id": self.publication_id,
+            "pages": checkpoint.page,
+            "stored": checkpoint.stored,
+            "unchanged": checkpoint.unchanged,
+            "failed": dict(checkpoint.failed),
+        }
+
+
+async def ingest_publication(
+    account_profile: AccountProfile,
+    checkpoint_path: Optional[str] = None,
+    cache: Optional[PostContentCache] = None,
+    concurrency: int = INGEST_CONCURRENCY,
+    page_size: int = INGEST_PAGE_SIZE,
+    workers: Optional[int] = None,
+    status: str = "confirmed",
+) -> Dict[str, Any]:
+    """
+    Ingest every post of a publication into the post content store.
+
+    Args:
+        account_profile: Profile holding the Beehiiv API key and publication id
+        checkpoint_path: JSON file to resume from and record progress in;
+            without it the run starts from the first page and keeps no state
+        cache: Store to write into; defaults to the process-wide post cache,
+            which only persists across runs when BEEHIIV_CACHE_DIR is set
+        concurrency: Post downloads in flight at once
+        page_size: Posts listed per page
+        workers: Cleaning processes; 0 cleans on the event loop's thread pool
+        status: Beehiiv post status to ingest ("confirmed", "draft", "all", ...)
+
+    Returns:
+        Summary with the number of posts stored, skipped as unchanged, and the
+        ids of posts that failed (with their last error)
+    """
+    if not account_profile.beehiiv_api_key:
+        raise ValueError("Missing configuration key: 'beehiiv_api_key'")
+    if not account_profile.publication_id:
+        raise ValueError("Missing configuration key: 'publication_id'")
+
+    cache = cache or get_post_cache()
+    if not cache.directory:
+        logger.warning(
+            "Post content store has no directory; ingested posts only live in "
+            "this process's memory cache"
+        )
+
+    checkpoint = IngestionCheckpoint.load(
+        checkpoint_path, account_profile.publication_id
+    )
+    if checkpoint.completed or checkpoint.page > 1:
+        logger.info(
+            f"Resuming ingestion at page {checkpoint.page} "
+            f"({len(checkpoint.completed)} posts of it already done)"
+        )
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    timeout = aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            ingestion = PublicationIngestion(
+                account_profile,
+                session,
+                cache,
+                checkpoint,
+                checkpoint_path,
+                executor,
+                concurrency=concurrency,
+                page_size=page_size,
+                status=status,
+            )
+            with metrics.timer("beehiiv_ingestion_seconds"):
+                summary = await ingestion.run()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logger.info(
+        f"Ingested publication {summary['publication_id']}: "
+        f"{summary['stored']} stored, {summary['unchanged']} unchanged, "
+        f"{len(summary['failed'])} failed"
+    )
+    return summary
@@ -1,31 +1,194 @@
+"""
+Content Type Registry.
+
+Single source of truth for the social media content types. Every instruction
+module under `core/social_media/` (a module exposing an `instructions` dict) is
+discovered and validated once, when this module is first imported; the content
+type name is the module name and the platform is its package.
+
+LLM steps register their prompt templates here at import time. Templates are
+plain strings with `${slot}` markers; the static slots (`content_type`,
+`platform`, `instructions`) are rendered into the text right away for every
+content type, so building a prompt per call is only a join over the remaining
+per-call slots.
+
+Usage:
+    SYSTEM_TEMPLATE = "Write a ${content_type}. ${instructions}"
+    USER_TEMPLATE = "Here is the post: ${post}"
+    register_step_prompts("ai_polish", SYSTEM_TEMPLATE, USER_TEMPLATE)
+
+    prompts = get_step_prompts("ai_polish", "thread_tweet")
+    user_content = prompts.user.render(post=generated_content)
+"""
+
+import importlib
 import logging
+import pkgutil
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
 
+import core.social_media
 
 logger = logging.getLogger(__name__)
 
+# Instruction keys the pipeline knows about, in pipeline order
+PIPELINE_STEPS = (
+    "content_generation",
+    "image_relevance",
+    "content_personalization",
+    "hook_writing",
+    "ai_polish",
+    "content_editing",
+)
+REQUIRED_STEPS = ("content_generation",)
+
+# Slots filled once per content type when a step registers its templates
+STATIC_SLOTS = ("content_type", "platform", "instructions")
+
+SLOT_PATTERN = re.compile(r"\$\{(\w+)\}")
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt split into literal text around the slots still to be filled."""
+
+    literals: Tuple[str, ...]
+    slots: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, template: str, static: Mapping[str, str]) -> "PromptTemplate":
+        """Parse `template`, rendering the slots available in `static` into the text."""
+        pieces = SLOT_PATTERN.split(template)
+        literals = [pieces[0]]
+        slots = []
+        for name, literal in zip(pieces[1::2], pieces[2::2]):
+            if name in static:
+                literals[-1] += static[name] + literal
+            else:
+                slots.append(name)
+                literals.append(literal)
+        return cls(tuple(literals), tuple(slots))
+
+    def render(self, **values) -> str:
+        """Fill the per-call slots; a missing value raises KeyError."""
+        parts = [self.literals[0]]
+        for name, literal in zip(self.slots, self.literals[1:]):
+            parts.append(str(values[name]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class ContentType:
+    name: str
+    module: str
+    platform: str
+    instructions: Mapping[str, str]
+
+
+@dataclass(frozen=True)
+class StepPrompts:
+    system: PromptTemplate
+    user: PromptTemplate
+    instructions: str
+
+
+def _validate(name: str, module_name: str, instructions) -> None:
+    if not isinstance(instructions, dict):
+        raise ValueError(f"{module_name}.instructions must be a dict")
+    for step, text in instructions.items():
+        if not isinstance(text, str):
+            raise ValueError(f"{module_name}.instructions['{step}'] must be a string")
+        if step not in PIPELINE_STEPS:
+            logger.warning(f"Unknown instruction step '{step}' in {module_name}")
+    for step in REQUIRED_STEPS:
+        if not instructions.get(step, "").strip():
+            raise ValueError(f"Content type '{name}' is missing '{step}' instructions")
+
+
+def _load_content_types() -> Dict[str, ContentType]:
+    content_types: Dict[str, ContentType] = {}
+    for module_info in pkgutil.walk_packages(
+        core.social_media.__path__, prefix="core.social_media."
+    ):
+        if module_info.ispkg:
+            continue
+        module = importlib.import_module(module_info.name)
+        instructions = getattr(module, "instructions", None)
+        if instructions is None:
+            continue
+
+        package, name = module_info.name.rsplit(".", 1)
+        if name in content_types:
+            raise ValueError(
+                f"Content type '{name}' defined by both {content_types[name].module} "
+                f"and {module_info.name}"
+            )
+        _validate(name, module_info.name, instructions)
+        content_types[name] = ContentType(
+            name=name,
+            module=module_info.name,
+            platform=package.rsplit(".", 1)[-1],
+            instructions=MappingProxyType(dict(instructions)),
+        )
+
+    logger.info(f"Loaded content types: {', '.join(sorted(content_types))}")
+    return content_types
+
+
+CONTENT_TYPES: Mapping[str, ContentType] = MappingProxyType(_load_content_types())
+
+_step_prompts: Dict[str, Mapping[str, StepPrompts]] = {}
+
+
+def get_content_type(content_type: str) -> ContentType:
+    try:
+        return CONTENT_TYPES[content_type]
+    except KeyError:
+        raise ValueError(f"Content type '{content_type}' not found.") from None
+
+
+def get_instructions_for_content_type(content_type: str) -> Mapping[str, str]:
+    """Read-only instructions of a content type, keyed by pipeline step."""
+    return get_content_type(content_type).instructions
+
+
+def get_platform_from_content_type(content_type: str) -> str:
+    return get_content_type(content_type).platform
+
+
+def register_step_prompts(step: str, system_template: str, user_template: str) -> None:
+    """
+    Pre-render a pipeline step's system and user templates for every content type.
+
+    Called once per step module at import. Content types without instructions
+    for the step get an empty string in the `${instructions}` slot.
+    """
+    compiled = {}
+    for name, content_type in CONTENT_TYPES.items():
+        instructions = content_type.instructions.get(step, "")
+        static = {
+            "content_type": name,
+            "platform": content_type.platform,
+            "instructions": instructions,
+        }
+        compiled[name] = StepPrompts(
+            system=PromptTemplate.compile(system_template, static),
+            user=PromptTemplate.compile(user_template, static),
+            instructions=instructions,
+        )
+    _step_prompts[step] = MappingProxyType(compiled)
+
 
-def get_instructions_for_content_type(content_type: str) -> dict:
-    # This is a basic implementation. In the future, we can expand this to load
-    # more specific instructions for each content type.
-    logger.info("get_instructions_for_content_type called in content_type_loader.py")
-    return {
-        "content_generation": "",
-        "structure_analysis": "",
-        "content_strategy": "",
-        "style_personalization": "",
-        "hook": "",
-        "ai_detection": "",
-        "final_review": "",
-        "formatting": {
-            "include_reply": False,
-            "reply_template": "",
-            "is_thread": False,
-            "thread_specific": {
-                "num_tweets": 0,
-                "include_article_link": False,
-                "article_link_template": "",
-                "include_quote_tweet": False,
-                "quote_tweet_text": "",
-            },
-        },
-    }
+def get_step_prompts(step: str, content_type: str) -> StepPrompts:
+    """Return the pre-rendered prompts of `step` for `content_type`."""
+    try:
+        prompts = _step_prompts[step]
+    except KeyError:
+        raise ValueError(f"No prompts registered for step '{step}'") from None
+    try:
+        return prompts[content_type]
+    except KeyError:
+        raise ValueError(f"Content type '{content_type}' not found.") from None
@@ -0,0 +1,344 @@
+"""
+Near-duplicate detection for reusing earlier generations.
+
+Creators republish lightly edited editions and cross-post the same essay, and
+each time the whole pipeline runs again. This module fingerprints what the
+pipeline has already processed so that work can be skipped:
+
+- documents: the cleaned newsletter text, mapped to the structure and strategy
+  produced for it (reusable regardless of content type)
+- sections: each strategy section's content, mapped to the final post output
+  generated from it (scoped to the account's voice settings and the content
+  type, since both shape the output) and to the edition it came from
+
+Documents are reused only when their text is identical. The cached strategy
+carries each section's content as it was, so reusing it for an edited edition
+would keep the old text of whatever changed (a corrected figure, a new CTA);
+an edited edition is analysed again, and the section index spares its
+unchanged sections.
+
+Section fingerprints are 64-bit SimHashes over word 3-shingles, indexed with
+LSH: the hash is cut into 8 bands of 8 bits, so any two fingerprints within 7
+bits of each other share at least one band and are found without a full scan.
+A section match must share SECTION_MIN_SIMILARITY of its shingles and come
+from a different edition (`edition_key`); generating the same edition again
+regenerates its sections. Only outputs produced without a failed step are
+stored.
+
+A republished or cross-posted edition has its own web URL, which generated
+posts link to. Text outputs are therefore scoped only by whether a URL was
+given, and a reused output gets the old URL replaced by the new one.
+Carousels render the URL into their images, so their scope includes it.
+
+Entries live in process memory, like the other pipeline caches.
+
+Usage:
+    cache = get_generation_cache()
+    reused = cache.lookup_document(account_id, content)
+    ...
+    scope = section_scope(account_profile, content_type, web_url)
+    edition = edition_key(post_id, content)
+    post_content = cache.lookup_section(scope, section_content, edition, web_url)
+"""
+
+import copy
+import hashlib
+import html
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Generic, List, Optional, Tuple, TypeVar
+
+from cachetools import TTLCache
+
+from core.constants import (
+    CAROUSEL_CONTENT_TYPES,
+    GENERATION_CACHE_MAX_DOCUMENTS,
+    GENERATION_CACHE_MAX_SECTIONS,
+    GENERATION_CACHE_TTL_SECONDS,
+    SECTION_MAX_DISTANCE,
+    SECTION_MIN_SIMILARITY,
+)
+from core.models.account_profile import AccountProfile
+from core.utils import metrics
+
+FINGERPRINT_BITS = 64
+BANDS = 8
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE_SIZE = 3
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WORD_PATTERN = re.compile(r"\w+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+V = TypeVar("V")
+
+
+def normalize_text(content: str) -> str:
+    """Lowercased text without tags, with whitespace collapsed."""
+    text = html.unescape(TAG_PATTERN.sub(" ", content or ""))
+    return WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+
+
+def _shingle_hashes(text: str) -> FrozenSet[int]:
+    words = WORD_PATTERN.findall(text)
+    if len(words) < SHINGLE_SIZE:
+        words = words + [""] * (SHINGLE_SIZE - len(words))
+    return frozenset(
+        int.from_bytes(
+            hashlib.blake2b(
+                " ".join(words[i : i + SHINGLE_SIZE]).encode("utf-8"), digest_size=8
+            ).digest(),
+            "big",
+        )
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+
+
+def simhash(shingles: FrozenSet[int]) -> int:
+    counts = [0] * FINGERPRINT_BITS
+    for value in shingles:
+        for bit in range(FINGERPRINT_BITS):
+            if value >> bit & 1:
+                counts[bit] += 1
+    threshold = len(shingles) / 2
+    fingerprint = 0
+    for bit, count in enumerate(counts):
+        if count > threshold:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _Entry(Generic[V]):
+    scope: str
+    fingerprint: int
+    text_hash: str
+    value: V
+    expires_at: float
+
+
+class SimHashIndex(Generic[V]):
+    """Bounded LRU of fingerprinted values with banded LSH lookup."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], _Entry[V]]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], set] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _band_keys(scope: str, fingerprint: int) -> List[Tuple[str, int, int]]:
+        return [
+            (scope, band, fingerprint >> (band * BAND_BITS) & BAND_MASK)
+            for band in range(BANDS)
+        ]
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        for band_key in self._band_keys(entry.scope, entry.fingerprint):
+            keys = self._bands.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band_key]
+
+    def add(self, scope: str, fingerprint: int, text_hash: str, value: V) -> None:
+        key = (scope, text_hash)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                scope, fingerprint, text_hash, value, time.time() + self.ttl
+            )
+            for band_key in self._band_keys(scope, fingerprint):
+                self._bands.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def candidates(
+        self, scope: str, fingerprint: int, max_distance: int
+    ) -> List[Tuple[int, _Entry[V]]]:
+        """Live entries within `max_distance` bits, closest first."""
+        now = time.time()
+        found = []
+        with self._lock:
+            keys = set()
+            for band_key in self._band_keys(scope, fingerprint):
+                keys |= self._bands.get(band_key, set())
+            for key in keys:
+                entry = self._entries[key]
+                if entry.expires_at < now:
+                    self._remove(key)
+                    continue
+                distance = hamming_distance(fingerprint, entry.fingerprint)
+                if distance <= max_distance:
+                    self._entries.move_to_end(key)
+                    found.append((distance, entry))
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+@dataclass
+class DocumentRecord:
+    structure: str
+    strategy: str
+
+
+@dataclass
+class SectionRecord:
+    shingles: FrozenSet[int]
+    post_content: Any
+    # Edition the output was generated for, and the URL it links to
+    edition: str
+    web_url: Optional[str]
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def section_scope(
+    account_profile: AccountProfile, content_type: str, web_url: Optional[str]
+) -> str:
+    """Everything besides the section text that shapes a section's output."""
+    if content_type in CAROUSEL_CONTENT_TYPES:
+        # Slides are rendered images; a link on them cannot be rewritten
+        link = web_url or ""
+    else:
+        link = "link" if web_url else ""
+    parts = [
+        account_profile.account_id,
+        content_type,
+        link,
+        account_profile.custom_prompt or "",
+        account_profile.example_tweet or "",
+        account_profile.example_linkedin or "",
+    ]
+    return _text_hash("\x1f".join(parts))
+
+
+def _replace_url(value: Any, old_url: str, new_url: str) -> Any:
+    if isinstance(value, str):
+        return value.replace(old_url, new_url)
+    if isinstance(value, list):
+        return [_replace_url(item, old_url, new_url) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: _replace_url(item, old_url, new_url) for key, item in value.items()
+        }
+    return value
+
+
+def edition_key(post_id: Optional[str], content: str) -> str:
+    """The edition a generation is for: its post, or its text if pasted."""
+    if post_id and post_id != "pasted-content":
+        return f"post:{post_id}"
+    return f"text:{_text_hash(normalize_text(content))}"
+
+
+class GenerationCache:
+    def __init__(
+        self,
+        max_documents: int = GENERATION_CACHE_MAX_DOCUMENTS,
+        max_sections: int = GENERATION_CACHE_MAX_SECTIONS,
+        ttl: float = GENERATION_CACHE_TTL_SECONDS,
+    ):
+        self._documents: TTLCache = TTLCache(maxsize=max_documents, ttl=ttl)
+        self._documents_lock = threading.Lock()
+        self._sections: SimHashIndex[SectionRecord] = SimHashIndex(max_sections, ttl)
+
+    def lookup_document(
+        self, account_id: str, content: str
+    ) -> Optional[DocumentRecord]:
+        """Structure and strategy of an earlier edition with the same text, if any."""
+        key = (account_id, _text_hash(normalize_text(content)))
+        with self._documents_lock:
+            record = self._documents.get(key)
+        metrics.increment(
+            "generation_reuse", level="document", result="hit" if record else "miss"
+        )
+        return record
+
+    def store_document(
+        self,
+        account_id: str,
+        content: str,
+        structure: str,
+        strategy: str,
+    ) -> None:
+        key = (account_id, _text_hash(normalize_text(content)))
+        with self._documents_lock:
+            self._documents[key] = DocumentRecord(structure, strategy)
+
+    def lookup_section(
+        self,
+        scope: str,
+        section_content: str,
+        edition: str,
+        web_url: Optional[str] = None,
+    ) -> Optional[Any]:
+        """
+        Final post output generated from an equivalent section of another
+        edition, if any, linking to `web_url` instead of that edition's URL.
+        """
+        text = normalize_text(section_content)
+        shingles = _shingle_hashes(text)
+        for _, entry in self._sections.candidates(
+            scope, simhash(shingles), SECTION_MAX_DISTANCE
+        ):
+            if entry.value.edition == edition:
+                continue
+            if jaccard(shingles, entry.value.shingles) >= SECTION_MIN_SIMILARITY:
+                metrics.increment("generation_reuse", level="section", result="hit")
+                old_url = entry.value.web_url
+                if old_url and web_url and old_url != web_url:
+                    return _replace_url(entry.value.post_content, old_url, web_url)
+                return copy.deepcopy(entry.value.post_content)
+        metrics.increment("generation_reuse", level="section", result="miss")
+        return None
+
+    def store_section(
+        self,
+        scope: str,
+        section_content: str,
+        post_content: Any,
+        edition: str,
+        web_url: Optional[str] = None,
+    ) -> None:
+        text = normalize_text(section_content)
+        shingles = _shingle_hashes(text)
+        self._sections.add(
+            scope,
+            simhash(shingles),
+            _text_hash(text),
+            SectionRecord(shingles, copy.deepcopy(post_content), edition, web_url),
+        )
+
+
+_generation_cache: Optional[GenerationCache] = None
+_generation_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """Process-wide cache, created on first use."""
+    global _generation_cache
+    if _generation_cache is None:
+        with _generation_cache_lock:
+            if _generation_cache is None:
+                _generation_cache = GenerationCache()
+    return _generation_cache
@@ -0,0 +1,342 @@
+"""
+Single-pass HTML cleaner for newsletter content.
+
+Beehiiv emails are large, table-based documents. Cleaning them used to take
+three BeautifulSoup parses (clean, image placeholders, and a repeat of the
+placeholder pass in the pipeline) plus several full-tree walks. This module
+does the same work in one streaming pass over the standard library tokenizer:
+tag whitelisting, attribute stripping, comment and script/style removal and,
+optionally, `[image:URL alt="ALT"]` placeholder emission.
+
+The output is byte-identical to the BeautifulSoup implementation it replaces
+(`html.parser` tree building, "minimal" output formatter, then whitespace
+normalization), including its nesting rules for unbalanced markup: an end tag
+closes every tag opened after the most recent matching start tag, and an end
+tag with no matching open tag is ignored.
+
+Usage:
+    cleaned = clean_html_content(raw_html)
+    for_llm = clean_html_content(raw_html, images_as_placeholders=True)
+"""
+
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# Define a whitelist of allowed tags for a cleaner, leaner HTML
+# We keep basic formatting, headings, paragraphs, lists, images, and links.
+ALLOWED_TAGS = {
+    "a",
+    "b",
+    "i",
+    "u",
+    "em",
+    "strong",
+    "img",
+    "p",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "ul",
+    "ol",
+    "li",
+}
+
+# Tags removed together with everything inside them
+REMOVED_TAGS = {"script", "style", "meta", "title", "head"}
+
+# Attributes kept per tag, in output (sorted) order
+ALLOWED_ATTRIBUTES = {"a": ("href",), "img": ("alt", "src")}
+
+# Tags closed as soon as they are opened (HTML void elements)
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "keygen",
+    "link",
+    "menuitem",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+    "basefont",
+    "bgsound",
+    "command",
+    "frame",
+    "image",
+    "isindex",
+    "nextid",
+    "spacer",
+}
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _escape(text: str) -> str:
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _quote_attribute(value: str) -> str:
+    value = _escape(value)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', "&quot;") + '"'
+
+
+def _normalize(text: str) -> str:
+    """Drop zero-width non-joiners, turn nbsp into spaces and collapse whitespace."""
+    return WHITESPACE_RE.sub(" ", text.replace("\u200c", "").replace("\u00a0", " "))
+
+
+def _numeric_reference(number: int) -> str:
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd"
+    if 0x80 <= number <= 0x9F:
+        # References written in their Windows-1252 encoding
+        try:
+            return bytes([number]).decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+
+class _StreamingCleaner(HTMLParser):
+    def __init__(self, images_as_placeholders: bool):
+        super().__init__(convert_charrefs=False)
+        self.images_as_placeholders = images_as_placeholders
+
+        # Open tags, innermost last, with a count per name for end-tag matching
+        self._stack: List[str] = []
+        self._open_counts: Dict[str, int] = {}
+        # Number of open tags whose whole subtree is being dropped
+        self._removed_depth = 0
+        # Void tags closed on open whose explicit end tag is still to be ignored
+        self._closed_voids: List[str] = []
+
+        # Until the first top-level node is known, top-level text is held back:
+        # a leading node mentioning DOCTYPE is dropped.
+        self._first_pending = True
+        self._pending_text: List[str] = []
+
+        # Output is a list of runs that get whitespace-normalized, separated by
+        # raw pieces that must come through untouched.
+        self._run: List[str] = []
+        self._segments: List[Tuple[str, str]] = []
+
+    # ---- output ----
+
+    def _emit_raw(self, text: str) -> None:
+        self._segments.append(("".join(self._run), text))
+        self._run = []
+
+    def result(self) -> str:
+        segments = self._segments + [("".join(self._run), "")]
+        last = len(segments) - 1
+        parts = []
+        for index, (run, raw) in enumerate(segments):
+            run = _normalize(run)
+            if index == 0:
+                run = run.lstrip()
+            if index == last:
+                run = run.rstrip()
+            parts.append(run)
+            parts.append(raw)
+        return "".join(parts)
+
+    # ---- tree bookkeeping ----
+
+    def _end_data(self) -> None:
+        if not self._pending_text:
+            return
+        text = "".join(self._pending_text)
+        self._pending_text = []
+        if not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self._first_pending = False
+        if "DOCTYPE" not in text:
+            self._run.append(_escape(text))
+
+    def _string_node(self, text: str) -> bool:
+        """Register a non-text string node; returns False if it is dropped."""
+        self._end_data()
+        if self._removed_depth:
+            return False
+        if self._first_pending and not self._stack:
+            self._first_pending = False
+            if "DOCTYPE" in text:
+                return False
+        return True
+
+    def _push(self, tag: str) -> None:
+        self._stack.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if tag in REMOVED_TAGS:
+            self._removed_depth += 1
+
+    def _pop_to(self, tag: str) -> None:
+        if not self._open_counts.get(tag):
+            return
+        while self._stack:
+            name = self._stack.pop()
+            self._open_counts[name] -= 1
+            if name in REMOVED_TAGS:
+                self._removed_depth -= 1
+            elif (
+                not self._removed_depth
+                and name in ALLOWED_TAGS
+                and name not in VOID_TAGS
+            ):
+                self._run.append(f"</{name}>")
+            if name == tag:
+                return
+
+    # ---- tokenizer callbacks ----
+
+    def handle_starttag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]], closes: bool = True
+    ) -> None:
+        self._end_data()
+        if not self._removed_depth and tag not in REMOVED_TAGS:
+            if self._first_pending and not self._stack:
+                self._first_pending = False
+            if tag in ALLOWED_TAGS:
+                self._emit_tag(tag, attrs)
+
+        self._push(tag)
+        if tag in VOID_TAGS and closes:
+            self._pop_to(tag)
+            self._closed_voids.append(tag)
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        self.handle_starttag(tag, attrs, closes=False)
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._closed_voids:
+            self._closed_voids.remove(tag)
+            return
+        self._end_data()
+        self._pop_to(tag)
+
+    def _emit_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        values: Dict[str, str] = {}
+        if allowed:
+            for name, value in attrs:
+                if name in allowed:
+                    values[name] = "" if value is None else value
+
+        if tag == "img" and self.images_as_placeholders:
+            src = _normalize(values.get("src", ""))
+            alt = _normalize(values.get("alt", ""))
+            self._emit_raw(_escape(f'[image:{src} alt="{alt}"]'))
+            return
+
+        attributes = "".join(
+            f" {name}={_quote_attribute(values[name])}"
+            for name in allowed
+            if name in values
+        )
+        closing = "/>" if tag in VOID_TAGS else ">"
+        self._run.append(f"<{tag}{attributes}{closing}")
+
+    def handle_data(self, data: str) -> None:
+        if self._removed_depth:
+            return
+        if self._first_pending and not self._stack:
+            self._pending_text.append(data)
+        else:
+            self._run.append(_escape(data))
+
+    def handle_charref(self, name: str) -> None:
+        if name[0] in "xX":
+            self.handle_data(_numeric_reference(int(name[1:], 16)))
+        else:
+            self.handle_data(_numeric_reference(int(name)))
+
+    def handle_entityref(self, name: str) -> None:
+        character = html5.get(name + ";")
+        self.handle_data(character if character is not None else "&" + name)
+
+    def handle_comment(self, data: str) -> None:
+        self._end_data()
+
+    def handle_decl(self, decl: str) -> None:
+        doctype = decl[len("DOCTYPE ") :]
+        if not self._string_node(doctype):
+            return
+        self._run.append(f"<!DOCTYPE {doctype}>")
+        if self.images_as_placeholders:
+            # Re-parsing the cleaned text re-adds the doctype's line break
+            self._emit_raw("\n")
+        self._run.append("\n")
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith("CDATA["):
+            data = data[len("CDATA[") :]
+            if self._string_node(data):
+                self._run.append(f"<![CDATA[{data}]]>")
+        elif self._string_node(data):
+            self._run.append(f"<?{data}?>")
+
+    def handle_pi(self, data: str) -> None:
+        if self._string_node(data):
+            self._run.append(f"<?{data}>")
+
+    def close(self) -> None:
+        super().close()
+        self._end_data()
+        while self._stack:
+            self._pop_to(self._stack[-1])
+
+
+def clean_html_content(html_content: str, images_as_placeholders: bool = False) -> str:
+    """
+    Aggressively clean HTML content to optimize for AI processing.
+
+    Keeps headings, paragraphs, lists, links (href only), images (src/alt only)
+    and basic text formatting; drops script/style/meta/title/head with their
+    contents, comments, all other attributes, and unwraps every other tag.
+    Zero-width non-joiners are removed and whitespace is collapsed.
+
+    Args:
+        html_content: Raw HTML content from newsletter or web source
+        images_as_placeholders: Emit `[image:URL alt="ALT"]` text instead of
+            <img> tags, as `transform_images_into_placeholders` would
+
+    Returns:
+        Cleaned HTML string
+
+    Example:
+        ```python
+        clean_html_content('<div><h1>Title</h1><img src="a.png"></div>', True)
+        # Returns: '<h1>Title</h1>[image:a.png alt=""]'
+        ```
+    """
+    cleaner = _StreamingCleaner(images_as_placeholders)
+    cleaner.feed(html_content)
+    cleaner.close()
+    return cleaner.result()
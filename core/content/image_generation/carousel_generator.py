@@ -1,19 +1,50 @@
+import asyncio
 import io
 import logging
 import time
-from PIL import Image, ImageDraw, ImageFont
+from dataclasses import asdict
+from PIL import Image, ImageDraw
 from PIL.ImageFont import FreeTypeFont
 from typing import Dict, Any, List, Optional
 import os
+from reportlab.lib.colors import HexColor
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
-from typing import Tuple, List
 
-from core.utils.storage_utils import upload_to_supabase
+from core.config.init_storage import file_size_limit_bytes
+from core.constants import (
+    CAROUSEL_PDF_DOWNSCALES,
+    CAROUSEL_PDF_JPEG_QUALITIES,
+    CAROUSEL_UPLOAD_CONCURRENCY,
+)
+from core.content.image_generation.encoders import (
+    EncodedImage,
+    encode_image,
+    get_encoder_settings,
+    record_encode_metrics,
+)
+from core.content.image_generation.fonts import register_pdf_font
+from core.content.image_generation.pdf_writer import image_from_bytes, write_image_pdf
+from core.content.image_generation.render_cache import artifact_name
+from core.content.image_generation.render_pool import run_in_render_pool
+from core.content.image_generation.text_layout import (
+    LayoutPlan,
+    TextBlock,
+    cached_plan,
+    fit_text,
+    layout_lines,
+    plan_key,
+)
+from core.utils import metrics
+from core.utils.storage_utils import (
+    stored_object_url,
+    upload_bytes_if_absent,
+)
 
 logger = logging.getLogger(__name__)
 
+# LinkedIn carousel PDFs: "raster" (PNG slides) or "vector" (text drawn as PDF)
+CAROUSEL_PDF_RENDERER = os.getenv("CAROUSEL_PDF_RENDERER", "raster").lower()
+
 
 class CarouselGenerator:
     def __init__(self, platform: str, font_path: Optional[str] = None):
@@ -41,6 +72,7 @@ class CarouselGenerator:
         # Margins & spacing
         self.side_margin = 100
         self.line_spacing = 1.2  # multiplier for line spacing
+        self.heading_spacing = 40  # between heading and subheading
 
     def _create_arrow(self, draw: ImageDraw) -> None:
         """Draw a minimal arrow in bottom-right corner."""
@@ -58,169 +90,80 @@ class CarouselGenerator:
             width=self.arrow_width,
         )
 
-    def _wrap_text(
-        self, text: str, font: ImageFont, max_width: int, draw: ImageDraw
-    ) -> List[str]:
-        """
-        Manually wrap text to fit `max_width` using the provided font.
-        Returns a list of lines that fit within the width.
-        """
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            # Measure text width with current font
-            w, _ = draw.textsize(test_line, font=font)
-            if w <= max_width:
-                current_line.append(word)
-            else:
-                lines.append(" ".join(current_line))
-                current_line = [word]
-        lines.append(" ".join(current_line))
-
-        return lines
-
-    def _fit_text_box(
-        self,
-        draw: ImageDraw,
-        text: str,
-        x: int,
-        y: int,
-        box_width: int,
-        box_height: int,
-        initial_font_size: int,
-    ) -> Tuple[ImageFont.ImageFont, List[str]]:
+    def _layout_slide(self, content: Dict[str, str]) -> LayoutPlan:
         """
-        Attempt to fit the entire 'text' inside the (box_width x box_height) area,
-        reducing font size as needed. Returns a tuple of (final_font, wrapped_lines).
+        Fit and position a slide's heading and subheading. Shared by the raster
+        and vector renderers, and cached by text and layout settings.
         """
-        # Start from the initial size, go down if needed
-        font_size = initial_font_size
-        min_font_size = 18  # Don't go below this to avoid unreadably small text
-
-        while font_size >= min_font_size:
-            font = ImageFont.truetype(self.font_path, font_size)
-            wrapped_lines = self._wrap_text(text, font, box_width, draw)
-
-            # Calculate total height
-            line_height = font.getmetrics()[0] + font.getmetrics()[1]
-            total_height = len(wrapped_lines) * line_height * self.line_spacing
-
-            if total_height <= box_height:
-                # Found a size that fits
-                return font, wrapped_lines
-
-            font_size -= 2
-
-        # If we exit loop, it means text is too long even at min font size
-        # We'll still return the min font and the wrapped lines (though it may overflow)
-        font = ImageFont.truetype(self.font_path, min_font_size)
-        wrapped_lines = self._wrap_text(text, font, box_width, draw)
-        return font, wrapped_lines
-
-    def _draw_multiline_text(
-        self,
-        draw: ImageDraw,
-        lines: List[str],
-        font: ImageFont,
-        x: int,
-        start_y: int,
-        line_spacing: float,
-        fill_color: str,
-    ) -> int:
-        """
-        Draw multiline text line by line, returning the total height consumed.
-        """
-        _, baseline = font.getmetrics()
-        line_height = baseline + font.getmetrics()[0]
-        total_height = 0
-
-        current_y = start_y
-        for line in lines:
-            draw.text((x, current_y), line, font=font, fill=fill_color)
-            current_y += line_height * line_spacing
-            total_height += line_height * line_spacing
-
-        return int(total_height)
-
-    def _create_slide(self, content: Dict[str, str], slide_index: int) -> Image:
-        """Create a single slide with improved text handling for longer content."""
-        img = Image.new("RGB", self.image_size, self.primary_dark)
-        draw = ImageDraw.Draw(img)
-
-        heading_text = content.get("heading", "")
-        subheading_text = content.get("subheading", "")
-
-        # Define bounding boxes for heading and subheading
-        # We'll allocate about half the slide for heading, half for subheading
-        # (You can adjust these proportions to your liking).
-        heading_box_height = self.image_size[1] // 3
-        subheading_box_height = self.image_size[1] // 2
-
-        # Fit heading text
-        heading_font, heading_lines = self._fit_text_box(
-            draw=draw,
-            text=heading_text,
-            x=self.side_margin,
-            y=self.side_margin,
-            box_width=self.image_size[0] - 2 * self.side_margin,
-            box_height=heading_box_height,
-            initial_font_size=self.heading_size_initial,
+        key = plan_key(
+            "slide",
+            self.font_path,
+            self.image_size,
+            self.side_margin,
+            self.heading_size_initial,
+            self.subheading_size_initial,
+            self.line_spacing,
+            self.heading_spacing,
+            content.get("heading", ""),
+            content.get("subheading", ""),
         )
-
-        # Calculate how many pixels heading actually occupies
-        heading_total_height = (
-            len(heading_lines)
-            * (heading_font.getmetrics()[0] + heading_font.getmetrics()[1])
-            * self.line_spacing
+        return cached_plan(key, lambda: self._plan_slide(content))
+
+    def _plan_slide(self, content: Dict[str, str]) -> LayoutPlan:
+        """Uncached `_layout_slide`."""
+        box_width = self.image_size[0] - 2 * self.side_margin
+
+        # We'll allocate about a third of the slide for the heading and half
+        # for the subheading (you can adjust these proportions to your liking)
+        heading_font, heading_lines = fit_text(
+            content.get("heading", ""),
+            self.font_path,
+            box_width,
+            self.image_size[1] // 3,
+            self.heading_size_initial,
+            line_spacing=self.line_spacing,
         )
-
-        # Fit subheading text
-        subheading_font, subheading_lines = self._fit_text_box(
-            draw=draw,
-            text=subheading_text,
-            x=self.side_margin,
-            y=self.side_margin + int(heading_total_height) + 40,
-            box_width=self.image_size[0] - 2 * self.side_margin,
-            box_height=subheading_box_height,
-            initial_font_size=self.subheading_size_initial,
+        subheading_font, subheading_lines = fit_text(
+            content.get("subheading", ""),
+            self.font_path,
+            box_width,
+            self.image_size[1] // 2,
+            self.subheading_size_initial,
+            line_spacing=self.line_spacing,
         )
 
-        # Now that we have both sets of lines, we’ll center them vertically in total
-        total_content_height = heading_total_height + 40
-        line_height_sub = (
-            subheading_font.getmetrics()[0] + subheading_font.getmetrics()[1]
-        ) * self.line_spacing
-        total_content_height += len(subheading_lines) * line_height_sub
+        def place(font: FreeTypeFont, lines: List[str], y: float) -> TextBlock:
+            return layout_lines(
+                lines,
+                font,
+                self.side_margin,
+                y,
+                box_width,
+                line_spacing=self.line_spacing,
+            )
 
+        # Measure both blocks, then center them vertically together
+        heading = place(heading_font, heading_lines, 0)
+        subheading = place(subheading_font, subheading_lines, 0)
+        total_content_height = (
+            heading.height + self.heading_spacing + subheading.height
+        )
         start_y = (self.image_size[1] - total_content_height) // 2
+        sub_start_y = start_y + int(heading.end_y) + self.heading_spacing
 
-        # Draw heading lines
-        heading_height_drawn = self._draw_multiline_text(
-            draw=draw,
-            lines=heading_lines,
-            font=heading_font,
-            x=self.side_margin,
-            start_y=start_y,
-            line_spacing=self.line_spacing,
-            fill_color=self.text_color,
+        return LayoutPlan(
+            (
+                place(heading_font, heading_lines, start_y),
+                place(subheading_font, subheading_lines, sub_start_y),
+            )
         )
 
-        # Spacing between heading and subheading
-        sub_start_y = start_y + heading_height_drawn + 40
+    def _create_slide(self, content: Dict[str, str], slide_index: int) -> Image:
+        """Create a single slide with improved text handling for longer content."""
+        img = Image.new("RGB", self.image_size, self.primary_dark)
+        draw = ImageDraw.Draw(img)
 
-        # Draw subheading lines
-        self._draw_multiline_text(
-            draw=draw,
-            lines=subheading_lines,
-            font=subheading_font,
-            x=self.side_margin,
-            start_y=sub_start_y,
-            line_spacing=self.line_spacing,
-            fill_color=self.text_color,
-        )
+        self._layout_slide(content).draw(draw, fill=self.text_color)
 
         # Add arrow if it's not the last slide
         if slide_index < self.max_slides - 1:
@@ -228,89 +171,289 @@ class CarouselGenerator:
 
         return img
 
+    @staticmethod
+    def _slide_spec(slide: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "heading": slide.get("heading", slide.get("content", "")),
+            "subheading": slide.get("subheading", ""),
+        }
+
+    def _artifact_name(self, kind: str, extension: str, *parts: Any) -> str:
+        # Every attribute is a theme, layout or platform setting
+        return artifact_name(kind, extension, vars(self), *parts)
+
+    def _slide_object_name(self, spec: Dict[str, str], slide_index: int) -> str:
+        settings = get_encoder_settings(f"slide_{self.platform}")
+        has_arrow = slide_index < self.max_slides - 1
+        return self._artifact_name(
+            "slide", settings.extension, asdict(settings), has_arrow, spec
+        )
+
+    def _pdf_object_name(self, specs: List[Dict[str, str]]) -> str:
+        if CAROUSEL_PDF_RENDERER == "vector":
+            return self._artifact_name("carousel", "pdf", "vector", specs)
+        # Raster PDFs also depend on the slide encoding and the size ladder
+        settings = get_encoder_settings(f"slide_{self.platform}")
+        return self._artifact_name(
+            "carousel",
+            "pdf",
+            "raster",
+            asdict(settings),
+            file_size_limit_bytes("carousels"),
+            CAROUSEL_PDF_JPEG_QUALITIES,
+            CAROUSEL_PDF_DOWNSCALES,
+            specs,
+        )
+
+    async def _render_slides(
+        self, slides: List[Dict[str, Any]]
+    ) -> List[EncodedImage]:
+        """Render and encode slides in parallel in the render pool, in order."""
+        specs = [self._slide_spec(slide) for slide in slides[: self.max_slides]]
+        with metrics.timer(
+            "carousel_phase_seconds", phase="render", platform=self.platform
+        ):
+            encoded = await asyncio.gather(
+                *(
+                    run_in_render_pool(
+                        render_slide, self.platform, self.font_path, spec, idx
+                    )
+                    for idx, spec in enumerate(specs)
+                )
+            )
+        for slide in encoded:
+            record_encode_metrics(slide)
+        return encoded
+
+    async def _render_and_upload_slides(
+        self, slides: List[Dict[str, Any]], supabase_client
+    ) -> List[str]:
+        """
+        Render slides and upload each as soon as it is ready, keeping at most
+        CAROUSEL_UPLOAD_CONCURRENCY uploads in flight. Slides are named by
+        content hash, and slides already stored are reused without rendering.
+        If any slide fails, the first error is raised once every slide has
+        finished. Uploaded slides are kept: another post or a concurrent render
+        of the same text may already link to them, and a later retry reuses
+        them.
+        """
+        specs = [self._slide_spec(slide) for slide in slides[: self.max_slides]]
+        semaphore = asyncio.Semaphore(CAROUSEL_UPLOAD_CONCURRENCY)
+        object_names = [
+            self._slide_object_name(spec, idx) for idx, spec in enumerate(specs)
+        ]
+
+        async def render_and_upload(idx: int, spec: Dict[str, str]) -> str:
+            url = await stored_object_url(
+                supabase_client, "carousels", object_names[idx]
+            )
+            if url is not None:
+                metrics.increment("render_cache", kind="slide", result="hit")
+                return url
+            metrics.increment("render_cache", kind="slide", result="miss")
+
+            start = time.perf_counter()
+            encoded = await run_in_render_pool(
+                render_slide, self.platform, self.font_path, spec, idx
+            )
+            record_encode_metrics(encoded)
+            metrics.observe(
+                "carousel_slide_seconds",
+                time.perf_counter() - start,
+                phase="render",
+                platform=self.platform,
+            )
+            async with semaphore:
+                start = time.perf_counter()
+                url, _ = await upload_bytes_if_absent(
+                    supabase_client,
+                    "carousels",
+                    object_names[idx],
+                    encoded.data,
+                    encoded.content_type,
+                )
+                metrics.observe(
+                    "carousel_slide_seconds",
+                    time.perf_counter() - start,
+                    phase="upload",
+                    platform=self.platform,
+                )
+                return url
+
+        with metrics.timer(
+            "carousel_phase_seconds", phase="render_upload", platform=self.platform
+        ):
+            # Wait for every slide, even after a failure, so no upload is left
+            # running after the carousel has failed
+            results = await asyncio.gather(
+                *(render_and_upload(idx, spec) for idx, spec in enumerate(specs)),
+                return_exceptions=True,
+            )
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.error(f"{len(errors)} of {len(specs)} carousel slides failed")
+            raise errors[0]
+        return results
+
     async def generate_carousel(
         self, content: Dict[str, Any], supabase_client
     ) -> List[str]:
         """Generate carousel images and upload to Supabase."""
         try:
-            slides = content["content_container"]
-            if self.platform == "linkedin":
-                post_images = []
-                for idx, slide in enumerate(slides[: self.max_slides]):
-                    slide_content = {
-                        "heading": slide.get("heading", slide.get("content", "")),
-                        "subheading": slide.get("subheading", ""),
-                    }
-                    image = self._create_slide(slide_content, idx)
-                    post_images.append(image)
-
-                # Generate PDF for LinkedIn
-                pdf_data = await self.generate_pdf_from_images(post_images)
-
-                # Upload PDF to Supabase
-                timestamp = int(time.time() * 1000)
-                filename = f"carousel_{content['post_number']}_{timestamp}.pdf"
-                supabase_client.storage.from_("carousels").upload(
-                    filename, pdf_data, file_options={"content-type": "application/pdf"}
+            if self.platform != "linkedin":
+                return await self._render_and_upload_slides(
+                    content["content_container"], supabase_client
                 )
 
-                # Get public URL
-                url = supabase_client.storage.from_("carousels").get_public_url(
-                    filename
-                )
+            # Generate PDF for LinkedIn, unless this carousel is already stored
+            specs = [
+                self._slide_spec(slide)
+                for slide in content["content_container"][: self.max_slides]
+            ]
+            filename = self._pdf_object_name(specs)
+            url = await stored_object_url(supabase_client, "carousels", filename)
+            if url is not None:
+                metrics.increment("render_cache", kind="carousel", result="hit")
                 return [url]
+            metrics.increment("render_cache", kind="carousel", result="miss")
+
+            if CAROUSEL_PDF_RENDERER == "vector":
+                with metrics.timer(
+                    "carousel_phase_seconds", phase="render", platform=self.platform
+                ):
+                    pdf_data = await run_in_render_pool(
+                        render_vector_pdf, self.platform, self.font_path, specs
+                    )
             else:
-                image_urls = []
-                for idx, slide in enumerate(slides[: self.max_slides]):
-                    slide_content = {
-                        "heading": slide.get("heading", slide.get("content", "")),
-                        "subheading": slide.get("subheading", ""),
-                    }
-                    image = self._create_slide(slide_content, idx)
-                    filename = f"carousel_{content['post_number']}_{idx}.png"
-                    url = await upload_to_supabase(
-                        supabase_client, image, "carousels", filename
+                slides = await self._render_slides(content["content_container"])
+                with metrics.timer(
+                    "carousel_phase_seconds", phase="pdf", platform=self.platform
+                ):
+                    pdf_data = await asyncio.to_thread(
+                        self.generate_pdf_from_slides, [slide.data for slide in slides]
                     )
-                    image_urls.append(url)
 
-                return image_urls
+            # Upload PDF to Supabase
+            with metrics.timer(
+                "carousel_phase_seconds", phase="upload", platform=self.platform
+            ):
+                url, _ = await upload_bytes_if_absent(
+                    supabase_client,
+                    "carousels",
+                    filename,
+                    pdf_data,
+                    "application/pdf",
+                )
+            return [url]
 
         except Exception as e:
             logger.error(f"Error generating carousel: {str(e)}")
             raise
 
-    async def generate_pdf_from_images(self, image_list: List[Image.Image]) -> bytes:
-        """Convert a list of PIL Images into a single PDF."""
+    def generate_vector_pdf(self, specs: List[Dict[str, str]]) -> bytes:
+        """
+        Draw slides straight into a PDF: background, text in the embedded
+        font and the arrow as vector operations, positioned by the same
+        `_layout_slide` as the raster slides (one point per slide pixel).
+        """
+        width, height = self.image_size
+        font_name = register_pdf_font(self.font_path)
         buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
+        c = canvas.Canvas(buffer, pagesize=(width, height), pageCompression=1)
+
+        for slide_index, content in enumerate(specs):
+            c.setFillColor(HexColor(self.primary_dark))
+            c.rect(0, 0, width, height, stroke=0, fill=1)
+
+            c.setFillColor(HexColor(self.text_color))
+            for block in self._layout_slide(content).blocks:
+                ascent, _ = block.font.getmetrics()
+                c.setFont(font_name, block.font_size)
+                for line in block.lines:
+                    # PIL positions text by its ascender, PDF by the baseline
+                    c.drawString(line.x, height - line.y - ascent, line.text)
+
+            if slide_index < self.max_slides - 1:
+                margin = self.arrow_margin
+                x1 = width - margin - self.arrow_size[0]
+                x2 = width - margin
+                y = margin
+                c.setStrokeColor(HexColor(self.arrow_color))
+                c.setLineWidth(self.arrow_width)
+                c.line(x1, y, x2, y)
+                c.lines([(x2 - 20, y + 20, x2, y), (x2, y, x2 - 20, y - 20)])
 
-        for img in image_list:
-            img_buffer = io.BytesIO()
-            img.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
+            c.showPage()
 
-            img_width, img_height = img.size
-            aspect = img_height / float(img_width)
+        c.save()
+        return buffer.getvalue()
 
-            page_width = letter[0]
-            page_height = letter[1]
+    def generate_pdf_from_slides(self, slide_images: List[bytes]) -> bytes:
+        """
+        Combine PNG- or JPEG-encoded slides into one PDF with a page per slide.
 
-            # Calculate dimensions to fit page while preserving aspect ratio
-            if aspect > 1:
-                # Taller image
-                img_width = page_width - 40
-                img_height = img_width * aspect
+        Slides are embedded without re-encoding. If the file exceeds the
+        carousels bucket's size limit, the slides are re-encoded as JPEG down
+        CAROUSEL_PDF_JPEG_QUALITIES and then downscaled; the last rung is
+        returned even if it is still too large, so the upload is attempted
+        rather than the carousel failing here.
+        """
+        # One point per slide pixel, so pages have the slide's aspect ratio
+        page_size = self.image_size
+        limit = file_size_limit_bytes("carousels")
+
+        pdf = write_image_pdf(
+            [image_from_bytes(data) for data in slide_images], page_size
+        )
+        encoding = "lossless"
+        if limit and len(pdf) > limit:
+            slides = []
+            for data in slide_images:
+                with Image.open(io.BytesIO(data)) as image:
+                    slides.append(image.convert("RGB"))
+            ladder = [(1.0, quality) for quality in CAROUSEL_PDF_JPEG_QUALITIES] + [
+                (scale, CAROUSEL_PDF_JPEG_QUALITIES[-1])
+                for scale in CAROUSEL_PDF_DOWNSCALES
+            ]
+            for scale, quality in ladder:
+                images = []
+                for slide in slides:
+                    if scale < 1:
+                        slide = slide.resize(
+                            (int(slide.width * scale), int(slide.height * scale)),
+                            Image.LANCZOS,
+                        )
+                    buffer = io.BytesIO()
+                    slide.save(buffer, format="JPEG", quality=quality, optimize=True)
+                    images.append(image_from_bytes(buffer.getvalue()))
+                pdf = write_image_pdf(images, page_size)
+                encoding = f"jpeg-q{quality}-x{scale:g}"
+                if len(pdf) <= limit:
+                    break
             else:
-                # Wider image
-                img_height = page_height - 40
-                img_width = img_height / aspect
-
-            x = (page_width - img_width) / 2
-            y = (page_height - img_height) / 2
-            c.drawImage(
-                ImageReader(img_buffer), x, y, width=img_width, height=img_height
-            )
-            c.showPage()
+                logger.warning(
+                    f"Carousel PDF is {len(pdf)} bytes after every size reduction, "
+                    f"over the {limit} byte bucket limit"
+                )
 
-        c.save()
-        return buffer.getvalue()
+        metrics.increment("carousel_pdf", encoding=encoding)
+        metrics.observe("carousel_pdf_bytes", len(pdf))
+        return pdf
+
+
+def render_slide(
+    platform: str, font_path: str, slide_content: Dict[str, str], slide_index: int
+) -> EncodedImage:
+    """Render and encode one slide for its platform. Runs in a render pool worker."""
+    image = CarouselGenerator(platform, font_path)._create_slide(
+        slide_content, slide_index
+    )
+    return encode_image(image, f"slide_{platform}", record_metrics=False)
+
+
+def render_vector_pdf(
+    platform: str, font_path: str, specs: List[Dict[str, str]]
+) -> bytes:
+    """Render a whole carousel as a vector PDF. Runs in a render pool worker."""
+    return CarouselGenerator(platform, font_path).generate_vector_pdf(specs)
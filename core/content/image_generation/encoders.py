@@ -0,0 +1,176 @@
+"""
+Output encoders for generated images.
+
+Slides are two colors plus antialiasing, so full RGB PNG wastes most of its
+bytes. Each kind of output ("use") has its own encoder settings in
+`IMAGE_ENCODERS`, limited to the formats its destination accepts:
+
+- png: lossless RGB
+- png-palette: quantized to a few colors without dithering; several times
+  smaller than RGB PNG for slides and image lists and visually identical
+- webp: lossy WebP (Twitter only; LinkedIn PDFs cannot embed it)
+- jpeg: for photos (thumbnails)
+
+With `max_bytes` set, lossy encodings step down in quality and palette
+encodings in colors until the output fits; the smallest attempt is returned
+either way, so encoding never fails on size.
+
+The encoding for a use can be overridden per deployment, e.g.
+IMAGE_ENCODING_SLIDE_TWITTER=webp.
+
+Usage:
+    encoded = encode_image(image, "slide_twitter")
+    await upload_bytes_if_absent(supabase, bucket, f"name.{encoded.extension}",
+                                 encoded.data, encoded.content_type)
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+from core.constants import ACCEPTED_IMAGE_ENCODINGS, IMAGE_ENCODERS
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# encoding -> (content type, file extension)
+ENCODING_TYPES = {
+    "png": ("image/png", "png"),
+    "png-palette": ("image/png", "png"),
+    "webp": ("image/webp", "webp"),
+    "jpeg": ("image/jpeg", "jpg"),
+}
+
+# Size-target ladder limits
+MIN_QUALITY = 40
+QUALITY_STEP = 10
+MIN_COLORS = 4
+
+
+@dataclass(frozen=True)
+class EncoderSettings:
+    encoding: str
+    # WebP / JPEG quality
+    quality: int = 85
+    # Palette size for png-palette
+    colors: int = 16
+    # Size target in bytes; None encodes once
+    max_bytes: Optional[int] = None
+
+    @property
+    def content_type(self) -> str:
+        return ENCODING_TYPES[self.encoding][0]
+
+    @property
+    def extension(self) -> str:
+        return ENCODING_TYPES[self.encoding][1]
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    content_type: str
+    extension: str
+    use: str
+    encoding: str
+    encode_seconds: float
+
+
+def get_encoder_settings(use: str) -> EncoderSettings:
+    """Settings for `use`, with a valid IMAGE_ENCODING_<USE> override applied."""
+    settings = EncoderSettings(**IMAGE_ENCODERS[use])
+    override = os.getenv(f"IMAGE_ENCODING_{use.upper()}")
+    if override:
+        override = override.lower()
+        if override in ACCEPTED_IMAGE_ENCODINGS[use]:
+            settings = replace(settings, encoding=override)
+        else:
+            logger.warning(
+                f"Encoding '{override}' is not accepted for {use}, "
+                f"using {settings.encoding}"
+            )
+    return settings
+
+
+def _encode_once(image: Image.Image, settings: EncoderSettings) -> bytes:
+    buffer = BytesIO()
+    if settings.encoding == "png-palette":
+        image.convert("RGB").quantize(
+            settings.colors,
+            method=Image.Quantize.FASTOCTREE,
+            dither=Image.Dither.NONE,
+        ).save(buffer, format="PNG")
+    elif settings.encoding == "webp":
+        image.save(buffer, format="WEBP", quality=settings.quality, method=4)
+    elif settings.encoding == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format="JPEG", quality=settings.quality, optimize=True)
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _smaller(settings: EncoderSettings) -> Optional[EncoderSettings]:
+    """Next rung of the size ladder, or None at the bottom."""
+    if settings.encoding in ("webp", "jpeg") and settings.quality > MIN_QUALITY:
+        return replace(
+            settings, quality=max(MIN_QUALITY, settings.quality - QUALITY_STEP)
+        )
+    if settings.encoding == "png-palette" and settings.colors > MIN_COLORS:
+        return replace(settings, colors=max(MIN_COLORS, settings.colors // 2))
+    return None
+
+
+def record_encode_metrics(encoded: EncodedImage) -> None:
+    """
+    Record image_encode_seconds and image_encode_bytes. Called by the process
+    that owns the metrics, since encodes in render pool workers can't.
+    """
+    labels = {"use": encoded.use, "encoding": encoded.encoding}
+    metrics.observe("image_encode_seconds", encoded.encode_seconds, **labels)
+    metrics.observe("image_encode_bytes", len(encoded.data), **labels)
+
+
+def encode_image(
+    image: Image.Image,
+    use: str,
+    settings: Optional[EncoderSettings] = None,
+    record_metrics: bool = True,
+) -> EncodedImage:
+    """
+    Encode `image` for `use` (a key of IMAGE_ENCODERS). Pass
+    `record_metrics=False` in render pool workers and call
+    `record_encode_metrics` on the result in the caller instead.
+    """
+    settings = settings or get_encoder_settings(use)
+    start = time.perf_counter()
+
+    data = _encode_once(image, settings)
+    current = settings
+    while settings.max_bytes and len(data) > settings.max_bytes:
+        current = _smaller(current)
+        if current is None:
+            logger.warning(
+                f"{use} image is {len(data)} bytes as {settings.encoding}, "
+                f"over the {settings.max_bytes} byte target"
+            )
+            break
+        data = min(data, _encode_once(image, current), key=len)
+
+    encoded = EncodedImage(
+        data=data,
+        content_type=settings.content_type,
+        extension=settings.extension,
+        use=use,
+        encoding=settings.encoding,
+        encode_seconds=time.perf_counter() - start,
+    )
+    if record_metrics:
+        record_encode_metrics(encoded)
+    return encoded
@@ -0,0 +1,41 @@
+"""
+Process-wide font cache.
+
+Loading a TrueType font reads and parses the file, which dominated slide
+layout when fonts were loaded per candidate size. Fonts are immutable once
+loaded, so one object per (path, size) is shared by every caller.
+
+The vector PDF renderer registers the same font files with ReportLab once per
+process, under a name derived from the path.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import Dict
+
+from PIL import ImageFont
+from PIL.ImageFont import FreeTypeFont
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Absolute font path -> ReportLab font name
+_pdf_fonts: Dict[str, str] = {}
+_pdf_fonts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=128)
+def load_font(path: str, size: int) -> FreeTypeFont:
+    return ImageFont.truetype(path, size)
+
+
+def register_pdf_font(path: str) -> str:
+    """Register a TrueType font with ReportLab once and return its PDF font name."""
+    key = os.path.abspath(path)
+    with _pdf_fonts_lock:
+        name = _pdf_fonts.get(key)
+        if name is None:
+            name = f"SlideFont{len(_pdf_fonts)}"
+            pdfmetrics.registerFont(TTFont(name, path))
+            _pdf_fonts[key] = name
+    return name
@@ -0,0 +1,217 @@
+"""
+Minimal PDF writer for image-only documents (LinkedIn carousels).
+
+Each page shows one image filling a page of the image's own aspect ratio. The
+encoded image is embedded as-is instead of being decoded and re-compressed:
+
+- PNG: the concatenated IDAT data already is a zlib stream of PNG-filtered
+  scanlines, which PDF reads directly with /FlateDecode and the PNG predictor
+  (8-bit grayscale and RGB, and palette images at any bit depth)
+- JPEG: embedded verbatim with /DCTDecode
+
+Images the writer cannot embed directly (alpha, 16-bit, interlaced PNGs) are
+converted to RGB PNG once by `image_from_bytes`.
+
+Usage:
+    images = [image_from_bytes(png) for png in slide_pngs]
+    pdf = write_image_pdf(images, page_size=(1200, 1500))
+"""
+
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color type -> (PDF color space, color components); palette handled apart
+PNG_COLOR_TYPES = {0: ("/DeviceGray", 1), 2: ("/DeviceRGB", 3)}
+JPEG_COLOR_SPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+
+
+@dataclass
+class PdfImage:
+    width: int
+    height: int
+    # PDF color space, e.g. "/DeviceRGB" or an /Indexed array
+    color_space: str
+    bits_per_component: int
+    filter: str
+    data: bytes
+    decode_parms: Optional[str] = None
+    # Extra dictionary entries, e.g. "/Decode [1 0 1 0 1 0 1 0]" for Adobe CMYK
+    extra: str = ""
+
+
+def _png_chunks(png: bytes):
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(png):
+        length, chunk_type = struct.unpack(">I4s", png[offset : offset + 8])
+        yield chunk_type, png[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+        if chunk_type == b"IEND":
+            return
+
+
+def image_from_png(png: bytes) -> Optional[PdfImage]:
+    """Embed a PNG's compressed data as-is; None if its format needs conversion."""
+    if not png.startswith(PNG_SIGNATURE):
+        return None
+
+    header = None
+    palette = None
+    idat = []
+    for chunk_type, data in _png_chunks(png):
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", data)
+        elif chunk_type == b"PLTE":
+            palette = data
+        elif chunk_type == b"IDAT":
+            idat.append(data)
+    if header is None or not idat:
+        return None
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if interlace:
+        return None
+    if color_type == 3 and palette:
+        colors = 1
+        color_space = (
+            f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+        )
+    elif color_type in PNG_COLOR_TYPES and bit_depth == 8:
+        color_space, colors = PNG_COLOR_TYPES[color_type]
+    else:
+        return None
+
+    return PdfImage(
+        width=width,
+        height=height,
+        color_space=color_space,
+        bits_per_component=bit_depth,
+        filter="/FlateDecode",
+        data=b"".join(idat),
+        decode_parms=(
+            f"<< /Predictor 15 /Colors {colors} "
+            f"/BitsPerComponent {bit_depth} /Columns {width} >>"
+        ),
+    )
+
+
+def image_from_jpeg(jpeg: bytes) -> Optional[PdfImage]:
+    """Embed a baseline or progressive JPEG verbatim."""
+    # Opening only parses the header; the pixels are never decoded
+    with Image.open(BytesIO(jpeg)) as image:
+        if image.format != "JPEG" or image.mode not in JPEG_COLOR_SPACES:
+            return None
+        width, height = image.size
+        mode = image.mode
+        adobe = "adobe" in image.info
+    return PdfImage(
+        width=width,
+        height=height,
+        color_space=JPEG_COLOR_SPACES[mode],
+        bits_per_component=8,
+        filter="/DCTDecode",
+        data=jpeg,
+        # Photoshop writes inverted CMYK JPEGs
+        extra="/Decode [1 0 1 0 1 0 1 0]" if mode == "CMYK" and adobe else "",
+    )
+
+
+def image_from_bytes(data: bytes) -> PdfImage:
+    """Embed PNG or JPEG bytes, converting only formats PDF cannot take directly."""
+    image = image_from_png(data) if data.startswith(PNG_SIGNATURE) else None
+    if image is None and data.startswith(b"\xff\xd8"):
+        image = image_from_jpeg(data)
+    if image is None:
+        with Image.open(BytesIO(data)) as decoded:
+            buffer = BytesIO()
+            decoded.convert("RGB").save(buffer, format="PNG")
+        image = image_from_png(buffer.getvalue())
+    return image
+
+
+def _number(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def write_image_pdf(
+    images: List[PdfImage], page_size: Optional[Tuple[float, float]] = None
+) -> bytes:
+    """
+    Write a PDF with one full-page image per page.
+
+    Args:
+        images: Embedded images, one per page
+        page_size: Page (width, height) in points; defaults to each image's
+            pixel size (72 dpi). Images are stretched to the page, so pass a
+            size with the images' aspect ratio.
+    """
+    output = BytesIO()
+    offsets: List[int] = []
+
+    def write_object(body: bytes) -> None:
+        offsets.append(output.tell())
+        output.write(f"{len(offsets)} 0 obj\n".encode("ascii"))
+        output.write(body)
+        output.write(b"\nendobj\n")
+
+    def write_stream(dictionary: str, data: bytes) -> None:
+        write_object(
+            f"<< {dictionary} /Length {len(data)} >>\nstream\n".encode("ascii")
+            + data
+            + b"\nendstream"
+        )
+
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    # Objects 1 and 2 are the catalog and page tree; each page then takes
+    # three objects (image, content stream, page)
+    kids = " ".join(f"{5 + 3 * index} 0 R" for index in range(len(images)))
+    write_object(b"<< /Type /Catalog /Pages 2 0 R >>")
+    write_object(
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(images)} >>".encode("ascii")
+    )
+
+    for index, image in enumerate(images):
+        image_ref = 3 + 3 * index
+        width, height = page_size or (image.width, image.height)
+        width, height = _number(width), _number(height)
+
+        dictionary = (
+            f"/Type /XObject /Subtype /Image /Width {image.width} "
+            f"/Height {image.height} /ColorSpace {image.color_space} "
+            f"/BitsPerComponent {image.bits_per_component} /Filter {image.filter}"
+        )
+        if image.decode_parms:
+            dictionary += f" /DecodeParms {image.decode_parms}"
+        if image.extra:
+            dictionary += f" {image.extra}"
+        write_stream(dictionary, image.data)
+
+        content = f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q".encode("ascii")
+        write_stream("", content)
+
+        write_object(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+                f"/Resources << /XObject << /Im0 {image_ref} 0 R >> >> "
+                f"/Contents {image_ref + 1} 0 R >>"
+            ).encode("ascii")
+        )
+
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(offsets) + 1}\n".encode("ascii"))
+    output.write(b"0000000000 65535 f \n")
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    output.write(
+        (
+            f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        ).encode("ascii")
+    )
+    return output.getvalue()
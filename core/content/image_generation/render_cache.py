@@ -0,0 +1,43 @@
+"""
+Content-addressed storage of rendered artifacts.
+
+Regenerating a post or retrying the pipeline used to draw, encode and upload
+identical slides again under new timestamped names. Rendered artifacts are
+instead named by a hash of everything that decides their bytes:
+RENDERER_VERSION, the renderer's theme and settings, the encoder settings and
+the text. Storage is the index of what has been rendered, fronted by the
+process's memory of objects it has seen (`storage_utils.stored_object_url`),
+so a repeat render returns the existing public URL before anything is drawn.
+
+Objects are shared by every post with the same text, so they are never
+removed on behalf of one post, not even after a failed carousel: once written,
+another post may already link to them. Orphans of failed carousels are
+harmless and reused by a retry.
+
+Usage:
+    name = artifact_name("slide", "png", theme, spec)
+    url = await stored_object_url(supabase, "carousels", name)
+    if url is None:
+        url, created = await upload_bytes_if_absent(
+            supabase, "carousels", name, data, "image/png"
+        )
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from core.constants import RENDERER_VERSION
+
+
+def artifact_name(kind: str, extension: str, *parts: Any) -> str:
+    """Object name for an artifact of `kind` rendered from `parts`."""
+    encoded = json.dumps(
+        [RENDERER_VERSION, kind, *parts],
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    return f"{kind}-{digest}.{extension}"
@@ -0,0 +1,99 @@
+"""
+Worker pool for slide rendering.
+
+Drawing and encoding a slide is pure CPU work (font fitting, PIL drawing, PNG
+compression) that used to run on the event loop thread and stall every other
+request on the worker. Render jobs run here instead, one slide per job, so a
+carousel takes about as long as its slowest slide when enough workers are
+available.
+
+Jobs must be module-level functions taking small picklable arguments (slide
+text, not images) and returning encoded bytes, so the same call works with a
+process pool and a thread pool.
+
+Configuration:
+    SLIDE_RENDER_EXECUTOR: "process" (default) or "thread". Process pools need
+        POSIX semaphores (/dev/shm); where they are unavailable, such as on
+        AWS Lambda based runtimes, the thread pool is used automatically
+    SLIDE_RENDER_WORKERS: Worker count (default: one per CPU)
+
+Usage:
+    png = await run_in_render_pool(render_slide_png, platform, font_path, spec, 0)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+SLIDE_RENDER_EXECUTOR = os.getenv("SLIDE_RENDER_EXECUTOR", "process").lower()
+SLIDE_RENDER_WORKERS = int(os.getenv("SLIDE_RENDER_WORKERS", "0")) or None
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def _create_executor() -> Executor:
+    workers = SLIDE_RENDER_WORKERS or os.cpu_count() or 1
+    if SLIDE_RENDER_EXECUTOR == "process":
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(
+                f"Process pool unavailable ({str(e)}), rendering slides in threads"
+            )
+    elif SLIDE_RENDER_EXECUTOR != "thread":
+        logger.warning(
+            f"Unknown SLIDE_RENDER_EXECUTOR '{SLIDE_RENDER_EXECUTOR}', using threads"
+        )
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-render")
+
+
+def get_render_executor() -> Executor:
+    """Process-wide render pool, created on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = _create_executor()
+    return _executor
+
+
+def _discard_executor(broken: Executor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+async def run_in_render_pool(func: Callable[..., T], *args: Any) -> T:
+    """Run `func(*args)` in the render pool without blocking the event loop."""
+    executor = get_render_executor()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool for later jobs
+        logger.error("Slide render pool broke, recreating it")
+        _discard_executor(executor)
+        raise
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render workers (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
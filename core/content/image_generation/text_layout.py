@@ -0,0 +1,235 @@
+"""
+Text layout shared by the carousel slide and image-list renderers.
+
+Layout is separated from drawing: `layout_text` wraps text (with the cached
+word widths of `text_measure`) and positions every line, `fit_text` finds the
+largest font size at which text fits a box, and the result is a `LayoutPlan`
+of positioned lines. A plan holds only strings, numbers and font paths, so it
+is cheap to draw any number of times, to pickle into render pool workers and
+to cache under a hash of its inputs with `cached_plan`.
+
+Line advance is `line_height * line_spacing + line_gap`, where `line_height`
+defaults to the font's ascent plus descent: slides use a spacing multiplier,
+image lists a fixed gap.
+
+Usage:
+    font = load_font(path, 40)
+    block = layout_text("Some text", font, x=50, y=100, width=900)
+    LayoutPlan((block,)).draw(ImageDraw.Draw(image), fill="#000000")
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from cachetools import LRUCache
+from PIL import ImageDraw
+from PIL.ImageFont import FreeTypeFont
+
+from core.constants import TEXT_LAYOUT_CACHE_SIZE
+from core.content.image_generation.fonts import load_font
+from core.content.image_generation.text_measure import get_measurer, wrap_widths
+
+ALIGNMENTS = ("left", "center", "right")
+
+_plans: LRUCache = LRUCache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+_plans_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PlacedLine:
+    text: str
+    # Top-left corner, as PIL positions text
+    x: float
+    y: float
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    font_path: str
+    font_size: int
+    lines: Tuple[PlacedLine, ...]
+    # Height the block reserves (line count times line advance)
+    height: float
+    # Where a following line would start
+    end_y: float
+
+    @property
+    def font(self) -> FreeTypeFont:
+        return load_font(self.font_path, self.font_size)
+
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    blocks: Tuple[TextBlock, ...]
+
+    def draw(self, draw: ImageDraw.ImageDraw, fill: str) -> None:
+        for block in self.blocks:
+            font = block.font
+            for line in block.lines:
+                draw.text((line.x, line.y), line.text, font=font, fill=fill)
+
+
+def line_advance(
+    font: FreeTypeFont,
+    line_spacing: float = 1.0,
+    line_gap: float = 0.0,
+    line_height: Optional[float] = None,
+) -> float:
+    if line_height is None:
+        line_height = get_measurer(font).line_height
+    return line_height * line_spacing + line_gap
+
+
+def layout_lines(
+    lines: Sequence[str],
+    font: FreeTypeFont,
+    x: float,
+    y: float,
+    width: float,
+    align: str = "left",
+    line_spacing: float = 1.0,
+    line_gap: float = 0.0,
+    line_height: Optional[float] = None,
+) -> TextBlock:
+    """Position already wrapped lines in a column `width` wide at (x, y)."""
+    if align not in ALIGNMENTS:
+        raise ValueError(f"Unknown alignment '{align}', expected one of {ALIGNMENTS}")
+    measurer = get_measurer(font)
+    advance = line_advance(font, line_spacing, line_gap, line_height)
+
+    placed = []
+    current_y = y
+    for line in lines:
+        # Empty lines (no words at all) take no space
+        if not line:
+            continue
+        line_x = x
+        if align != "left":
+            slack = width - measurer.line_width(line.split())
+            line_x = x + (slack // 2 if align == "center" else slack)
+        placed.append(PlacedLine(line, line_x, current_y))
+        current_y += advance
+
+    return TextBlock(
+        font_path=font.path,
+        font_size=font.size,
+        lines=tuple(placed),
+        height=len(placed) * advance,
+        end_y=current_y,
+    )
+
+
+def layout_text(
+    text: str,
+    font: FreeTypeFont,
+    x: float,
+    y: float,
+    width: float,
+    align: str = "left",
+    line_spacing: float = 1.0,
+    line_gap: float = 0.0,
+    line_height: Optional[float] = None,
+) -> TextBlock:
+    """Wrap `text` to `width` pixels and position its lines at (x, y)."""
+    return layout_lines(
+        get_measurer(font).wrap(text, width),
+        font,
+        x,
+        y,
+        width,
+        align=align,
+        line_spacing=line_spacing,
+        line_gap=line_gap,
+        line_height=line_height,
+    )
+
+
+def fit_text(
+    text: str,
+    font_path: str,
+    box_width: float,
+    box_height: float,
+    max_size: int,
+    min_size: int = 18,
+    step: int = 2,
+    line_spacing: float = 1.0,
+) -> Tuple[FreeTypeFont, List[str]]:
+    """
+    Fit `text` in a box with the largest font size (stepping down by `step`
+    from `max_size`) at which its wrapped lines fit. Returns (font, lines); if
+    nothing fits, `min_size` is used and the text may overflow.
+    """
+    sizes = list(range(max_size, min_size - 1, -step))
+    words = text.split()
+
+    def fits(lines: List[str], font_size: int) -> bool:
+        line_height = get_measurer(load_font(font_path, font_size)).line_height
+        return len(lines) * line_height * line_spacing <= box_height
+
+    def exact_layout(index: int) -> Tuple[FreeTypeFont, List[str], bool]:
+        font = load_font(font_path, sizes[index])
+        measurer = get_measurer(font)
+        lines = wrap_widths(
+            words, measurer.word_widths(words), measurer.space_width, box_width
+        )
+        return font, lines, fits(lines, sizes[index])
+
+    # Advance widths scale almost linearly with size, so measure every word
+    # once at the largest size and binary search on the scaled widths.
+    # Smaller sizes never need more height, so the search finds the first
+    # (largest) size that fits.
+    reference = get_measurer(load_font(font_path, sizes[0]))
+    reference_widths = reference.word_widths(words)
+    reference_space = reference.space_width
+
+    low, high = 0, len(sizes) - 1
+    while low < high:
+        middle = (low + high) // 2
+        scale = sizes[middle] / sizes[0]
+        lines = wrap_widths(
+            words,
+            [width * scale for width in reference_widths],
+            reference_space * scale,
+            box_width,
+        )
+        if fits(lines, sizes[middle]):
+            high = middle
+        else:
+            low = middle + 1
+
+    # Hinting makes the estimate off by a few pixels per word; settle the
+    # final size on exact measurements around the estimate
+    index = low
+    font, lines, fit = exact_layout(index)
+    if fit:
+        while index > 0:
+            larger = exact_layout(index - 1)
+            if not larger[2]:
+                break
+            index -= 1
+            font, lines, fit = larger
+    else:
+        while not fit and index < len(sizes) - 1:
+            index += 1
+            font, lines, fit = exact_layout(index)
+    return font, lines
+
+
+def plan_key(*parts: Any) -> str:
+    """Cache key for a plan: a hash of the text and every layout input."""
+    encoded = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def cached_plan(key: str, build: Callable[[], LayoutPlan]) -> LayoutPlan:
+    """The plan cached under `key`, built (outside the lock) on a miss."""
+    with _plans_lock:
+        plan = _plans.get(key)
+    if plan is None:
+        plan = build()
+        with _plans_lock:
+            _plans[key] = plan
+    return plan
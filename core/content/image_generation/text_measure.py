@@ -0,0 +1,100 @@
+"""
+Text measurement for slide and image rendering.
+
+Wrapping used to measure the whole growing line after every word, which is
+quadratic in line length and relied on `ImageDraw.textsize` (removed from
+Pillow). Here every word is measured once per font and lines are built
+incrementally: a line's width is the sum of its word widths plus one space
+advance between words. Kerning across word boundaries is ignored, which is
+well under a pixel per line at slide sizes.
+
+Usage:
+    measurer = get_measurer(load_font(path, 48))
+    lines = measurer.wrap(text, max_width)
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from PIL.ImageFont import FreeTypeFont
+
+# Cached word widths per font before the cache is dropped and rebuilt
+MAX_CACHED_WORDS = 20000
+
+
+def wrap_widths(
+    words: Sequence[str],
+    word_widths: Sequence[float],
+    space_width: float,
+    max_width: float,
+) -> List[str]:
+    """
+    Greedily wrap `words` into lines no wider than `max_width`, given each
+    word's advance width. A word wider than the box gets a line of its own;
+    no words still yields one (empty) line.
+    """
+    lines = []
+    current_line: List[str] = []
+    line_width = 0.0
+
+    for word, width in zip(words, word_widths):
+        if current_line and line_width + space_width + width > max_width:
+            lines.append(" ".join(current_line))
+            current_line = [word]
+            line_width = width
+        elif current_line:
+            current_line.append(word)
+            line_width += space_width + width
+        else:
+            current_line = [word]
+            line_width = width
+    lines.append(" ".join(current_line))
+
+    return lines
+
+
+class TextMeasurer:
+    """Word advance widths for one font, measured once and cached."""
+
+    def __init__(self, font: FreeTypeFont):
+        self.font = font
+        self.space_width = font.getlength(" ")
+        ascent, descent = font.getmetrics()
+        self.line_height = ascent + descent
+        self._widths: Dict[str, float] = {}
+
+    def word_width(self, word: str) -> float:
+        width = self._widths.get(word)
+        if width is None:
+            if len(self._widths) >= MAX_CACHED_WORDS:
+                self._widths = {}
+            width = self._widths[word] = self.font.getlength(word)
+        return width
+
+    def word_widths(self, words: Sequence[str]) -> List[float]:
+        return [self.word_width(word) for word in words]
+
+    def line_width(self, words: Sequence[str]) -> float:
+        if not words:
+            return 0.0
+        return sum(self.word_widths(words)) + self.space_width * (len(words) - 1)
+
+    def wrap(self, text: str, max_width: float) -> List[str]:
+        words = text.split()
+        return wrap_widths(words, self.word_widths(words), self.space_width, max_width)
+
+
+_measurers: Dict[Tuple[str, int], TextMeasurer] = {}
+_measurers_lock = threading.Lock()
+
+
+def get_measurer(font: FreeTypeFont) -> TextMeasurer:
+    """Shared measurer for a font, keyed by its file and size."""
+    key = (font.path, font.size)
+    measurer = _measurers.get(key)
+    if measurer is None:
+        with _measurers_lock:
+            measurer = _measurers.get(key)
+            if measurer is None:
+                measurer = _measurers[key] = TextMeasurer(font)
+    return measurer
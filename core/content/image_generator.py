@@ -2,11 +2,21 @@ import json
 import os
 import re
 from typing import Dict, List, Union
-from PIL import Image, ImageDraw, ImageFont
-import textwrap
+from PIL import Image, ImageDraw
 import logging
 import time
-from core.content.language_model_client import call_language_model
+from core.content.image_generation.encoders import EncodedImage, encode_image
+from core.content.image_generation.fonts import load_font
+from core.content.image_generation.text_layout import (
+    LayoutPlan,
+    cached_plan,
+    layout_text,
+    plan_key,
+)
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
 from core.models.account_profile import AccountProfile
 
 logger = logging.getLogger(__name__)
@@ -33,7 +43,12 @@ async def generate_image_list_content(
     }
 
     logger.info(f"Generating image list content for text: {text[:100]}...")
-    content = await call_language_model(system_message, user_message, tier="high")
+    content = await call_language_model(
+        system_message,
+        user_message,
+        tier="high",
+        output_tokens=get_output_token_budget("image_list"),
+    )
     logger.info(f"Raw LLM response: {content}")
 
     # Edit the content before parsing
@@ -85,38 +100,56 @@ def parse_content(content: Union[str, Dict]) -> Dict[str, Union[str, List[str]]]
     return parsed
 
 
-def draw_mixed_text(
-    draw, text, font, bold_font, position, fill, max_width, line_spacing=5
-):
-    x, y = position
-    words = text.split()
-    space_width = font.getlength(" ")
-    line = ""
-    line_height = max(font.size, bold_font.size)
-
-    for word in words:
-        word_width = font.getlength(word)
-
-        if x - position[0] + word_width > max_width:
-            if line:
-                draw.text((position[0], y), line.strip(), font=font, fill=fill)
-                y += line_height + line_spacing
-                line = word + " "
-                x = position[0] + word_width + space_width
-            else:
-                # If a single word is too long, force it to break
-                draw.text((position[0], y), word, font=font, fill=fill)
-                y += line_height + line_spacing
-                x = position[0]
-        else:
-            line += word + " "
-            x += word_width + space_width
-
-    if line:
-        draw.text((position[0], y), line.strip(), font=font, fill=fill)
-        y += line_height + line_spacing
+def layout_image_list(
+    parsed_content: Dict[str, Union[str, List[str]]],
+    image_size: tuple = (1044, 2048),
+    line_spacing: int = 15,
+) -> LayoutPlan:
+    """Position the centered title and the numbered body items of an image list."""
+    # FONT SIZES - Adjust these to change text size
+    title_font_size = 60
+    body_font_size = 40
+
+    # MARGINS AND SPACING - Adjust these to change layout
+    margin = 50
+    title_line_spacing = 20
+    title_body_spacing = 100
+    paragraph_spacing = 40
+    content_width = image_size[0] - 2 * margin
+
+    total_content_height = 1300
+    y_start = (image_size[1] - total_content_height) // 2
+
+    title_font = load_font(get_system_font(), title_font_size)
+    body_font = load_font(get_system_font(), body_font_size)
+
+    title = layout_text(
+        parsed_content.get("title", ""),
+        title_font,
+        margin,
+        y_start,
+        content_width,
+        align="center",
+        line_gap=title_line_spacing,
+        line_height=title_font_size,
+    )
+    blocks = [title]
+
+    y_offset = title.end_y + title_body_spacing
+    for i, item in enumerate(parsed_content["body"], start=1):
+        body = layout_text(
+            f"{i}. {item}",
+            body_font,
+            margin,
+            y_offset,
+            content_width,
+            line_gap=line_spacing,
+            line_height=body_font_size,
+        )
+        blocks.append(body)
+        y_offset = body.end_y + paragraph_spacing  # Space between main points
 
-    return y
+    return LayoutPlan(tuple(blocks))
 
 
 def generate_image_list(
@@ -144,64 +177,26 @@ def generate_image_list(
         draw = ImageDraw.Draw(img)
         logger.info(f"Created new image with size {image_size}")
 
-        # FONT SIZES - Adjust these to change text size
-        title_font_size = 60
-        body_font_size = 40
-
-        title_font = ImageFont.truetype(get_system_font(), title_font_size)
-        body_font = ImageFont.truetype(get_system_font(), body_font_size)
-        bold_font = ImageFont.truetype(get_system_font(), body_font_size)
-
-        # MARGINS AND SPACING - Adjust these to change layout
-        margin = 50
-        title_body_spacing = 100
-        paragraph_spacing = 40
-        content_width = image_size[0] - 2 * margin
-
-        total_content_height = 1300
-        y_start = (image_size[1] - total_content_height) // 2
-
-        # Draw title
-        title = parsed_content.get("title", "")
-        wrapped_title = textwrap.wrap(title, width=30)
-        title_height = 0
-        title_line_spacing = 20  # Add this line for title line spacing
-
-        for line in wrapped_title:
-            bbox = draw.textbbox((0, 0), line, font=title_font)
-            title_width = bbox[2] - bbox[0]
-            line_height = bbox[3] - bbox[1]
-            x = (image_size[0] - title_width) // 2
-            draw.text(
-                (x, y_start + title_height), line, font=title_font, fill=text_color
-            )
-            title_height += line_height + title_line_spacing  # Add line spacing here
-
-        y_offset = y_start + title_height + title_body_spacing
-
-        # Draw body content
-        for i, item in enumerate(parsed_content["body"], start=1):
-            logger.info(f"Processing item {i}: {item}")
-            formatted_line = f"{i}. {item}"
-            logger.info(f"Formatted line: {formatted_line}")
-
-            y_offset = draw_mixed_text(
-                draw,
-                formatted_line,
-                body_font,
-                bold_font,
-                (margin, y_offset),
-                text_color,
-                content_width,
-                line_spacing=line_spacing,
-            )
-            y_offset += paragraph_spacing  # Space between main points
+        key = plan_key(
+            "image_list",
+            get_system_font(),
+            image_size,
+            line_spacing,
+            parsed_content.get("title", ""),
+            parsed_content["body"],
+        )
+        plan = cached_plan(
+            key, lambda: layout_image_list(parsed_content, image_size, line_spacing)
+        )
+        plan.draw(draw, fill=text_color)
 
         if save_locally:
             os.makedirs("temp_images", exist_ok=True)
             timestamp = int(time.time())
-            img_path = f"temp_images/image_list_{timestamp}.jpg"
-            img.save(img_path, "JPEG")
+            encoded = encode_image(img, "image_list")
+            img_path = f"temp_images/image_list_{timestamp}.{encoded.extension}"
+            with open(img_path, "wb") as f:
+                f.write(encoded.data)
             logger.info(f"Image saved locally: {img_path}")
         else:
             logger.info("Image not saved locally (save_locally=False)")
@@ -215,6 +210,12 @@ def generate_image_list(
         raise
 
 
+def render_image_list(content: Dict) -> EncodedImage:
+    """Draw and encode an image list. Runs in a render pool worker."""
+    image = generate_image_list(content)
+    return encode_image(image, "image_list", record_metrics=False)
+
+
 async def edit_image_list_content(content: str) -> Dict[str, Union[str, List[str]]]:
     system_message = {
         "role": "system",
@@ -234,7 +235,10 @@ async def edit_image_list_content(content: str) -> Dict[str, Union[str, List[str
 
     try:
         response_content = await call_language_model(
-            system_message, user_message, tier="high"
+            system_message,
+            user_message,
+            tier="high",
+            output_tokens=get_output_token_budget("image_list"),
         )
 
         if isinstance(response_content, str):
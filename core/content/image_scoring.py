@@ -0,0 +1,416 @@
+"""
+Local lexical image-relevance scoring.
+
+Newsletter sections carry `[image:URL alt="ALT"]` placeholders, and most of them
+are logos, sponsor banners, social icons or tracking pixels. This module decides
+image placement without a language model whenever the text makes it obvious:
+
+1. **Junk filtering**: file type, URL/alt keywords and dimension hints in the
+   URL (`w=1`, `600x80`, ...) drop images that never belong in a post.
+2. **Lexical scoring**: alt text and URL path tokens are scored against each
+   post's text with BM25.
+3. **Decision**: every remaining image is either assigned to its best post,
+   rejected (its words appear in no post), or marked ambiguous. Only ambiguous
+   images justify a language-model call.
+
+Usage:
+    result = score_images(content_container, image_placeholders, content_type)
+    if result.decision == "local":
+        content_container = apply_assignments(content_container, result)
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# An image is placed locally when at least this share of its words appear in
+# the best post and that post clearly beats the runner-up.
+ASSIGN_MIN_COVERAGE = 0.5
+ASSIGN_MIN_MARGIN = 1.5
+
+# An image whose words appear in no post is rejected once it has enough words
+# for that absence to mean something.
+REJECT_MIN_TOKENS = 2
+
+MAX_IMAGES_PER_POST = 4
+
+# Post types that can carry media; CTA replies and link posts never do
+MEDIA_POST_TYPES = {"main_tweet", "main_post"}
+THREAD_MEDIA_POST_TYPES = MEDIA_POST_TYPES | {"reply_tweet"}
+
+JUNK_EXTENSIONS = {"svg", "ico", "bmp"}
+JUNK_KEYWORDS = {
+    "logo",
+    "icon",
+    "favicon",
+    "avatar",
+    "badge",
+    "sprite",
+    "emoji",
+    "button",
+    "pixel",
+    "tracking",
+    "tracker",
+    "beacon",
+    "spacer",
+    "blank",
+    "sponsor",
+    "sponsored",
+    "banner",
+    "advert",
+    "advertisement",
+    "promo",
+    "facebook",
+    "twitter",
+    "linkedin",
+    "instagram",
+    "youtube",
+    "tiktok",
+    "signature",
+    "footer",
+}
+
+# Path words that describe the CDN rather than the image
+URL_STOPWORDS = {
+    "http",
+    "https",
+    "www",
+    "com",
+    "net",
+    "org",
+    "cdn",
+    "cgi",
+    "img",
+    "image",
+    "images",
+    "media",
+    "uploads",
+    "upload",
+    "asset",
+    "assets",
+    "static",
+    "files",
+    "file",
+    "publication",
+    "publications",
+    "beehiiv",
+    "production",
+    "original",
+    "thumb",
+    "thumbnail",
+    "fit",
+    "scale",
+    "crop",
+    "quality",
+    "format",
+    "auto",
+    "jpg",
+    "jpeg",
+    "png",
+    "gif",
+    "webp",
+}
+
+TEXT_STOPWORDS = {
+    "the",
+    "and",
+    "for",
+    "with",
+    "that",
+    "this",
+    "from",
+    "your",
+    "you",
+    "are",
+    "was",
+    "but",
+    "not",
+    "have",
+    "has",
+    "its",
+    "our",
+    "their",
+    "they",
+    "will",
+    "what",
+    "when",
+    "how",
+    "why",
+    "who",
+    "can",
+    "all",
+    "more",
+    "about",
+    "into",
+    "out",
+    "just",
+    "than",
+    "then",
+}
+
+PLACEHOLDER_PATTERN = re.compile(r'^\s*(\S+)(?:\s+alt="(.*)")?\s*$', re.DOTALL)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+DIMENSION_PAIR_PATTERN = re.compile(r"(?<![a-z0-9])(\d{1,4})x(\d{1,4})(?![0-9])")
+DIMENSION_PARAM_PATTERN = re.compile(r"(?:^|[?&,/_-])(w|h|width|height)=(\d{1,5})")
+
+
+@dataclass
+class ImageCandidate:
+    url: str
+    alt: str
+    extension: str
+    tokens: List[str]
+    junk_reason: Optional[str] = None
+
+
+@dataclass
+class ImageScoringResult:
+    """
+    Outcome of scoring one section's images against its posts.
+
+    decision is one of:
+        - "skipped": no usable images remain after junk filtering
+        - "local": every image was assigned or rejected without a model
+        - "llm": at least one image is ambiguous; `candidates` holds the
+          junk-free images to send to the model
+    """
+
+    decision: str
+    assignments: Dict[int, List[str]] = field(default_factory=dict)
+    candidates: List[ImageCandidate] = field(default_factory=list)
+    junk: List[ImageCandidate] = field(default_factory=list)
+
+
+def _normalize(token: str) -> str:
+    # Crude plural folding so "rates" matches "rate"
+    if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _tokenize(text: str, stopwords: set) -> List[str]:
+    return [
+        _normalize(token)
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 2 and not token.isdigit() and token not in stopwords
+    ]
+
+
+def _url_tokens(url: str) -> List[str]:
+    # Only the path says anything about the picture. CDN transform segments
+    # (`fit=scale-down,quality=80`) and ids/hashes (anything with a digit) don't.
+    path = re.sub(r"^[a-z]+://[^/]+", "", url.lower()).split("?")[0]
+    segments = [s for s in path.split("/") if "=" not in s and "," not in s]
+    return [
+        token
+        for token in _tokenize(" ".join(segments), URL_STOPWORDS | TEXT_STOPWORDS)
+        if len(token) < 16 and not any(c.isdigit() for c in token)
+    ]
+
+
+def _dimension_hint(url: str) -> Tuple[Optional[int], Optional[int]]:
+    lowered = url.lower()
+    width = height = None
+    for key, value in DIMENSION_PARAM_PATTERN.findall(lowered):
+        if key in ("w", "width"):
+            width = int(value)
+        else:
+            height = int(value)
+    if width is None and height is None:
+        match = DIMENSION_PAIR_PATTERN.search(lowered)
+        if match:
+            width, height = int(match.group(1)), int(match.group(2))
+    return width, height
+
+
+def _junk_reason(url: str, alt: str, extension: str) -> Optional[str]:
+    if not url or url.startswith("data:"):
+        return "inline"
+    if extension in JUNK_EXTENSIONS:
+        return f"file type .{extension}"
+
+    words = set(TOKEN_PATTERN.findall(url.lower().split("?")[0]))
+    words |= set(TOKEN_PATTERN.findall(alt.lower()))
+    keyword = next((w for w in sorted(words) if w in JUNK_KEYWORDS), None)
+    if keyword:
+        return f"keyword '{keyword}'"
+
+    width, height = _dimension_hint(url)
+    if width is not None and width <= 2 or height is not None and height <= 2:
+        return "tracking pixel"
+    if width is not None and height is not None:
+        if width <= 100 and height <= 100:
+            return "too small"
+        if height and width / height >= 6:
+            return "banner proportions"
+    return None
+
+
+def parse_image_placeholder(placeholder: str) -> ImageCandidate:
+    """Parse the `URL alt="ALT"` payload of an `[image:...]` placeholder."""
+    match = PLACEHOLDER_PATTERN.match(placeholder or "")
+    url = match.group(1) if match else (placeholder or "").strip()
+    alt = (match.group(2) or "") if match else ""
+    path = url.lower().split("?")[0]
+    extension = path.rsplit(".", 1)[-1] if "." in path.rsplit("/", 1)[-1] else ""
+    tokens = _tokenize(alt, TEXT_STOPWORDS) + _url_tokens(url)
+    return ImageCandidate(
+        url=url,
+        alt=alt,
+        extension=extension,
+        tokens=list(dict.fromkeys(tokens)),
+        junk_reason=_junk_reason(url, alt, extension),
+    )
+
+
+def _post_text(post: Dict[str, Any]) -> str:
+    return " ".join(
+        str(post.get(key, "")) for key in ("post_content", "heading", "subheading")
+    )
+
+
+def _media_post_indexes(
+    content_container: List[Dict[str, Any]], content_type: str
+) -> List[int]:
+    allowed = (
+        THREAD_MEDIA_POST_TYPES if content_type == "thread_tweet" else MEDIA_POST_TYPES
+    )
+    return [
+        i
+        for i, post in enumerate(content_container)
+        if isinstance(post, dict) and post.get("post_type") in allowed
+    ]
+
+
+def _bm25_scores(query: List[str], documents: List[List[str]]) -> List[float]:
+    count = len(documents)
+    average_length = sum(len(d) for d in documents) / count or 1.0
+    document_frequency = {
+        term: sum(1 for d in documents if term in d) for term in set(query)
+    }
+    scores = []
+    for document in documents:
+        frequencies: Dict[str, int] = {}
+        for term in document:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        score = 0.0
+        for term in query:
+            tf = frequencies.get(term, 0)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log((count - df + 0.5) / (df + 0.5) + 1)
+            norm = tf + BM25_K1 * (
+                1 - BM25_B + BM25_B * len(document) / average_length
+            )
+            score += idf * tf * (BM25_K1 + 1) / norm
+        scores.append(score)
+    return scores
+
+
+def _select_media(ranked: List[Tuple[float, ImageCandidate]]) -> List[str]:
+    # A gif can't share a tweet with other media: keep it only if it ranks first
+    ranked = sorted(ranked, key=lambda item: item[0], reverse=True)
+    if ranked and ranked[0][1].extension == "gif":
+        return [ranked[0][1].url]
+    stills = [image.url for _, image in ranked if image.extension != "gif"]
+    return stills[:MAX_IMAGES_PER_POST]
+
+
+def score_images(
+    content_container: List[Dict[str, Any]],
+    image_placeholders: List[str],
+    content_type: str,
+) -> ImageScoringResult:
+    """
+    Score a section's images against the posts generated from it.
+
+    Args:
+        content_container: Posts as produced by content generation
+        image_placeholders: Payloads of the section's `[image:...]` placeholders
+        content_type: Content type being generated (decides which posts take media)
+
+    Returns:
+        ImageScoringResult with the decision and, for "local", the image URLs
+        to attach per post index.
+    """
+    images = [parse_image_placeholder(p) for p in image_placeholders]
+    junk = [image for image in images if image.junk_reason]
+    candidates = list(
+        {image.url: image for image in images if not image.junk_reason}.values()
+    )
+    post_indexes = _media_post_indexes(content_container, content_type)
+
+    if not candidates or not post_indexes:
+        return ImageScoringResult(decision="skipped", junk=junk)
+
+    documents = [
+        _tokenize(_post_text(content_container[i]), TEXT_STOPWORDS)
+        for i in post_indexes
+    ]
+    ranked: Dict[int, List[Tuple[float, ImageCandidate]]] = {}
+    ambiguous = False
+
+    for image in candidates:
+        if not image.tokens:
+            # Nothing to go on (no alt text, opaque URL): let the model look
+            ambiguous = True
+            continue
+
+        scores = _bm25_scores(image.tokens, documents)
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        best = order[0]
+        runner_up = scores[order[1]] if len(order) > 1 else 0.0
+        best_terms = set(documents[best])
+        coverage = sum(1 for t in image.tokens if t in best_terms) / len(image.tokens)
+
+        if scores[best] == 0:
+            if len(image.tokens) < REJECT_MIN_TOKENS:
+                ambiguous = True
+            continue
+        if coverage >= ASSIGN_MIN_COVERAGE and (
+            runner_up == 0 or scores[best] >= ASSIGN_MIN_MARGIN * runner_up
+        ):
+            ranked.setdefault(post_indexes[best], []).append((scores[best], image))
+        else:
+            ambiguous = True
+
+    if ambiguous:
+        return ImageScoringResult(decision="llm", candidates=candidates, junk=junk)
+
+    assignments = {index: _select_media(items) for index, items in ranked.items()}
+
+    # Threads lead with media: make sure the first post carries the best image
+    if content_type == "thread_tweet" and assignments:
+        first = post_indexes[0]
+        if not assignments.get(first):
+            donor = max(
+                (i for i in assignments if assignments[i]),
+                key=lambda i: max(score for score, _ in ranked[i]),
+            )
+            assignments[first] = [assignments[donor].pop(0)]
+
+    return ImageScoringResult(
+        decision="local",
+        assignments={i: urls for i, urls in assignments.items() if urls},
+        candidates=candidates,
+        junk=junk,
+    )
+
+
+def apply_assignments(
+    content_container: List[Dict[str, Any]], result: ImageScoringResult
+) -> List[Dict[str, Any]]:
+    """Return a copy of the posts with the locally assigned `images` attached."""
+    updated = []
+    for index, post in enumerate(content_container):
+        post = dict(post)
+        if result.assignments.get(index):
+            post["images"] = list(result.assignments[index])
+        updated.append(post)
+    return updated
@@ -6,6 +6,16 @@ import anthropic
 import openai
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from core.constants import (
+    CHARS_PER_TOKEN,
+    CONTENT_TYPE_OUTPUT_TOKENS,
+    DEFAULT_OUTPUT_TOKENS,
+    MAX_CONTINUATIONS,
+    MIN_OUTPUT_TOKENS,
+    OUTPUT_TOKEN_MARGIN,
+)
+from core.utils.logging_utils import capture_llm_io, payload
+
 load_dotenv()
 
 LANGUAGE_MODEL_PROVIDER = os.getenv("LANGUAGE_MODEL_PROVIDER", "anthropic")
@@ -13,7 +23,6 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)  # <-- ADD: Ensure we’re at debug level
 
 MODEL_TIERS = {
     "high": {
@@ -44,24 +53,46 @@ MODEL_TIERS = {
 }
 
 
+def get_output_token_budget(content_type: str) -> int:
+    """Expected output size, in tokens, of one post container for a content type."""
+    return CONTENT_TYPE_OUTPUT_TOKENS.get(content_type, DEFAULT_OUTPUT_TOKENS)
+
+
+def estimate_token_count(text: str) -> int:
+    """Cheap token estimate used to size steps that echo their input back."""
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def resolve_max_output_tokens(model_config: dict, output_tokens: int = None) -> int:
+    """
+    Turn an expected output size into the max_tokens sent to the provider:
+    the budget plus OUTPUT_TOKEN_MARGIN, clamped to the tier's output window.
+    Without a budget the full window is reserved, as before.
+    """
+    ceiling = model_config["max_output_tokens"]
+    if not output_tokens:
+        return ceiling
+    budget = int(output_tokens * OUTPUT_TOKEN_MARGIN)
+    return max(MIN_OUTPUT_TOKENS, min(ceiling, budget))
+
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 async def call_language_model(
     system_message: dict,
     user_message: dict,
     tier: str = "high",
     provider_override: str = None,
+    output_tokens: int = None,
 ):
     """
     Main entry point for calling either Anthropics or OpenAI, based on tier & provider override.
-    """
-    logger.info("=== Entering call_language_model ===")  # <-- ADD
-    logger.info(f"Requested tier: {tier}")  # <-- ADD
-    logger.info(f"provider_override: {provider_override}")  # <-- ADD
-    logger.info(f"LANGUAGE_MODEL_PROVIDER env: {LANGUAGE_MODEL_PROVIDER}")  # <-- ADD
 
+    `output_tokens` is the step's expected output size; max_tokens is derived from
+    it (see resolve_max_output_tokens). Responses that stop on the token limit are
+    completed with continuation requests rather than retried from scratch.
+    """
     try:
         provider = provider_override if provider_override else LANGUAGE_MODEL_PROVIDER
-        logger.info(f"Final provider to be used: {provider}")  # <-- ADD
 
         # Wrap in a try/except to catch KeyError for MODEL_TIERS lookups
         try:
@@ -76,16 +107,38 @@ async def call_language_model(
         system_content = str(system_message.get("content", ""))
         user_content = str(user_message.get("content", ""))
 
-        logger.info(f"Calling language model ({provider}) with tier: {tier}")
-        logger.debug(f"System message content: {system_content[:300]}...")  # truncated
-        logger.debug(f"User message content: {user_content[:300]}...")  # truncated
+        max_output_tokens = resolve_max_output_tokens(model_config, output_tokens)
+
+        logger.info(
+            "Calling language model (%s) with tier: %s, max_tokens: %s",
+            provider,
+            tier,
+            max_output_tokens,
+        )
+        logger.debug("System message content: %s", payload(system_content, 300))
+        logger.debug("User message content: %s", payload(user_content, 300))
 
         if provider == "anthropic":
-            return await call_anthropic(system_content, user_content, model_config)
+            response = await call_anthropic(
+                system_content, user_content, model_config, max_output_tokens
+            )
         elif provider == "openai":
-            return await call_openai(system_content, user_content, model_config)
+            response = await call_openai(
+                system_content, user_content, model_config, max_output_tokens
+            )
         else:
             raise ValueError(f"Unsupported language model provider: {provider}")
+
+        capture_llm_io(
+            provider=provider,
+            model=model_config["model"],
+            tier=tier,
+            max_output_tokens=max_output_tokens,
+            system=system_content,
+            user=user_content,
+            response=response,
+        )
+        return response
     except Exception as e:
         logger.error("Caught exception in call_language_model:")
         logger.error(str(e))
@@ -93,25 +146,59 @@ async def call_language_model(
         raise
 
 
-async def call_anthropic(system_content: str, user_content: str, model_config: dict):
+async def call_anthropic(
+    system_content: str,
+    user_content: str,
+    model_config: dict,
+    max_output_tokens: int = None,
+):
     client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    max_output_tokens = max_output_tokens or model_config["max_output_tokens"]
+    messages = [{"role": "user", "content": user_content}]
+    text = ""
     try:
-        response = await asyncio.wait_for(
-            client.messages.create(
-                model=model_config["model"],
-                max_tokens=model_config["max_output_tokens"],
-                temperature=0.5,
-                system=system_content,
-                messages=[{"role": "user", "content": user_content}],
-            ),
-            timeout=300,  # 5 minutes timeout
-        )
-        logger.debug(f"Anthropic API full response: {response}")
-        if response.content and len(response.content) > 0:
+        for continuation in range(MAX_CONTINUATIONS + 1):
+            request_messages = messages
+            if text:
+                # Prefill the partial answer so the model picks up mid-output.
+                # The API rejects a final assistant turn ending in whitespace.
+                text = text.rstrip()
+                request_messages = messages + [{"role": "assistant", "content": text}]
+
+            response = await asyncio.wait_for(
+                client.messages.create(
+                    model=model_config["model"],
+                    max_tokens=max_output_tokens,
+                    temperature=0.5,
+                    system=system_content,
+                    messages=request_messages,
+                ),
+                timeout=300,  # 5 minutes timeout
+            )
             logger.debug(
-                f"Anthropic API response preview: {response.content[0].text[:200]}..."
+                "Anthropic API - stop_reason: %s, usage: %s",
+                response.stop_reason,
+                response.usage,
             )
-        return response.content[0].text
+            if response.content and len(response.content) > 0:
+                logger.debug(
+                    "Anthropic API response preview: %s",
+                    payload(response.content[0].text, 200),
+                )
+            text += response.content[0].text
+
+            if response.stop_reason != "max_tokens":
+                return text
+            if continuation < MAX_CONTINUATIONS:
+                logger.warning(
+                    f"Anthropic response truncated at {max_output_tokens} tokens, "
+                    f"requesting continuation {continuation + 1}/{MAX_CONTINUATIONS}"
+                )
+
+        logger.error(
+            f"Anthropic response still truncated after {MAX_CONTINUATIONS} continuations"
+        )
+        return text
     except asyncio.TimeoutError:
         logger.error("Anthropic API call timed out")
         raise
@@ -121,8 +208,89 @@ async def call_anthropic(system_content: str, user_content: str, model_config: d
         raise
 
 
-async def call_openai(system_content: str, user_content: str, model_config: dict):
+async def _create_openai_completion(
+    client, params: dict, model_config: dict, system_content: str, user_content: str
+):
+    """Run one chat completion; returns (content, finish_reason)."""
+    logger.debug(
+        "OpenAI API request - model: %s, max_tokens: %s, messages: %s",
+        params["model"],
+        params.get("max_tokens"),
+        len(params["messages"]),
+    )
+
+    completion = await asyncio.wait_for(
+        client.chat.completions.create(**params),
+        timeout=300,  # 5 minutes
+    )
+
+    logger.info(
+        "OpenAI API - model: %s, id: %s, usage: %s",
+        completion.model,
+        completion.id,
+        completion.usage,
+    )
+
+    if not completion.choices:
+        logger.error("OpenAI API returned no choices in response")
+        raise ValueError("No content in OpenAI response")
+
+    message = completion.choices[0].message
+    logger.debug(
+        "OpenAI API - role: %s, tool_calls: %s, function_call: %s, refusal: %s",
+        message.role,
+        message.tool_calls is not None,
+        message.function_call is not None,
+        getattr(message, "refusal", None) is not None,
+    )
+
+    # Special handling for o1-preview
+    if "o1" in model_config["model"]:
+        # Check for refusal
+        refusal = getattr(message, "refusal", None)
+        if refusal:
+            logger.warning(f"O1 model refused to respond: {refusal}")
+            raise ValueError(f"O1 model refused to respond: {refusal}")
+
+        if message.tool_calls:
+            logger.info("Response contained tool_calls instead of content")
+
+        if message.function_call:
+            logger.info("Response contained function_call instead of content")
+
+    response_content = message.content
+    if not response_content:
+        logger.error("OpenAI API returned empty content")
+        logger.error("Full message object for empty content: %s", payload(message))
+
+        if "o1" in model_config["model"]:
+            logger.error("This was an o1-preview request. Request details:")
+            logger.error(
+                f"System content length: {len(system_content) if system_content else 0}"
+            )
+            logger.error(
+                f"User content length: {len(user_content) if user_content else 0}"
+            )
+        raise ValueError("Empty content in OpenAI response")
+
+    logger.debug("OpenAI API response preview: %s", payload(response_content))
+    return response_content, completion.choices[0].finish_reason
+
+
+CONTINUATION_PROMPT = (
+    "Your previous reply was cut off by the output limit. Continue exactly where "
+    "it stopped, without repeating anything already written and without any preamble."
+)
+
+
+async def call_openai(
+    system_content: str,
+    user_content: str,
+    model_config: dict,
+    max_output_tokens: int = None,
+):
     client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    max_output_tokens = max_output_tokens or model_config["max_output_tokens"]
     try:
         # For o1 family models, combine system and user content into a single user message
         if "o1" in model_config["model"]:
@@ -133,21 +301,21 @@ async def call_openai(system_content: str, user_content: str, model_config: dict
             )
             messages = [{"role": "user", "content": combined_content}]
             # o1 models have specific parameter requirements
-            # Use only the essential parameters for o1-preview
+            # Use only the essential parameters for o1-preview. No output cap is
+            # sent: reasoning tokens count against it and would starve the answer.
             params = {
                 "model": model_config["model"],
                 "messages": messages,
             }
 
-            # Log the exact request we're about to send
-            logger.info(f"O1 Request - Model: {model_config['model']}")
-            logger.info(f"O1 Request - Messages: {messages}")
-            logger.info(f"O1 Request - Parameters: {params}")
             logger.info(
-                f"O1 Request - Combined content length: {len(combined_content)}"
+                "O1 Request - Model: %s, combined content length: %s",
+                model_config["model"],
+                len(combined_content),
             )
-            logger.info(
-                f"O1 Request - Combined content preview: {combined_content[:500]}..."
+            logger.debug(
+                "O1 Request - Combined content preview: %s",
+                payload(combined_content),
             )
 
         else:
@@ -164,77 +332,37 @@ async def call_openai(system_content: str, user_content: str, model_config: dict
             params = {
                 "model": model_config["model"],
                 "messages": messages,
-                "max_tokens": model_config["max_output_tokens"],
+                "max_tokens": max_output_tokens,
                 "n": 1,
                 "temperature": 0.7,
             }
 
-        # Add detailed logging before API call
-        logger.debug(f"OpenAI API request parameters: {params}")
-
-        completion = await asyncio.wait_for(
-            client.chat.completions.create(**params),
-            timeout=300,  # 5 minutes
-        )
+        text = ""
+        for continuation in range(MAX_CONTINUATIONS + 1):
+            request_messages = messages
+            if text:
+                request_messages = messages + [
+                    {"role": "assistant", "content": text},
+                    {"role": "user", "content": CONTINUATION_PROMPT},
+                ]
+            params["messages"] = request_messages
+            response_content, finish_reason = await _create_openai_completion(
+                client, params, model_config, system_content, user_content
+            )
+            text += response_content
 
-        # Add more comprehensive logging of the response
-        logger.info(f"OpenAI API - Response type: {type(completion)}")
-        try:
-            response_dict = completion.model_dump()  # Newer versions
-        except AttributeError:
-            try:
-                response_dict = completion.dict()  # Older versions
-            except AttributeError:
-                response_dict = str(completion)  # Last resort
-
-        logger.info(f"OpenAI API - Full response dict: {response_dict}")
-        logger.info(f"OpenAI API - Model used: {completion.model}")
-        logger.info(f"OpenAI API - Usage info: {completion.usage}")
-        logger.info(f"OpenAI API - Response ID: {completion.id}")
-
-        if not completion.choices:
-            logger.error("OpenAI API returned no choices in response")
-            raise ValueError("No content in OpenAI response")
-
-        message = completion.choices[0].message
-        logger.info("Message object details:")
-        logger.info(f"- Role: {message.role}")
-        logger.info(f"- Content: {message.content}")
-        logger.info(f"- Has tool_calls: {message.tool_calls is not None}")
-        logger.info(f"- Has function_call: {message.function_call is not None}")
-        logger.info(f"- Has refusal: {getattr(message, 'refusal', None) is not None}")
-
-        # Special handling for o1-preview
-        if "o1" in model_config["model"]:
-            # Check for refusal
-            refusal = getattr(message, "refusal", None)
-            if refusal:
-                logger.warning(f"O1 model refused to respond: {refusal}")
-                raise ValueError(f"O1 model refused to respond: {refusal}")
-
-            if message.tool_calls:
-                logger.info("Response contained tool_calls instead of content")
-
-            if message.function_call:
-                logger.info("Response contained function_call instead of content")
-
-        response_content = message.content
-        if not response_content:
-            logger.error("OpenAI API returned empty content")
-            logger.error(f"Full message object for empty content: {message}")
-
-            if "o1" in model_config["model"]:
-                logger.error("This was an o1-preview request. Request details:")
-                logger.error(
-                    f"System content length: {len(system_content) if system_content else 0}"
-                )
-                logger.error(
-                    f"User content length: {len(user_content) if user_content else 0}"
+            if finish_reason != "length":
+                return text
+            if continuation < MAX_CONTINUATIONS:
+                logger.warning(
+                    f"OpenAI response truncated at the output limit, "
+                    f"requesting continuation {continuation + 1}/{MAX_CONTINUATIONS}"
                 )
-            raise ValueError("Empty content in OpenAI response")
 
-        logger.info(f"OpenAI API response first 500 chars: {response_content[:500]}...")
-        return response_content
+        logger.error(
+            f"OpenAI response still truncated after {MAX_CONTINUATIONS} continuations"
+        )
+        return text
 
     except asyncio.TimeoutError:
         logger.error("OpenAI API call timed out")
@@ -0,0 +1,273 @@
+"""
+Batch generation of outreach image lists.
+
+`generate_outreach_batch` turns many newsletters into image lists for growth
+outreach. Each newsletter goes through two stages:
+
+- LLM: `generate_image_list_content` (generate, then edit; the second call
+  needs the first's output), at most `concurrency` newsletters at a time
+- render: drawing and encoding in the slide render pool
+  (core/content/image_generation/render_pool.py), so images are rendered while
+  other newsletters are still waiting on the model
+
+Every finished newsletter's image is written to the output directory and a
+record is appended to its manifest.jsonl: the image path, the generated
+content and stage timings, or the error for failures. A restarted run skips
+the newsletters already in the manifest with an image on disk and retries the
+failed ones.
+
+Input is a directory of .txt, .md or .html files (one newsletter each, named
+by file stem) or a JSONL file of {"id": ..., "content": ...} objects.
+
+Usage:
+    newsletters = load_newsletters("prospects.jsonl")
+    summary = await generate_outreach_batch(newsletters, "outreach_images")
+
+See outreach_image_generator.py for the command-line entry point.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.constants import OUTREACH_LLM_CONCURRENCY, OUTREACH_PROGRESS_EVERY
+from core.content.image_generation.encoders import record_encode_metrics
+from core.content.image_generation.render_pool import run_in_render_pool
+from core.content.image_generator import (
+    generate_image_list_content,
+    render_image_list,
+)
+from core.models.account_profile import AccountProfile
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+NEWSLETTER_EXTENSIONS = (".txt", ".md", ".html", ".htm")
+
+
+def outreach_profile() -> AccountProfile:
+    """Placeholder profile; outreach images are not tied to an account."""
+    return AccountProfile(
+        account_id="outreach_tool",
+        beehiiv_api_key="",
+        subscribe_url="",
+        publication_id="",
+        custom_prompt="",
+    )
+
+
+def load_newsletters(source: str) -> List[Tuple[str, str]]:
+    """(id, text) of every newsletter in a directory or JSONL file."""
+    newsletters = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            stem, extension = os.path.splitext(name)
+            if extension.lower() not in NEWSLETTER_EXTENSIONS:
+                continue
+            with open(os.path.join(source, name), encoding="utf-8") as f:
+                newsletters.append((stem, f.read()))
+        return newsletters
+
+    with open(source, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get("content") or record.get("text")
+            if not text:
+                logger.warning(f"{source}:{line_number} has no content, skipping it")
+                continue
+            newsletter_id = record["id"] if "id" in record else line_number
+            newsletters.append((str(newsletter_id), text))
+    return newsletters
+
+
+def _file_stem(newsletter_id: str) -> str:
+    """
+    File name for a newsletter's image. Ids that are not safe file names get
+    a short hash of the raw id, so distinct ids never share a file.
+    """
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "_", newsletter_id).strip("._")
+    if stem and stem == newsletter_id:
+        return stem
+    digest = hashlib.sha256(newsletter_id.encode("utf-8")).hexdigest()[:8]
+    return f"{stem or 'newsletter'}-{digest}"
+
+
+def _completed_ids(output_dir: str) -> Set[str]:
+    """Newsletters the manifest records as done whose image is still on disk."""
+    done: Set[str] = set()
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                image = record.get("image")
+                if image and os.path.exists(os.path.join(output_dir, image)):
+                    done.add(record["id"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _write_file(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class OutreachBatch:
+    def __init__(
+        self,
+        output_dir: str,
+        concurrency: int,
+        account_profile: AccountProfile,
+    ):
+        self.output_dir = output_dir
+        self.llm_slots = asyncio.Semaphore(concurrency)
+        self.account_profile = account_profile
+        self.manifest = open(
+            os.path.join(output_dir, MANIFEST_NAME), "a", encoding="utf-8"
+        )
+        self.started = time.perf_counter()
+        self.total = 0
+        self.generated = 0
+        self.failed = 0
+        self.llm_seconds = 0.0
+        self.render_seconds = 0.0
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        self.manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.manifest.flush()
+
+    def _log_progress(self) -> None:
+        finished = self.generated + self.failed
+        if finished % OUTREACH_PROGRESS_EVERY and finished != self.total:
+            return
+        elapsed = time.perf_counter() - self.started
+        logger.info(
+            f"Outreach batch: {finished}/{self.total} done "
+            f"({self.failed} failed), {finished / elapsed * 60:.1f} per minute"
+        )
+
+    async def _run_one(self, newsletter_id: str, text: str) -> None:
+        try:
+            async with self.llm_slots:
+                start = time.perf_counter()
+                content = await generate_image_list_content(
+                    text, self.account_profile
+                )
+                llm_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            encoded = await run_in_render_pool(render_image_list, content)
+            record_encode_metrics(encoded)
+            image = f"{_file_stem(newsletter_id)}.{encoded.extension}"
+            await asyncio.to_thread(
+                _write_file, os.path.join(self.output_dir, image), encoded.data
+            )
+            render_seconds = time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Outreach image for {newsletter_id} failed: {str(e)}")
+            self.failed += 1
+            metrics.increment("outreach_images", result="failed")
+            self._record({"id": newsletter_id, "error": str(e)})
+        else:
+            self.generated += 1
+            self.llm_seconds += llm_seconds
+            self.render_seconds += render_seconds
+            metrics.increment("outreach_images", result="generated")
+            metrics.observe("outreach_stage_seconds", llm_seconds, stage="llm")
+            metrics.observe("outreach_stage_seconds", render_seconds, stage="render")
+            self._record(
+                {
+                    "id": newsletter_id,
+                    "image": image,
+                    "content": content,
+                    "llm_seconds": round(llm_seconds, 3),
+                    "render_seconds": round(render_seconds, 3),
+                }
+            )
+        self._log_progress()
+
+    async def run(self, newsletters: List[Tuple[str, str]]) -> Dict[str, Any]:
+        self.total = len(newsletters)
+        try:
+            await asyncio.gather(
+                *(self._run_one(nid, text) for nid, text in newsletters)
+            )
+        finally:
+            self.manifest.close()
+
+        elapsed = time.perf_counter() - self.started
+        generated = max(self.generated, 1)
+        return {
+            "generated": self.generated,
+            "failed": self.failed,
+            "seconds": round(elapsed, 1),
+            "per_minute": round(self.generated / elapsed * 60, 1),
+            "mean_llm_seconds": round(self.llm_seconds / generated, 2),
+            "mean_render_seconds": round(self.render_seconds / generated, 3),
+        }
+
+
+async def generate_outreach_batch(
+    newsletters: List[Tuple[str, str]],
+    output_dir: str,
+    concurrency: int = OUTREACH_LLM_CONCURRENCY,
+    account_profile: Optional[AccountProfile] = None,
+) -> Dict[str, Any]:
+    """
+    Generate an outreach image for every newsletter, resuming a previous run.
+
+    Args:
+        newsletters: (id, text) pairs; ids name the images and must be unique
+        output_dir: Where images and manifest.jsonl are written
+        concurrency: Newsletters in their LLM stages at once
+        account_profile: Profile passed to the content prompts; defaults to a
+            placeholder
+
+    Returns:
+        Summary with counts of generated, skipped (already done or duplicate)
+        and failed newsletters, and throughput and mean stage times of this run
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    done = _completed_ids(output_dir)
+    queued: Set[str] = set()
+    pending = []
+    for newsletter_id, text in newsletters:
+        if newsletter_id in done:
+            continue
+        if newsletter_id in queued:
+            logger.warning(f"Duplicate newsletter id {newsletter_id}, skipping it")
+            continue
+        queued.add(newsletter_id)
+        pending.append((newsletter_id, text))
+    skipped = len(newsletters) - len(pending)
+    if skipped:
+        logger.info(
+            f"Skipping {skipped} newsletters (already done or duplicate ids)"
+        )
+
+    batch = OutreachBatch(
+        output_dir, concurrency, account_profile or outreach_profile()
+    )
+    summary = await batch.run(pending)
+    summary["skipped"] = skipped
+
+    logger.info(
+        f"Outreach batch finished: {summary['generated']} generated, "
+        f"{summary['skipped']} skipped, {summary['failed']} failed in "
+        f"{summary['seconds']}s ({summary['per_minute']} per minute)"
+    )
+    return summary
@@ -0,0 +1,172 @@
+"""
+Post content cache for Beehiiv fetches.
+
+The same post is usually fetched several times in a row, once per content type
+the user generates. Entries are keyed by publication and post id and hold the
+raw free email HTML, its cleaned form and the validators needed to revalidate
+it (ETag / Last-Modified from the API response, and the post's `updated_at`).
+
+Two tiers:
+- memory: a TTL cache shared by every request in the process
+- disk: optional, enabled by BEEHIIV_CACHE_DIR (one JSON file per post); it
+  survives restarts and is consulted on memory misses
+
+Usage:
+    cache = get_post_cache()
+    entry = cache.get(publication_id, post_id)
+    if entry and entry.is_fresh():
+        return entry.as_post_content()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from core.constants import (
+    POST_CACHE_FRESH_SECONDS,
+    POST_CACHE_MAX_ENTRIES,
+    POST_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+BEEHIIV_CACHE_DIR = os.getenv("BEEHIIV_CACHE_DIR")
+
+
+def content_hash(raw_content: Optional[str]) -> Optional[str]:
+    if raw_content is None:
+        return None
+    return hashlib.sha256(raw_content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedPost:
+    publication_id: str
+    post_id: str
+    raw_content: Optional[str]
+    cleaned_content: Optional[str]
+    web_url: Optional[str]
+    thumbnail_url: Optional[str]
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    updated_at: Optional[Any] = None
+    validated_at: float = field(default_factory=time.time)
+
+    def is_fresh(self, max_age: float = POST_CACHE_FRESH_SECONDS) -> bool:
+        """True if the entry was validated recently enough to skip revalidation."""
+        return time.time() - self.validated_at < max_age
+
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def as_post_content(self) -> Dict[str, Any]:
+        """Same shape as get_beehiiv_post_content's return value."""
+        return {
+            "post_id": self.post_id,
+            "free_content": self.cleaned_content,
+            "web_url": self.web_url,
+            "thumbnail_url": self.thumbnail_url,
+        }
+
+
+class PostContentCache:
+    def __init__(
+        self,
+        maxsize: int = POST_CACHE_MAX_ENTRIES,
+        ttl: float = POST_CACHE_TTL_SECONDS,
+        directory: Optional[str] = None,
+    ):
+        self._memory: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _key(publication_id: str, post_id: str) -> str:
+        return f"{publication_id}:{post_id}"
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, publication_id: str, post_id: str) -> Optional[CachedPost]:
+        key = self._key(publication_id, post_id)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None or not self.directory:
+            return entry
+
+        entry = self._read(key)
+        if entry is not None:
+            with self._lock:
+                self._memory[key] = entry
+        return entry
+
+    def put(self, entry: CachedPost) -> None:
+        key = self._key(entry.publication_id, entry.post_id)
+        with self._lock:
+            self._memory[key] = entry
+        if self.directory:
+            self._write(key, entry)
+
+    def touch(self, entry: CachedPost) -> None:
+        """Mark an entry as just revalidated."""
+        entry.validated_at = time.time()
+        self.put(entry)
+
+    def invalidate(self, publication_id: str, post_id: str) -> None:
+        key = self._key(publication_id, post_id)
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _read(self, key: str) -> Optional[CachedPost]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return CachedPost(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable post cache entry {key}: {e}")
+            return None
+
+    def _write(self, key: str, entry: CachedPost) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(entry), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist post cache entry {key}: {e}")
+
+
+_post_cache: Optional[PostContentCache] = None
+_post_cache_lock = threading.Lock()
+
+
+def get_post_cache() -> PostContentCache:
+    """Process-wide cache, created on first use."""
+    global _post_cache
+    if _post_cache is None:
+        with _post_cache_lock:
+            if _post_cache is None:
+                _post_cache = PostContentCache(directory=BEEHIIV_CACHE_DIR)
+    return _post_cache
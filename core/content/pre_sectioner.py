@@ -0,0 +1,309 @@
+"""
+Local heuristic sectioner for cleaned newsletter HTML.
+
+Structure analysis sends the whole edition to the reasoning tier only to have
+it echoed back split into sections, minus ads and boilerplate. Most Beehiiv
+editions make that split obvious: stories sit under `h1`-`h3` headings and
+sponsor, "view in browser" and footer blocks use recognizable wording. This
+module does the split locally on the output of `clean_html_content`:
+
+1. Cut the document into top-level blocks (headings, paragraphs, lists, loose
+   text and image placeholders)
+2. Drop boilerplate blocks (view online, unsubscribe, referral and feedback
+   prompts, copyright lines) and whole sections introduced by a sponsor marker
+3. Split the rest on the highest heading level that repeats
+4. Score how much the result can be trusted
+
+A confident result is used as the structure directly; otherwise the trimmed
+content is what goes to the model, which is still smaller than the original.
+
+Usage:
+    result = pre_section(cleaned_html)
+    if result.is_confident():
+        structure = result.to_structure_json()
+    else:
+        structure = await call_llm(result.trimmed_content)
+"""
+
+import html
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Confidence at which the local sections replace the LLM structure analysis
+MIN_CONFIDENCE = 0.75
+
+# Preamble before the first section heading longer than this is kept as its
+# own section (and lowers confidence); shorter preambles are greetings
+MAX_INTRO_CHARS = 400
+
+# Sections shorter than this are suspicious (a stray label split off as a heading)
+MIN_SECTION_CHARS = 150
+
+# More sections than this at the split level usually means headlines were
+# marked up as headings; such a split is never used without the model
+MAX_SECTIONS = 10
+
+# Boilerplate patterns only apply to blocks up to this length, so a story that
+# mentions "subscribe" is not dropped
+MAX_BOILERPLATE_CHARS = 300
+
+BLOCK_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "p", "ul", "ol"}
+SPLIT_LEVELS = (1, 2, 3)
+
+TAG_PATTERN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*?(/?)>")
+STRIP_TAGS_PATTERN = re.compile(r"<[^>]+>")
+PLACEHOLDER_PATTERN = re.compile(r"\[image:[^\]]*\]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+BOILERPLATE_PATTERN = re.compile(
+    r"view (?:this (?:email|post) )?(?:in (?:your |a )?browser|online)"
+    r"|read (?:this )?online"
+    r"|unsubscribe"
+    r"|update your (?:email )?preferences"
+    r"|manage (?:your )?subscription"
+    r"|(?:was|were) (?:this )?forwarded"
+    r"|forwarded this (?:email|newsletter)"
+    r"|you(?:'re| are) receiving this"
+    r"|sign up (?:here|for free|now)"
+    r"|subscribe (?:here|now|for free)"
+    r"|share (?:this|the) (?:newsletter|email|post)"
+    r"|refer (?:a friend|\d+ friends?)"
+    r"|referral (?:link|program)"
+    r"|what did you think of (?:today|this)"
+    r"|how (?:did you like|was) (?:today|this)"
+    r"|rate (?:today|this) (?:issue|edition|newsletter)"
+    r"|powered by beehiiv"
+    r"|all rights reserved"
+    r"|©|copyright \d{4}",
+    re.IGNORECASE,
+)
+
+SPONSOR_PATTERN = re.compile(
+    r"^\W*(?:sponsored(?: by)?|presented by|brought to you by|together with"
+    r"|in partnership with|a word from (?:our|this week's) sponsors?"
+    r"|from our (?:sponsors?|partners?)|(?:today's|our) sponsors?|partner(?:ed)? content"
+    r"|advertisement|ad(?=\s*(?:[:|\-\u2013\u2014]|$)))\b",
+    re.IGNORECASE,
+)
+
+# Promotional wording left inside kept sections (an ad the heuristics missed)
+PROMO_PATTERN = re.compile(
+    r"promo code|discount code|use (?:the )?code\b|\d+% off|free trial"
+    r"|limited[- ]time offer|sponsored",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Block:
+    html: str
+    text: str
+    heading_level: Optional[int] = None
+
+
+@dataclass
+class PreSectioning:
+    sections: List[Dict[str, str]]
+    trimmed_content: str
+    confidence: float
+    removed_blocks: int = 0
+    reasons: List[str] = field(default_factory=list)
+
+    def is_confident(self, threshold: float = MIN_CONFIDENCE) -> bool:
+        return bool(self.sections) and self.confidence >= threshold
+
+    def to_structure_json(self) -> str:
+        """Sections in the JSON shape `analyze_structure` returns."""
+        return json.dumps({"sections": self.sections}, indent=2)
+
+
+def _block_text(block_html: str) -> str:
+    text = PLACEHOLDER_PATTERN.sub(" ", block_html)
+    text = html.unescape(STRIP_TAGS_PATTERN.sub(" ", text))
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def split_blocks(content: str) -> List[Block]:
+    """Cut cleaned HTML into top-level block elements and runs of loose content."""
+    blocks: List[Block] = []
+
+    def add(start: int, end: int, tag: Optional[str]) -> None:
+        piece = content[start:end].strip()
+        if piece:
+            level = int(tag[1]) if tag and tag[0] == "h" else None
+            blocks.append(Block(piece, _block_text(piece), level))
+
+    depth = 0
+    start = 0
+    open_tag = None
+    for match in TAG_PATTERN.finditer(content):
+        closing, tag, self_closing = match.groups()
+        tag = tag.lower()
+        if tag not in BLOCK_TAGS or self_closing:
+            continue
+        if not closing:
+            if depth == 0:
+                add(start, match.start(), None)
+                start = match.start()
+                open_tag = tag
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                add(start, match.end(), open_tag)
+                start = match.end()
+                open_tag = None
+
+    add(start, len(content), open_tag)
+    return blocks
+
+
+def _is_boilerplate(block: Block) -> bool:
+    if len(block.text) > MAX_BOILERPLATE_CHARS:
+        return False
+    return bool(BOILERPLATE_PATTERN.search(block.text))
+
+
+def _is_sponsor_marker(block: Block) -> bool:
+    # Markers are labels ("TOGETHER WITH ACME"), not sentences
+    return len(block.text) <= 80 and bool(SPONSOR_PATTERN.search(block.text))
+
+
+def _split_level(blocks: List[Block]) -> Optional[int]:
+    counts = {level: 0 for level in SPLIT_LEVELS}
+    for block in blocks:
+        if block.heading_level in counts:
+            counts[block.heading_level] += 1
+    for level in SPLIT_LEVELS:
+        if counts[level] >= 2:
+            return level
+    return None
+
+
+def _group(
+    blocks: List[Block], level: int
+) -> Tuple[List[Block], List[Tuple[Block, List[Block]]]]:
+    """Return (preamble, [(heading, body blocks)]) split at `level` headings."""
+    preamble: List[Block] = []
+    groups: List[Tuple[Block, List[Block]]] = []
+    for block in blocks:
+        if block.heading_level == level:
+            groups.append((block, []))
+            continue
+        # Anything else, including a higher-level heading (usually the edition
+        # title), stays with whatever precedes it
+        if groups:
+            groups[-1][1].append(block)
+        else:
+            preamble.append(block)
+    return preamble, groups
+
+
+def _join(blocks: List[Block]) -> str:
+    return "".join(block.html for block in blocks)
+
+
+def _text_length(blocks: List[Block]) -> int:
+    return sum(len(block.text) for block in blocks)
+
+
+def pre_section(content: str) -> PreSectioning:
+    """
+    Split cleaned newsletter HTML into sections without calling a model.
+
+    Args:
+        content: Output of `clean_html_content` (image placeholders allowed)
+
+    Returns:
+        PreSectioning with the sections, the content minus the blocks that were
+        removed, and a confidence score in [0, 1]
+    """
+    blocks = split_blocks(content or "")
+    reasons: List[str] = []
+
+    kept: List[Block] = []
+    removed = 0
+    for block in blocks:
+        if _is_boilerplate(block):
+            removed += 1
+        else:
+            kept.append(block)
+
+    level = _split_level(kept)
+    if level is None:
+        return PreSectioning(
+            sections=[],
+            trimmed_content=_join(kept),
+            confidence=0.0,
+            removed_blocks=removed,
+            reasons=["no repeated h1-h3 headings"],
+        )
+
+    preamble, groups = _group(kept, level)
+
+    sections: List[Dict[str, str]] = []
+    trimmed: List[Block] = []
+    confidence = 1.0
+    promo_sections = 0
+    short_sections = 0
+
+    intro = [block for block in preamble if block.heading_level is None]
+    if _text_length(intro) > MAX_INTRO_CHARS:
+        sections.append(
+            {"section_title": "Introduction", "section_content": _join(intro)}
+        )
+        trimmed.extend(preamble)
+        confidence -= 0.15
+        reasons.append("long preamble before the first section")
+    else:
+        removed += len(preamble)
+
+    for heading, body in groups:
+        sponsor_index = next(
+            (i for i, block in enumerate(body) if _is_sponsor_marker(block)), None
+        )
+        if _is_sponsor_marker(heading) or sponsor_index == 0:
+            removed += 1 + len(body)
+            continue
+        if sponsor_index is not None:
+            # A sponsor label mid-section: the ad's extent is unclear
+            confidence -= 0.3
+            reasons.append(f"sponsor marker inside '{heading.text}'")
+
+        section_text = " ".join(block.text for block in body)
+        if not section_text:
+            removed += 1 + len(body)
+            continue
+        if len(section_text) < MIN_SECTION_CHARS:
+            short_sections += 1
+        if PROMO_PATTERN.search(section_text):
+            promo_sections += 1
+
+        sections.append(
+            {"section_title": heading.text, "section_content": _join(body)}
+        )
+        trimmed.append(heading)
+        trimmed.extend(body)
+
+    if len(sections) < 2:
+        confidence -= 0.3
+        reasons.append(f"{len(sections)} section(s) after filtering")
+    if len(sections) > MAX_SECTIONS:
+        confidence = 0.0
+        reasons.append(f"{len(sections)} sections at h{level}")
+    if short_sections:
+        confidence -= min(0.3, 0.1 * short_sections)
+        reasons.append(f"{short_sections} short section(s)")
+    if promo_sections:
+        confidence -= 0.3
+        reasons.append(f"promotional wording in {promo_sections} section(s)")
+
+    return PreSectioning(
+        sections=sections,
+        trimmed_content=_join(trimmed),
+        confidence=max(0.0, round(confidence, 2)),
+        removed_blocks=removed,
+        reasons=reasons,
+    )
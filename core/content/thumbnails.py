@@ -0,0 +1,152 @@
+"""
+Thumbnail mirroring for Beehiiv posts.
+
+A post's thumbnail is copied into the "thumbnails" bucket so generated content
+links to our storage. Every content type generated from one edition asks for
+the same thumbnail, so objects are named by the SHA-256 of the source image
+(plus the resize setting) and only uploaded when absent:
+
+- source URL already mirrored by this process: no download, no storage call
+- same bytes seen before (e.g. re-hosted under another URL): no storage call
+- otherwise the download is streamed and hashed, optionally downscaled, and
+  uploaded through `upload_bytes_if_absent`, which skips existing objects
+
+Decoding, resizing and storage calls run in worker threads.
+
+Usage:
+    url = await mirror_thumbnail(supabase, post_content["thumbnail_url"])
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from typing import Optional, Tuple
+
+import aiohttp
+from cachetools import TTLCache
+from PIL import Image
+from supabase import Client
+
+from core.constants import (
+    HTTP_REQUEST_TIMEOUT,
+    THUMBNAIL_MAX_DIMENSION,
+    THUMBNAIL_MAX_DOWNLOAD_BYTES,
+)
+from core.content.image_generation.encoders import encode_image
+from core.utils import metrics
+from core.utils.storage_utils import upload_bytes_if_absent
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_BUCKET = "thumbnails"
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+# Source URL -> public URL, and (source hash, resize setting) -> public URL
+_by_source: TTLCache = TTLCache(maxsize=1024, ttl=6 * 60 * 60)
+_by_hash: TTLCache = TTLCache(maxsize=1024, ttl=6 * 60 * 60)
+_index_lock = threading.Lock()
+
+
+async def _download(
+    session: aiohttp.ClientSession, url: str
+) -> Optional[Tuple[bytes, str, str]]:
+    """Stream `url`, returning (bytes, sha256 hex digest, content type)."""
+    async with session.get(url) as resp:
+        if resp.status != 200:
+            logger.error(f"Failed to download thumbnail: HTTP {resp.status}")
+            return None
+        content_type = resp.headers.get("Content-Type", "image/jpeg")
+        content_type = content_type.split(";")[0].strip().lower()
+
+        digest = hashlib.sha256()
+        buffer = BytesIO()
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            digest.update(chunk)
+            buffer.write(chunk)
+            if buffer.tell() > THUMBNAIL_MAX_DOWNLOAD_BYTES:
+                logger.warning(
+                    f"Thumbnail larger than {THUMBNAIL_MAX_DOWNLOAD_BYTES} bytes, "
+                    "not mirroring it"
+                )
+                return None
+        return buffer.getvalue(), digest.hexdigest(), content_type
+
+
+def _prepare(
+    data: bytes, content_type: str, max_dimension: Optional[int]
+) -> Tuple[bytes, str]:
+    """Downscale and re-encode (as configured) images over `max_dimension`."""
+    if max_dimension:
+        with Image.open(BytesIO(data)) as image:
+            if max(image.size) > max_dimension:
+                image.thumbnail((max_dimension, max_dimension))
+                encoded = encode_image(image, "thumbnail")
+                return encoded.data, encoded.content_type
+    return data, content_type
+
+
+async def mirror_thumbnail(
+    supabase: Client,
+    thumbnail_url: str,
+    max_dimension: Optional[int] = THUMBNAIL_MAX_DIMENSION,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> Optional[str]:
+    """
+    Copy a thumbnail into storage once and return its public URL.
+
+    Args:
+        supabase: Supabase client used for storage
+        thumbnail_url: Source image URL (Beehiiv CDN)
+        max_dimension: Downscale images whose longer side exceeds this;
+            None keeps the original bytes
+        session: Reused aiohttp session, if the caller has one
+
+    Returns:
+        Public URL of the stored thumbnail, or None if it could not be downloaded
+    """
+    with _index_lock:
+        url = _by_source.get(thumbnail_url)
+    if url is not None:
+        metrics.increment("thumbnail_mirror", result="known_source")
+        return url
+
+    if session is None:
+        timeout = aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as own_session:
+            downloaded = await _download(own_session, thumbnail_url)
+    else:
+        downloaded = await _download(session, thumbnail_url)
+    if downloaded is None:
+        return None
+    data, digest, content_type = downloaded
+
+    hash_key = (digest, max_dimension)
+    with _index_lock:
+        url = _by_hash.get(hash_key)
+    if url is not None:
+        metrics.increment("thumbnail_mirror", result="known_hash")
+    else:
+        data, content_type = await asyncio.to_thread(
+            _prepare, data, content_type, max_dimension
+        )
+        extension = EXTENSIONS.get(content_type, "jpg")
+        file_name = f"{digest}-{max_dimension or 'orig'}.{extension}"
+        url, _ = await upload_bytes_if_absent(
+            supabase, THUMBNAIL_BUCKET, file_name, data, content_type
+        )
+        metrics.increment("thumbnail_mirror", result="processed")
+
+    with _index_lock:
+        _by_hash[hash_key] = url
+        _by_source[thumbnail_url] = url
+    return url
@@ -2,56 +2,17 @@ import json
 import logging
 import re
 from typing import Dict, Any
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
 from core.models.account_profile import AccountProfile
+from core.content.content_type_loader import get_step_prompts, register_step_prompts
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
-CONTENT_TYPE_MAP = {
-    "precta_tweet": "core.social_media.twitter.precta_tweet",
-    "postcta_tweet": "core.social_media.twitter.postcta_tweet",
-    "thread_tweet": "core.social_media.twitter.thread_tweet",
-    "long_form_tweet": "core.social_media.twitter.long_form_tweet",
-    "long_form_post": "core.social_media.linkedin.long_form_post",
-    "image_list": "core.social_media.image_list",
-    "carousel_tweet": "core.social_media.twitter.carousel_tweet",
-    "carousel_post": "core.social_media.linkedin.carousel_post",
-}
-
-
-def get_instructions_for_content_type(content_type: str) -> Dict[str, Any]:
-    try:
-        module = CONTENT_TYPE_MAP.get(content_type)
-        if not module:
-            raise ModuleNotFoundError(f"Content type '{content_type}' not found.")
-        return module.instructions
-
-    except ModuleNotFoundError as e:
-        logging.error(f"Error fetching instructions for {content_type}: {e}")
-        return {"ai_polish": ""}
-
-
-def get_platform_from_content_type(content_type: str) -> str:
-    return "linkedin" if "linkedin" in content_type else "twitter"
-
-
-async def ai_polish(
-    generated_content: Dict[str, Any],
-    account_profile: AccountProfile,
-    content_type: str,
-    instructions: Dict[str, Any] = None,
-) -> Dict[str, Any]:
-    logger.info(f"Starting AI polish for: {content_type}")
-
-    # Step 1: Fetch the AI polish instructions for the given content type if not provided
-    if instructions is None:
-        instructions = get_instructions_for_content_type(content_type)
-
-    ai_polish_instructions = instructions.get("ai_polish", "")
-
-    system_message = {
-        "role": "system",
-        "content": f"""
+SYSTEM_TEMPLATE = """
         You are an expert editor specializing in refining text to ensure it reads naturally and authentically. Your task is to:
 
 Review the Provided Content: Carefully read the text to identify any overused or common phrases that might make it seem artificially generated or less engaging.
@@ -106,33 +67,52 @@ Maintain the Author's Voice: Ensure that any replacements or adjustments match t
 Don't get rid of any links that are already in the post but never add any more.
 
 No Additional Changes: Do not add any new information, explanations, or comments to the text. Do not get rid of anything else in the post format/content container.
-        """,
-    }
+        """
+
+USER_TEMPLATE = """
+        ${instructions}: ${post}
+        """
+
+register_step_prompts("ai_polish", SYSTEM_TEMPLATE, USER_TEMPLATE)
+
+
+@log_step("ai_polish")
+async def ai_polish(
+    generated_content: Dict[str, Any],
+    account_profile: AccountProfile,
+    content_type: str,
+) -> Dict[str, Any]:
+    logger.info(f"Starting AI polish for: {content_type}")
 
+    prompts = get_step_prompts("ai_polish", content_type)
+    system_message = {"role": "system", "content": prompts.system.render()}
     user_message = {
         "role": "user",
-        "content": f"""
-        {ai_polish_instructions}: {generated_content}
-        """,
+        "content": prompts.user.render(post=generated_content),
     }
 
     try:
         logger.info("Making LLM call for AI polishing...")
-        response = await call_language_model(system_message, user_message, tier="high")
-        logger.info(f"Raw AI polish generation response: {response}")
+        response = await call_language_model(
+            system_message,
+            user_message,
+            tier="high",
+            output_tokens=get_output_token_budget(content_type),
+        )
+        logger.info("Raw AI polish generation response: %s", payload(response))
 
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
         if match:
             extracted_content = match.group(1).strip()
-            logger.info(f"Extracted polished content: {extracted_content}")
+            logger.info("Extracted polished content: %s", payload(extracted_content))
 
             cleaned_content = re.sub(r"\s+", " ", extracted_content)
             cleaned_content = cleaned_content.encode("utf-8", "ignore").decode("utf-8")
-            logger.info(f"Polished content: {cleaned_content}")
+            logger.info("Polished content: %s", payload(cleaned_content))
 
             try:
                 response_json = json.loads(cleaned_content)
-                logger.info(f"Parsed JSON polished content: {response_json}")
+                logger.info("Parsed JSON polished content: %s", payload(response_json))
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing cleaned content as JSON: {e}")
                 return {"error": "Failed to parse cleaned content", "success": False}
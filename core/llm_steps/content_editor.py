@@ -1,73 +1,54 @@
 import logging
 from typing import Dict, Any
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
 from core.utils.llm_response_handler import LLMResponseHandler
+from core.content.content_type_loader import get_step_prompts, register_step_prompts
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
-# Import the content type map, similar to content_generator.py
-from core.social_media.twitter import (
-    precta_tweet,
-    postcta_tweet,
-    thread_tweet,
-    long_form_tweet,
-)
-from core.social_media.linkedin import long_form_post
-
-CONTENT_TYPE_MAP = {
-    "precta_tweet": precta_tweet,
-    "postcta_tweet": postcta_tweet,
-    "thread_tweet": thread_tweet,
-    "long_form_tweet": long_form_tweet,
-    "linkedin_long_form_post": long_form_post,
-}
+SYSTEM_TEMPLATE = """You are an expert social media copywriter specializing in creating engaging, natural-sounding posts. Your task is to improve the given content based on its type:
 
+1. For all content types:
+   - Make the hook super catchy. Make it something bold and daring, throw a big number in, start with "How to" or something that will really make people stop and want to read on.
+   - Avoid phrases commonly associated with AI-generated content such as "revolutionizing", "democratizing", "changing the game"
+   - Maintain the core message and key points while improving clarity and engagement potential
+   - Ensure the content flows naturally and is never choppy, both between subsequent individual posts as part of a larger post and within posts so as to avoid fragments
+This has to be proper json, so all key and values MUST BE IN DOUBLE QUOTES
+${instructions}"""
 
-def get_instructions_for_content_type(content_type: str) -> Dict[str, Any]:
-    try:
-        module = CONTENT_TYPE_MAP.get(content_type)
-        if not module:
-            raise ModuleNotFoundError(f"Content type '{content_type}' not found.")
-        return module.instructions
+USER_TEMPLATE = (
+    "Please review and improve the following ${content_type} content:\n\n${post}"
+)
 
-    except ModuleNotFoundError as e:
-        logging.error(f"Error fetching instructions for {content_type}: {e}")
-        return {"content_editing": ""}
+register_step_prompts("content_editing", SYSTEM_TEMPLATE, USER_TEMPLATE)
 
 
+@log_step("content_editing")
 async def edit_content(
     generated_content: Dict[str, Any],
     content_type: str,
-    instructions: Dict[str, Any] = None,
 ) -> Dict[str, Any]:
     logger.info(f"Starting content editing for: {content_type}")
 
-    if instructions is None:
-        instructions = get_instructions_for_content_type(content_type)
-
-    content_editing_instructions = instructions.get("content_editing", "")
-
-    system_message = {
-        "role": "system",
-        "content": f"""You are an expert social media copywriter specializing in creating engaging, natural-sounding posts. Your task is to improve the given content based on its type:
-
-1. For all content types:
-   - Make the hook super catchy. Make it something bold and daring, throw a big number in, start with "How to" or something that will really make people stop and want to read on.
-   - Avoid phrases commonly associated with AI-generated content such as "revolutionizing", "democratizing", "changing the game"
-   - Maintain the core message and key points while improving clarity and engagement potential
-   - Ensure the content flows naturally and is never choppy, both between subsequent individual posts as part of a larger post and within posts so as to avoid fragments
-This has to be proper json, so all key and values MUST BE IN DOUBLE QUOTES
-{content_editing_instructions}""",
-    }
-
+    prompts = get_step_prompts("content_editing", content_type)
+    system_message = {"role": "system", "content": prompts.system.render()}
     user_message = {
         "role": "user",
-        "content": f"Please review and improve the following {content_type} content:\n\n{generated_content}",
+        "content": prompts.user.render(post=generated_content),
     }
 
     try:
-        response = await call_language_model(system_message, user_message, tier="high")
-        logger.info(f"Raw edited content for {content_type}: {response}")
+        response = await call_language_model(
+            system_message,
+            user_message,
+            tier="high",
+            output_tokens=get_output_token_budget(content_type),
+        )
+        logger.info("Raw edited content for %s: %s", content_type, payload(response))
 
         edited_content = LLMResponseHandler.clean_llm_response(response)
 
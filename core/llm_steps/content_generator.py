@@ -3,57 +3,38 @@ import json
 import re
 from typing import Dict, Any, List
 from core.models.account_profile import AccountProfile
-from core.content.language_model_client import call_language_model
+from core.content.content_type_loader import get_step_prompts, register_step_prompts
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
-# Static mapping for content type modules
-CONTENT_TYPE_MAP = {
-    "precta_tweet": "core.social_media.twitter.precta_tweet",
-    "postcta_tweet": "core.social_media.twitter.postcta_tweet",
-    "thread_tweet": "core.social_media.twitter.thread_tweet",
-    "long_form_tweet": "core.social_media.twitter.long_form_tweet",
-    "long_form_post": "core.social_media.linkedin.long_form_post",
-    "image_list": "core.social_media.image_list",
-    "carousel_tweet": "core.social_media.twitter.carousel_tweet",
-    "carousel_post": "core.social_media.linkedin.carousel_post",
-}
-logger.info("Initializing CONTENT_TYPE_MAP with values:")
-for k, v in CONTENT_TYPE_MAP.items():
-    logger.info(f"{k}: {v}")
-
-try:
-    from core.social_media.twitter.carousel_tweet import (
-        instructions as twitter_carousel_instructions,
-    )
-    from core.social_media.linkedin.carousel_post import (
-        instructions as linkedin_carousel_instructions,
-    )
-
-    logger.info("Successfully imported carousel instruction modules")
-except Exception as e:
-    logger.error(f"Failed to import carousel modules: {str(e)}")
-
-
-def get_instructions_for_content_type(content_type: str) -> Dict[str, Any]:
-    logger.info("get_instructions_for_content_type called in content_generator.py")
-    try:
-        module_name = CONTENT_TYPE_MAP.get(content_type)
-        logger.info(f"Module name: {module_name}")
-
-        if not module_name:
-            raise ModuleNotFoundError(f"Content type '{content_type}' not found.")
-
-        module = __import__(module_name, fromlist=["instructions"])
-        logger.info(f"Module imported: {module}")
-        instructions = getattr(module, "instructions")
-        logger.info(f"Instructions retrieved: {instructions}")
+SYSTEM_TEMPLATE = """
+        You are an AI assistant specializing in creating engaging social media content.
+        Your task is to generate a ${content_type} based on the provided newsletter section.
+        Follow these guidelines:
+        1. Maintain the original meaning and key information from the source content.
+        2. Adapt the style to suit the ${content_type} format and the account's preferences.
+        3. Ensure the content is engaging and suited for the target platform.
+        4. Replace ${subscribe_url} (including the brackets) with the actual subscription link.
+        5. Replace ${web_url} (including the brackets) with the actual article link.
+        6. ${instructions}
+        
+        Format your response as a JSON object with 'type' and 'content' keys. The 'content' should be a list of post objects.
+        Wrap your response with the delimiters ~! and !~ to ensure correct parsing as shown in the example format.
+        """
 
-        return instructions
+USER_TEMPLATE = """
+        Generate a ${content_type} based on this newsletter section:
+        Content: ${strategy}
+        Account preferences: ${account_preferences}
+        Original content URL: ${web_url}
+        """
 
-    except Exception as e:
-        logger.error(f"Error in content_generator.py get_instructions: {str(e)}")
-        raise
+register_step_prompts("content_generation", SYSTEM_TEMPLATE, USER_TEMPLATE)
 
 
 def replace_urls_in_content(
@@ -88,6 +69,7 @@ def replace_urls_in_content(
     return result
 
 
+@log_step("content_generation")
 async def generate_content(
     strategy: Dict[str, Any],
     content_type: str,
@@ -99,45 +81,35 @@ async def generate_content(
         f"Starting content generation for: {content_type}, post number: {post_number}"
     )
 
-    # Load instructions for this content type
-    instructions = get_instructions_for_content_type(content_type)
-    content_generation_instructions = instructions.get("content_generation", "")
-
-    if not content_generation_instructions:
+    prompts = get_step_prompts("content_generation", content_type)
+    if not prompts.instructions:
         logger.error(f"Missing content generation instructions for {content_type}")
         return {"error": "Missing content generation instructions", "success": False}
     system_message = {
         "role": "system",
-        "content": f"""
-        You are an AI assistant specializing in creating engaging social media content.
-        Your task is to generate a {content_type} based on the provided newsletter section.
-        Follow these guidelines:
-        1. Maintain the original meaning and key information from the source content.
-        2. Adapt the style to suit the {content_type} format and the account's preferences.
-        3. Ensure the content is engaging and suited for the target platform.
-        4. Replace {account_profile.subscribe_url} (including the brackets) with the actual subscription link.
-        5. Replace {web_url} (including the brackets) with the actual article link.
-        6. {content_generation_instructions}
-        
-        Format your response as a JSON object with 'type' and 'content' keys. The 'content' should be a list of post objects.
-        Wrap your response with the delimiters ~! and !~ to ensure correct parsing as shown in the example format.
-        """,
+        "content": prompts.system.render(
+            subscribe_url=account_profile.subscribe_url, web_url=web_url
+        ),
     }
 
     user_message = {
         "role": "user",
-        "content": f"""
-        Generate a {content_type} based on this newsletter section:
-        Content: {strategy}
-        Account preferences: {account_profile.json()}
-        Original content URL: {web_url}
-        """,
+        "content": prompts.user.render(
+            strategy=strategy,
+            account_preferences=account_profile.json(),
+            web_url=web_url,
+        ),
     }
 
     try:
         logger.info("Making LLM call with system and user message...")
-        response = await call_language_model(system_message, user_message, tier="o1")
-        logger.info(f"LLM raw response: {response}")
+        response = await call_language_model(
+            system_message,
+            user_message,
+            tier="o1",
+            output_tokens=get_output_token_budget(content_type),
+        )
+        logger.info("LLM raw response: %s", payload(response))
 
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
         if not match:
@@ -2,64 +2,53 @@ import json
 import logging
 import re
 from typing import Dict, Any
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
 from core.models.account_profile import AccountProfile
+from core.content.content_type_loader import (
+    get_platform_from_content_type,
+    get_step_prompts,
+    register_step_prompts,
+)
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
-CONTENT_TYPE_MAP = {
-    "precta_tweet": "core.social_media.twitter.precta_tweet",
-    "postcta_tweet": "core.social_media.twitter.postcta_tweet",
-    "thread_tweet": "core.social_media.twitter.thread_tweet",
-    "long_form_tweet": "core.social_media.twitter.long_form_tweet",
-    "long_form_post": "core.social_media.linkedin.long_form_post",
-    "image_list": "core.social_media.image_list",
-    "carousel_tweet": "core.social_media.twitter.carousel_tweet",
-    "carousel_post": "core.social_media.linkedin.carousel_post",
-}
-
-
-def get_instructions_for_content_type(content_type: str) -> Dict[str, Any]:
-    logger.info(
-        "get_instructions_for_content_type called in content_personalization.py"
-    )
-    try:
-        module_name = CONTENT_TYPE_MAP.get(content_type)
-        logger.info(f"Getting instructions for module: {module_name}")
-
-        if not module_name:
-            raise ModuleNotFoundError(f"Content type '{content_type}' not found.")
-
-        # Import the module first, then get instructions
-        module = __import__(module_name, fromlist=["instructions"])
-        return getattr(module, "instructions")
-
-    except ModuleNotFoundError as e:
-        logging.error(f"Error fetching instructions for {content_type}: {e}")
-        return {"content_personalization": ""}
+SYSTEM_TEMPLATE = """
+        You are an expert content stylist with a keen ability to analyze and mimic writing styles. Your task is to rewrite the 'post_content' in the provided JSON input to perfectly match the user's unique writing style, making it indistinguishable from their authentic posts. Analyze the user's example content and focus on key stylistic elements such as:
+Tone (e.g., formal, casual, humorous)
+Vocabulary and language complexity
+Sentence and paragraph structure and length
+Punctuation and capitalization (ex: do they only use lowercase letters? )
+Use of personal anecdotes or rhetorical devices (and which ones)
+Use of emojis or hashtags?
+Specific styling tools like dashes, colons, etc
+Maintain the original message and key points while ensuring the style, tone, and voice are an exact match to the user's authentic writing. Keep the rest of the JSON structure and content unchanged. Keep all of your reasoning to yourself (only output the requested structure)
+        """
 
+USER_TEMPLATE = """
+        ${instructions}
+        Here is the unedited post: ${post}
+        and an example of the author's style for this platform: ${style_example}.
+        Don't get rid of any links that are already in the post but never add any more. Don't get rid of any image arrays or other media/assets.
+        """
 
-def get_platform_from_content_type(content_type: str) -> str:
-    return "linkedin" if "linkedin" in content_type else "twitter"
+register_step_prompts("content_personalization", SYSTEM_TEMPLATE, USER_TEMPLATE)
 
 
+@log_step("content_personalization")
 async def personalize_content(
     generated_content: Dict[str, Any],
     account_profile: AccountProfile,
     content_type: str,
-    instructions: Dict[str, Any] = None,
 ) -> Dict[str, Any]:
     logger.info(f"Starting content personalization for: {content_type}")
 
-    # Step 1: Fetch the personalization instructions for the given content type
-    if instructions is None:
-        instructions = get_instructions_for_content_type(content_type)
-
-    content_personalization_instructions = instructions.get(
-        "content_personalization", ""
-    )
+    prompts = get_step_prompts("content_personalization", content_type)
 
-    # Step 2: Prepare the platform-specific example style
+    # Prepare the platform-specific example style
     platform = get_platform_from_content_type(content_type)
     style_example = getattr(account_profile, f"example_{platform}", "")
 
@@ -68,51 +57,41 @@ async def personalize_content(
         logger.info(f"No {platform} style example found. Using newsletter content.")
         style_example = account_profile.newsletter_content
 
-    system_message = {
-        "role": "system",
-        "content": f"""
-        You are an expert content stylist with a keen ability to analyze and mimic writing styles. Your task is to rewrite the 'post_content' in the provided JSON input to perfectly match the user's unique writing style, making it indistinguishable from their authentic posts. Analyze the user's example content and focus on key stylistic elements such as:
-Tone (e.g., formal, casual, humorous)
-Vocabulary and language complexity
-Sentence and paragraph structure and length
-Punctuation and capitalization (ex: do they only use lowercase letters? )
-Use of personal anecdotes or rhetorical devices (and which ones)
-Use of emojis or hashtags?
-Specific styling tools like dashes, colons, etc
-Maintain the original message and key points while ensuring the style, tone, and voice are an exact match to the user's authentic writing. Keep the rest of the JSON structure and content unchanged. Keep all of your reasoning to yourself (only output the requested structure)
-        """,
-    }
+    system_message = {"role": "system", "content": prompts.system.render()}
     logger.info(
-        f"Generated content being passed to personalization: {json.dumps(generated_content, indent=2)}"
+        "Generated content being passed to personalization: %s",
+        payload(generated_content),
     )
     user_message = {
         "role": "user",
-        "content": f"""
-        {content_personalization_instructions}
-        Here is the unedited post: {json.dumps(generated_content)}
-        and an example of the author's style for this platform: {style_example}.
-        Don't get rid of any links that are already in the post but never add any more. Don't get rid of any image arrays or other media/assets.
-        """,
+        "content": prompts.user.render(
+            post=json.dumps(generated_content), style_example=style_example
+        ),
     }
 
     try:
         logger.info("Making LLM call for content personalization...")
-        logger.info(user_message)
-        response = await call_language_model(system_message, user_message, tier="high")
-        logger.info(f"Raw personalized content response: {response}")
+        logger.debug("Personalization user message: %s", payload(user_message))
+        response = await call_language_model(
+            system_message,
+            user_message,
+            tier="high",
+            output_tokens=get_output_token_budget(content_type),
+        )
+        logger.info("Raw personalized content response: %s", payload(response))
 
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
         if match:
             extracted_content = match.group(1).strip()
-            logger.info(f"Extracted personalized content: {extracted_content}")
+            logger.info("Extracted personalized content: %s", payload(extracted_content))
 
             cleaned_content = re.sub(r"\s+", " ", extracted_content)
             cleaned_content = cleaned_content.encode("utf-8", "ignore").decode("utf-8")
-            logger.info(f"Cleaned personalized content: {cleaned_content}")
+            logger.info("Cleaned personalized content: %s", payload(cleaned_content))
 
             try:
                 response_json = json.loads(cleaned_content)
-                logger.info(f"Parsed JSON personalized content: {response_json}")
+                logger.info("Parsed JSON personalized content: %s", payload(response_json))
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing cleaned content as JSON: {e}")
                 return {"error": "Failed to parse cleaned content", "success": False}
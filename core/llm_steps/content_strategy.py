@@ -1,11 +1,16 @@
 import json
 import logging
 import re
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    estimate_token_count,
+)
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
 
+@log_step("content_strategy")
 async def determine_content_strategy(newsletter_structure: str) -> str:
     # Log the input newsletter structure (first 100 characters for brevity)
     # logger.info(f"Input newsletter structure: {newsletter_structure[:100]}...")
@@ -53,18 +58,24 @@ Do not include any additional text or formatting beyond what's inside the array.
     }
     try:
         # Call the language model
-        response = await call_language_model(system_message, user_message, "high")
-        logger.info(f"Raw response from AI assistant: {response}")
+        # Selected sections are returned in full, so size the output on the input
+        response = await call_language_model(
+            system_message,
+            user_message,
+            "high",
+            output_tokens=estimate_token_count(newsletter_structure),
+        )
+        logger.info("Raw response from AI assistant: %s", payload(response))
 
         # Extract content between delimiters
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
         if match:
             extracted_content = match.group(1).strip()
-            logger.debug(f"Extracted content: {extracted_content}")
+            logger.debug("Extracted content: %s", payload(extracted_content))
 
             # Sanitize the extracted content
             sanitized_content = re.sub(r"[\x00-\x1f\x7f]", "", extracted_content)
-            logger.debug(f"Sanitized content: {sanitized_content}")
+            logger.debug("Sanitized content: %s", payload(sanitized_content))
 
             try:
                 # Parse and return the content as a list of sections
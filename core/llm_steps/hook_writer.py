@@ -2,62 +2,17 @@ import json
 import logging
 import re
 from typing import Dict, Any
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
 from core.models.account_profile import AccountProfile
+from core.content.content_type_loader import get_step_prompts, register_step_prompts
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
-# Import the content type modules
-from core.social_media.twitter import (
-    precta_tweet,
-    postcta_tweet,
-    thread_tweet,
-    long_form_tweet,
-)
-from core.social_media.linkedin import long_form_post
-
-CONTENT_TYPE_MAP = {
-    "precta_tweet": precta_tweet,
-    "postcta_tweet": postcta_tweet,
-    "thread_tweet": thread_tweet,
-    "long_form_tweet": long_form_tweet,
-    "linkedin_long_form_post": long_form_post,
-}
-
-
-def get_instructions_for_content_type(content_type: str) -> Dict[str, Any]:
-    try:
-        module = CONTENT_TYPE_MAP.get(content_type)
-        if not module:
-            raise ModuleNotFoundError(f"Content type '{content_type}' not found.")
-        return module.instructions
-
-    except ModuleNotFoundError as e:
-        logging.error(f"Error fetching instructions for {content_type}: {e}")
-        return {"hook_writing": ""}
-
-
-def get_platform_from_content_type(content_type: str) -> str:
-    return "linkedin" if "linkedin" in content_type else "twitter"
-
-
-async def write_hooks(
-    generated_content: Dict[str, Any],
-    account_profile: AccountProfile,
-    content_type: str,
-    instructions: Dict[str, Any] = None,
-) -> Dict[str, Any]:
-    logger.info(f"Starting hook generation for: {content_type}")
-
-    # Step 1: Fetch the hook writing instructions for the given content type if not provided
-    if instructions is None:
-        instructions = get_instructions_for_content_type(content_type)
-
-    hook_writing_instructions = instructions.get("hook_writing", "")
-
-    system_message = {
-        "role": "system",
-        "content": f"""
+SYSTEM_TEMPLATE = """
         You are an expert social media copywriter. Evaluate the existing prompt. If it is not already strong, replace it. DO NOT CHANGE ANY OTHER TEXT OTHER THAN THE HOOK.
 
 Analyze the Entire Post to understand the author's style, tone, voice, and the main message of the post.
@@ -112,35 +67,54 @@ Don't get rid of any links that are already in the post but never add any more.
 No Additional Content: Do not add explanations, comments, or any additional content to your response.
 
 Your output must be identical to the input in every way except for the first sentence. This is critical for the rest of the content generation pipeline to function correctly. Literally change nothing but the hook.
-        """,
-    }
+        """
+
+USER_TEMPLATE = """
+        Here's the original ${content_type} post: ${post} and your formatting requirements: ${instructions}
+        """
+
+register_step_prompts("hook_writing", SYSTEM_TEMPLATE, USER_TEMPLATE)
+
 
+@log_step("hook_writing")
+async def write_hooks(
+    generated_content: Dict[str, Any],
+    account_profile: AccountProfile,
+    content_type: str,
+) -> Dict[str, Any]:
+    logger.info(f"Starting hook generation for: {content_type}")
+
+    prompts = get_step_prompts("hook_writing", content_type)
+    system_message = {"role": "system", "content": prompts.system.render()}
     user_message = {
         "role": "user",
-        "content": f"""
-        Here's the original {content_type} post: {generated_content} and your formatting requirements: {hook_writing_instructions}
-        """,
+        "content": prompts.user.render(post=generated_content),
     }
 
     try:
         logger.info("Making LLM call for hook generation...")
-        response = await call_language_model(system_message, user_message, tier="high")
-        logger.info(f"Raw hook generation response: {response}")
+        response = await call_language_model(
+            system_message,
+            user_message,
+            tier="high",
+            output_tokens=get_output_token_budget(content_type),
+        )
+        logger.info("Raw hook generation response: %s", payload(response))
 
         # Extract the JSON content between delimiters ~! and !~
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
         if match:
             extracted_content = match.group(1).strip()
-            logger.info(f"Extracted hooks: {extracted_content}")
+            logger.info("Extracted hooks: %s", payload(extracted_content))
 
             # Apply cleaning to remove hidden characters and control characters
             cleaned_content = re.sub(r"\s+", " ", extracted_content)
             cleaned_content = cleaned_content.encode("utf-8", "ignore").decode("utf-8")
-            logger.info(f"Cleaned hooks: {cleaned_content}")
+            logger.info("Cleaned hooks: %s", payload(cleaned_content))
 
             try:
                 response_json = json.loads(cleaned_content)
-                logger.info(f"Parsed JSON hooks: {response_json}")
+                logger.info("Parsed JSON hooks: %s", payload(response_json))
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing cleaned content as JSON: {e}")
                 return {"error": "Failed to parse cleaned content", "success": False}
@@ -3,12 +3,45 @@ import logging
 import re
 from typing import Dict, Any, List
 from core.models.account_profile import AccountProfile
-from core.content.language_model_client import call_language_model
-from core.llm_steps.content_personalization import get_instructions_for_content_type
+from core.content.image_scoring import apply_assignments, score_images
+from core.content.language_model_client import (
+    call_language_model,
+    get_output_token_budget,
+)
+from core.content.content_type_loader import get_step_prompts, register_step_prompts
+from core.utils import metrics
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_TEMPLATE = """
+        You are an AI assistant specializing in evaluating image relevance for social media posts.
+        Be discerning in deciding whether images actually add value to the post. Not every image should be included, 
+        especially if it is just branding or generic content unrelated to the text. You do not need to include any images unless they truly add value.
+        You can add up to 4 images if relevant.
+        
+        Your task is to determine which images would enhance specific posts in a ${content_type}.
+        
+        Use this very specific format: ${instructions}
+        
+        Return the entire content structure with images assigned to appropriate posts.
+        """
+
+USER_TEMPLATE = """
+        Content to evaluate:
+        ${content}
+        
+        Available images:
+        ${images}
+
+        Note that there is a one gif limit, so if the image(s) are gifs, please limit the media to the most relevant gif.
+        Do not include any explanatory text. Your answer should be ONLY the requested structure so that we can immediately pass it to the next step in the pipeline without messing up the parsing.
+        """
 
+register_step_prompts("image_relevance", SYSTEM_TEMPLATE, USER_TEMPLATE)
+
+
+@log_step("image_relevance")
 async def check_image_relevance(
     content_data: Dict[str, Any],
     image_urls: List[str],
@@ -17,56 +50,73 @@ async def check_image_relevance(
 ) -> Dict[str, Any]:
     """
     Evaluate image relevance and return updated content_data with relevant images if possible.
+
+    Images are first scored locally (see core.content.image_scoring): junk is
+    dropped and clear matches are placed deterministically. The LLM is only
+    consulted when some image is ambiguous, and then only sees the junk-free
+    candidates. Each outcome is counted in the `image_relevance_decisions` metric.
     If JSON parsing of the LLM's response fails, gracefully fallback to original content_data.
     """
     if not image_urls:
         logger.debug("No images to evaluate for relevance.")
         return content_data
 
-    instructions = get_instructions_for_content_type(content_type)
-    image_instructions = instructions.get("image_relevance", "")
+    if content_type in ["carousel_tweet", "carousel_post"]:
+        # Carousels don't carry images yet; the LLM was told to echo them back
+        metrics.increment("image_relevance_decisions", decision="unsupported")
+        return content_data
+
+    scoring = score_images(
+        content_data.get("content_container", []), image_urls, content_type
+    )
+    metrics.increment("image_relevance_decisions", decision=scoring.decision)
+    for image in scoring.junk:
+        logger.info(f"Dropping image {image.url[:120]}: {image.junk_reason}")
+    logger.info(
+        f"Local image scoring decision: {scoring.decision} "
+        f"({len(scoring.candidates)} candidates, {len(scoring.junk)} filtered)"
+    )
 
-    if not image_instructions:
+    if scoring.decision == "skipped":
+        return content_data
+    if scoring.decision == "local":
+        return {
+            **content_data,
+            "content_container": apply_assignments(
+                content_data["content_container"], scoring
+            ),
+        }
+
+    # Ambiguous: only the junk-free candidates go to the model
+    image_urls = [
+        f'{image.url} alt="{image.alt}"' if image.alt else image.url
+        for image in scoring.candidates
+    ]
+
+    prompts = get_step_prompts("image_relevance", content_type)
+    if not prompts.instructions:
         logger.error(
             f"Missing image relevance instructions for content_type={content_type}. Returning content_data unchanged."
         )
         return content_data
 
-    system_message = {
-        "role": "system",
-        "content": f"""
-        You are an AI assistant specializing in evaluating image relevance for social media posts.
-        Be discerning in deciding whether images actually add value to the post. Not every image should be included, 
-        especially if it is just branding or generic content unrelated to the text. You do not need to include any images unless they truly add value.
-        You can add up to 4 images if relevant.
-        
-        Your task is to determine which images would enhance specific posts in a {content_type}.
-        
-        Use this very specific format: {image_instructions}
-        
-        Return the entire content structure with images assigned to appropriate posts.
-        """,
-    }
-
+    system_message = {"role": "system", "content": prompts.system.render()}
     user_message = {
         "role": "user",
-        "content": f"""
-        Content to evaluate:
-        {json.dumps(content_data, indent=2)}
-        
-        Available images:
-        {json.dumps(image_urls, indent=2)}
-
-        Note that there is a one gif limit, so if the image(s) are gifs, please limit the media to the most relevant gif.
-        Do not include any explanatory text. Your answer should be ONLY the requested structure so that we can immediately pass it to the next step in the pipeline without messing up the parsing.
-        """,
+        "content": prompts.user.render(
+            content=json.dumps(content_data, indent=2),
+            images=json.dumps(image_urls, indent=2),
+        ),
     }
 
     try:
         response = await call_language_model(
-            system_message, user_message, tier="medium"
+            system_message,
+            user_message,
+            tier="medium",
+            output_tokens=get_output_token_budget(content_type),
         )
-        logger.info(f"LLM raw response for image relevance: {response}")
+        logger.info("LLM raw response for image relevance: %s", payload(response))
 
         # Extract JSON from between ~! and !~
         match = re.search(r"~!(.*?)!~", response, re.DOTALL)
@@ -89,9 +139,7 @@ async def check_image_relevance(
             )
             return content_data
 
-        logger.info(
-            f"Image relevance returning exactly this: {json.dumps(response_json, indent=2)}"
-        )
+        logger.info("Image relevance returning: %s", payload(response_json))
         return response_json
 
     except Exception as e:
@@ -18,6 +18,9 @@ output that identifies distinct content sections, enabling the content strategy
 module to plan optimal social media distribution strategies.
 
 Processing Flow:
+0. **Local Pre-Sectioning**: Editions with clear heading structure are split
+   locally (core/content/pre_sectioner.py) and skip the model entirely; other
+   editions reach the model with boilerplate and sponsor blocks already removed
 1. **Content Analysis**: AI examines newsletter structure and themes
 2. **Section Identification**: Identifies logical content boundaries
 3. **Content Categorization**: Classifies sections (main story, headlines, etc.)
@@ -54,11 +57,18 @@ Example:
 import json
 import logging
 import re
-from core.content.language_model_client import call_language_model
+from core.content.language_model_client import (
+    call_language_model,
+    estimate_token_count,
+)
+from core.content.pre_sectioner import pre_section
+from core.utils import metrics
+from core.utils.logging_utils import log_step, payload
 
 logger = logging.getLogger(__name__)
 
 
+@log_step("structure_analysis")
 async def analyze_structure(content: str) -> str:
     """
     Analyze newsletter content structure using AI reasoning models.
@@ -94,6 +104,8 @@ async def analyze_structure(content: str) -> str:
         Exception: If AI processing fails or content cannot be parsed
 
     Processing Details:
+        - Editions the local pre-sectioner splits with high confidence are
+          returned without a model call
         - Uses 'o1' tier model for advanced reasoning capabilities
         - Removes promotional content (ads, sponsorships, CTAs)
         - Excludes boilerplate content (headers, footers, welcome messages)
@@ -125,6 +137,27 @@ async def analyze_structure(content: str) -> str:
         This is Step 1 of the 7-step AI pipeline. The structured output
         feeds directly into content strategy determination (Step 2).
     """
+    pre_sectioning = pre_section(content)
+    if pre_sectioning.is_confident():
+        logger.info(
+            f"Using {len(pre_sectioning.sections)} locally detected sections "
+            f"(confidence {pre_sectioning.confidence})"
+        )
+        metrics.increment("structure_analysis", path="local")
+        return pre_sectioning.to_structure_json()
+
+    metrics.increment("structure_analysis", path="llm")
+    logger.info(
+        f"Pre-sectioning confidence {pre_sectioning.confidence} "
+        f"({'; '.join(pre_sectioning.reasons)}), sending trimmed content to the model"
+    )
+    if pre_sectioning.trimmed_content:
+        metrics.observe(
+            "structure_analysis_trimmed_chars",
+            len(content) - len(pre_sectioning.trimmed_content),
+        )
+        content = pre_sectioning.trimmed_content
+
     system_message = {
         "role": "system",
         "content": """You are an AI assistant specialized in breaking down newsletters into logical sections. Your goal is to output these sections as valid JSON, following these rules:
@@ -176,8 +209,14 @@ Return the final JSON in **one line**, surrounded by `~!` and `!~`, with **no**
         "role": "user",
         "content": f"{content}",
     }
-    response = await call_language_model(system_message, user_message, "o1")
-    logger.info(f"Raw response from AI assistant: {response}")
+    # The sections echo the edition back, so the output is about the input's size
+    response = await call_language_model(
+        system_message,
+        user_message,
+        "o1",
+        output_tokens=estimate_token_count(content),
+    )
+    logger.info("Raw response from AI assistant: %s", payload(response))
 
     # Extract JSON content between delimiters
     match = re.search(r"~!\s*(.*?)\s*!~", response, re.DOTALL)
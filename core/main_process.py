@@ -36,34 +36,150 @@ Usage:
     )
 """
 
+import asyncio
 import json
 import logging
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from cachetools import TTLCache
 from supabase import Client as SupabaseClient
 
 from core.content.beehiiv_handler import (
     fetch_beehiiv_content,
     transform_images_into_placeholders,
 )
+from core.constants import GENERATION_CACHE_TTL_SECONDS, PREWARM_WAIT_SECONDS
+from core.content.generation_cache import (
+    edition_key,
+    get_generation_cache,
+    section_scope,
+)
 from core.models.account_profile import AccountProfile
 from core.llm_steps.structure_analysis import analyze_structure
 from core.llm_steps.content_strategy import determine_content_strategy
 from core.llm_steps.content_generator import generate_content
-from core.llm_steps.content_personalization import (
-    personalize_content,
-    get_instructions_for_content_type,
-)
+from core.llm_steps.content_personalization import personalize_content
 from core.llm_steps.hook_writer import write_hooks
 from core.llm_steps.ai_polisher import ai_polish
 from core.llm_steps.image_relevance import check_image_relevance
 from core.services.status_updates import StatusService
+from core.utils import metrics
 
 # Import the CarouselGenerator for creating carousels.
 from core.content.image_generation.carousel_generator import CarouselGenerator
 
 logger = logging.getLogger(__name__)
 
+# (account_id, post_id) of posts whose steps 1-3 ran from the publish webhook,
+# and the pre-warm tasks still in flight (also keeping them from being
+# garbage collected)
+_prewarmed_posts: TTLCache = TTLCache(maxsize=1024, ttl=GENERATION_CACHE_TTL_SECONDS)
+_prewarm_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+
+def start_prewarm(
+    account_profiles: List[AccountProfile], post_id: str, supabase: SupabaseClient
+) -> Optional[asyncio.Task]:
+    """
+    Pre-warm a post for the accounts connected to its publication, in a task of
+    its own so neither the webhook request nor other pre-warms wait for it.
+    Accounts whose pre-warm of the post is already running are left to it.
+    """
+    keys = [(profile.account_id, post_id) for profile in account_profiles]
+    pending = [
+        profile
+        for profile, key in zip(account_profiles, keys)
+        if key not in _prewarm_tasks
+    ]
+    if not pending:
+        return None
+    task = asyncio.create_task(prewarm_post(pending, post_id, supabase))
+    pending_keys = [(profile.account_id, post_id) for profile in pending]
+    for key in pending_keys:
+        _prewarm_tasks[key] = task
+
+    def forget(done: asyncio.Task) -> None:
+        for key in pending_keys:
+            if _prewarm_tasks.get(key) is done:
+                del _prewarm_tasks[key]
+
+    task.add_done_callback(forget)
+    return task
+
+
+async def prewarm_post(
+    account_profiles: List[AccountProfile], post_id: str, supabase: SupabaseClient
+) -> bool:
+    """
+    Run content fetching, structure analysis and strategy for a newly
+    published post before anyone asks for content from it.
+
+    The accounts share a publication, so the post is fetched and analysed once
+    and the result stored for each of them. The results land in the post
+    content and generation caches, so a later `run_main_process` for the post
+    only runs the per-section steps. Returns True if the post is warm
+    afterwards.
+    """
+    try:
+        content_data = await fetch_beehiiv_content(
+            account_profiles[0], post_id, supabase
+        )
+        original_content = content_data.get("free_content")
+        if not original_content:
+            logger.warning(f"Nothing to pre-warm for post {post_id}: no content")
+            return False
+
+        generation_cache = get_generation_cache()
+        documents = {
+            profile.account_id: generation_cache.lookup_document(
+                profile.account_id, original_content
+            )
+            for profile in account_profiles
+        }
+        document = next((doc for doc in documents.values() if doc), None)
+        if document:
+            newsletter_structure = document.structure
+            content_strategy = document.strategy
+        else:
+            newsletter_structure = await analyze_structure(original_content)
+            content_strategy = await determine_content_strategy(newsletter_structure)
+            strategy_list = json.loads(content_strategy)
+            if not isinstance(strategy_list, list) or not strategy_list:
+                logger.warning(f"Pre-warm of post {post_id} produced no strategy")
+                return False
+
+        for account_id, cached_document in documents.items():
+            if not cached_document:
+                generation_cache.store_document(
+                    account_id, original_content, newsletter_structure, content_strategy
+                )
+            _prewarmed_posts[(account_id, post_id)] = True
+        metrics.increment("pipeline_prewarm", len(documents), result="warmed")
+        logger.info(f"Pre-warmed post {post_id} for {len(documents)} account(s)")
+        return True
+    except Exception as e:
+        metrics.increment("pipeline_prewarm", len(account_profiles), result="failed")
+        logger.error(f"Pre-warm failed for post {post_id}: {str(e)}")
+        return False
+
+
+async def _wait_for_prewarm(account_id: str, post_id: str) -> None:
+    """
+    Let an in-flight pre-warm of the post finish instead of duplicating it,
+    for up to PREWARM_WAIT_SECONDS; after that the request runs cold.
+    """
+    task = _prewarm_tasks.get((account_id, post_id))
+    if task is None:
+        return
+    logger.info(f"Waiting for the pre-warm of post {post_id} to finish")
+    done, _ = await asyncio.wait({task}, timeout=PREWARM_WAIT_SECONDS)
+    if not done:
+        metrics.increment("pipeline_prewarm", result="wait_timeout")
+        logger.warning(
+            f"Pre-warm of post {post_id} still running after "
+            f"{PREWARM_WAIT_SECONDS}s; continuing without it"
+        )
+
 
 async def run_main_process(
     account_profile: AccountProfile,
@@ -72,6 +188,7 @@ async def run_main_process(
     content_type: str,
     supabase: SupabaseClient,
     content: Optional[str] = None,
+    regenerate: bool = False,
 ) -> Dict[str, Any]:
     """
     Execute the complete AI-powered content generation pipeline.
@@ -99,6 +216,8 @@ async def run_main_process(
         supabase: Supabase client for database operations and file storage
         content: Optional direct content input as string.
                 Mutually exclusive with 'post_id' parameter
+        regenerate: Run every step again instead of reusing earlier
+                   generations (core/content/generation_cache.py)
 
     Returns:
         Dict containing the generated content and metadata:
@@ -171,6 +290,7 @@ async def run_main_process(
         # Step 1: Content Fetching and Preparation
         await status_service.update_status(content_id, "analyzing")
         if post_id:
+            await _wait_for_prewarm(account_profile.account_id, post_id)
             # Fetch content from Beehiiv API
             try:
                 content_data = await fetch_beehiiv_content(
@@ -192,25 +312,52 @@ async def run_main_process(
             post_id = "pasted-content"
             logger.info("Using direct content input for processing")
 
-        # Safely transform images in HTML to placeholders for the LLM
-        if original_content:
-            original_content = transform_images_into_placeholders(original_content)
-            logger.info("Transformed images to placeholders for AI processing")
-        else:
+            # Beehiiv content already has image placeholders from the cleaner
+            if original_content:
+                original_content = transform_images_into_placeholders(
+                    original_content
+                )
+                logger.info("Transformed images to placeholders for AI processing")
+
+        if not original_content:
             await status_service.update_status(content_id, "failed")
             return {"error": "No content found", "success": False}
 
+        # Steps 2-3 are reused for editions seen before (republished or
+        # cross-posted) with the same text
+        generation_cache = get_generation_cache()
+        reused_document = None
+        if not regenerate:
+            reused_document = generation_cache.lookup_document(
+                account_profile.account_id, original_content
+            )
+        if post_id != "pasted-content":
+            if (account_profile.account_id, post_id) not in _prewarmed_posts:
+                warm_result = "cold"
+            else:
+                warm_result = "hit" if reused_document else "stale"
+            metrics.increment("pipeline_warm_start", result=warm_result)
+
         # Step 2: Structure Analysis
         await status_service.update_status(content_id, "analyzing_structure")
-        logger.info("Starting structure analysis")
-        newsletter_structure: str = await analyze_structure(original_content)
-        logger.info("Completed structure analysis")
+        if reused_document:
+            logger.info("Reusing structure and strategy of an equivalent edition")
+            newsletter_structure = reused_document.structure
+        else:
+            logger.info("Starting structure analysis")
+            newsletter_structure: str = await analyze_structure(original_content)
+            logger.info("Completed structure analysis")
 
         # Step 3: Strategy Determination
         await status_service.update_status(content_id, "determining_strategy")
-        logger.info("Starting content strategy determination")
-        content_strategy: str = await determine_content_strategy(newsletter_structure)
-        logger.info("Completed content strategy determination")
+        if reused_document:
+            content_strategy = reused_document.strategy
+        else:
+            logger.info("Starting content strategy determination")
+            content_strategy: str = await determine_content_strategy(
+                newsletter_structure
+            )
+            logger.info("Completed content strategy determination")
 
         # Validate strategy format
         try:
@@ -223,8 +370,16 @@ async def run_main_process(
             await status_service.update_status(content_id, "failed")
             return {"error": "Failed to parse content strategy", "success": False}
 
-        # Get content type specific instructions
-        content_type_instructions = get_instructions_for_content_type(content_type)
+        if not reused_document and strategy_list:
+            generation_cache.store_document(
+                account_profile.account_id,
+                original_content,
+                newsletter_structure,
+                content_strategy,
+            )
+        scope = section_scope(account_profile, content_type, web_url)
+        edition = edition_key(post_id, original_content)
+
         generated_contents: List[dict] = []
 
         # Step 4-7: Process each strategy section through the pipeline
@@ -236,8 +391,27 @@ async def run_main_process(
             logger.info(f"Processing section {post_number}")
 
             try:
-                # -- 4a: Cleanup section for generation (image placeholders, etc.) --
                 section_content = strategy.get("section_content", "")
+                reused_post_content = None
+                if not regenerate:
+                    reused_post_content = generation_cache.lookup_section(
+                        scope, section_content, edition, web_url
+                    )
+                if reused_post_content is not None:
+                    logger.info(f"Reusing earlier output for section {post_number}")
+                    generated_contents.append(
+                        {
+                            "post_number": int(post_number),
+                            "post_content": reused_post_content,
+                        }
+                    )
+                    continue
+
+                # Set when a step failed and earlier content was kept; such
+                # output is returned but not offered for reuse
+                degraded = False
+
+                # -- 4a: Cleanup section for generation (image placeholders, etc.) --
                 image_pattern = r"\[image:(.*?)\]"
                 image_urls = [
                     match.group(1)
@@ -282,17 +456,19 @@ async def run_main_process(
                         logger.info(
                             f"Updated content with relevant images for section {post_number}"
                         )
+                    else:
+                        degraded = True
 
                 # -- 4d: Personalize the content --
                 personalized_content = await personalize_content(
                     generated_content,
                     account_profile,
                     content_type,
-                    content_type_instructions,
                 )
                 content_to_use = personalized_content.get(
                     "content_container", generated_content["content_container"]
                 )
+                degraded |= "content_container" not in personalized_content
 
                 # -- 4e: Add hooks if not a carousel type --
                 await status_service.update_status(content_id, "writing_hooks")
@@ -305,11 +481,11 @@ async def run_main_process(
                         },
                         account_profile,
                         content_type,
-                        content_type_instructions,
                     )
                     content_for_polish = content_with_hooks.get(
                         "content_container", content_to_use
                     )
+                    degraded |= "content_container" not in content_with_hooks
                 else:
                     content_for_polish = content_to_use
 
@@ -322,11 +498,11 @@ async def run_main_process(
                     },
                     account_profile,
                     content_type,
-                    content_type_instructions,
                 )
                 final_content_to_use = polished_content.get(
                     "content_container", content_for_polish
                 )
+                degraded |= "content_container" not in polished_content
 
                 # -- 4g: If this is a carousel, generate images/PDF and shape data properly --
                 if content_type in ["carousel_tweet", "carousel_post"]:
@@ -401,6 +577,14 @@ async def run_main_process(
                         }
                     )
 
+                if not degraded:
+                    generation_cache.store_section(
+                        scope,
+                        section_content,
+                        generated_contents[-1]["post_content"],
+                        edition,
+                        web_url,
+                    )
                 logger.info(f"Successfully processed section {post_number}")
 
             except Exception as e:
@@ -1,3 +1,4 @@
+from typing import List
 from pydantic import ValidationError
 from core.models.account_profile import AccountProfile
 from supabase import Client
@@ -24,6 +25,25 @@ class AccountProfileService:
                 raise ValueError("Incomplete account profile data")
         raise ValueError("Account profile not found")
 
+    async def get_account_profiles_by_publication(
+        self, publication_id: str
+    ) -> List[AccountProfile]:
+        response = (
+            self.supabase.table("account_profiles")
+            .select("*")
+            .eq("publication_id", publication_id)
+            .execute()
+        )
+        profiles = []
+        for row in response.data or []:
+            try:
+                profiles.append(AccountProfile(**row))
+            except ValidationError:
+                logger.warning(
+                    f"Skipping incomplete account profile {row.get('account_id')}"
+                )
+        return profiles
+
     async def update_style_example(
         self, account_id: str, platform: str, style_example: str
     ):
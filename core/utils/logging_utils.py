@@ -0,0 +1,198 @@
+"""
+Logging setup for the content pipeline.
+
+Three pieces keep logging off the hot path:
+
+- `payload(value)` wraps a large value (LLM prompt/response, post dict) for
+  %-style logging. It is only rendered if the record is actually emitted, and
+  then capped at LOG_PAYLOAD_MAX_CHARS.
+- `log_step(name)` marks a pipeline step. Each invocation is sampled once
+  (LOG_SAMPLE_RATES, e.g. "ai_polish=0.1,hook_writing=0"); when it is not
+  sampled, its INFO/DEBUG records are dropped before they reach a handler.
+  Warnings and errors are always kept. Records show their step in brackets.
+- `configure_logging()` puts a QueueHandler in front of the real handler, so
+  request code only enqueues records and a background thread writes stdout.
+
+Full prompt/response capture is opt-in: set LLM_CAPTURE_PATH and every LLM
+call is appended as one JSON line to that file through its own logger, which
+does not propagate to the application logs.
+
+Usage:
+    from core.utils.logging_utils import log_step, payload
+
+    @log_step("ai_polish")
+    async def ai_polish(...):
+        logger.info("Raw AI polish response: %s", payload(response))
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# `step` is set by StepSamplingFilter ("-" outside a pipeline step)
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(step)s] %(message)s"
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+LLM_CAPTURE_PATH = os.getenv("LLM_CAPTURE_PATH")
+
+# (step name, whether this invocation's detail logs are emitted)
+_current_step: contextvars.ContextVar[Optional[Tuple[str, bool]]] = (
+    contextvars.ContextVar("log_step", default=None)
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_capture_logger: Optional[logging.Logger] = None
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        step, rate = item.split("=", 1)
+        try:
+            rates[step.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+LOG_SAMPLE_RATES = _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+LOG_DEFAULT_SAMPLE_RATE = float(os.getenv("LOG_DEFAULT_SAMPLE_RATE", "1.0"))
+
+
+class LogPayload:
+    """Lazily rendered, size-capped log argument."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = None):
+        self.value = value
+        self.limit = limit or LOG_PAYLOAD_MAX_CHARS
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, str):
+            text = value
+        else:
+            try:
+                text = json.dumps(value, default=str, ensure_ascii=False)
+            except (TypeError, ValueError):
+                text = str(value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [+{len(text) - self.limit} chars]"
+
+    __repr__ = __str__
+
+
+def payload(value: Any, limit: int = None) -> LogPayload:
+    return LogPayload(value, limit)
+
+
+def current_step() -> Optional[str]:
+    step = _current_step.get()
+    return step[0] if step else None
+
+
+def _sampled(step: str) -> bool:
+    rate = LOG_SAMPLE_RATES.get(step, LOG_DEFAULT_SAMPLE_RATE)
+    return rate >= 1.0 or random.random() < rate
+
+
+def log_step(step: str):
+    """Decorate an async pipeline step so its logs are tagged and sampled."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = _current_step.set((step, _sampled(step)))
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_step.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+class StepSamplingFilter(logging.Filter):
+    """Tags records with the current step and drops unsampled detail logs."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        step = _current_step.get()
+        if step is None:
+            record.step = "-"
+            return True
+        record.step = step[0]
+        return step[1] or record.levelno >= logging.WARNING
+
+
+def configure_logging(level: str = None) -> None:
+    """
+    Route the root logger through an in-memory queue drained by a background
+    thread. Safe to call more than once; later calls are no-ops.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or os.getenv("LOGGING_LEVEL", "INFO")
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(StepSamplingFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    if LLM_CAPTURE_PATH:
+        _configure_capture(LLM_CAPTURE_PATH)
+
+
+def _configure_capture(path: str) -> None:
+    global _capture_logger
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    capture_queue: queue.SimpleQueue = queue.SimpleQueue()
+    capture_logger = logging.getLogger("postonce.llm_io")
+    capture_logger.propagate = False
+    capture_logger.setLevel(logging.INFO)
+    capture_logger.addHandler(logging.handlers.QueueHandler(capture_queue))
+
+    listener = logging.handlers.QueueListener(capture_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    _capture_logger = capture_logger
+
+
+def capture_enabled() -> bool:
+    return _capture_logger is not None
+
+
+def capture_llm_io(**fields: Any) -> None:
+    """Append one LLM exchange to the capture sink, if capture is enabled."""
+    if _capture_logger is None:
+        return
+    record = {"ts": time.time(), "step": current_step(), **fields}
+    _capture_logger.info(json.dumps(record, default=str, ensure_ascii=False))
@@ -0,0 +1,85 @@
+"""
+In-process metrics for the content pipeline.
+
+A deliberately small counter/timing registry: pipeline stages record what they
+decided or how long they took, and the API exposes a snapshot. Values live in
+process memory only, so on serverless deployments they describe the current
+instance since its cold start.
+
+Usage:
+    from core.utils import metrics
+
+    metrics.increment("image_relevance_decisions", decision="local")
+    with metrics.timer("carousel_render_seconds", platform="linkedin"):
+        ...
+    metrics.snapshot()
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_timings: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Dict[str, float]] = {}
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    """Add `value` to the counter `name` for the given label set."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """Record one observation (e.g. a duration or a byte count) for `name`."""
+    key = _key(name, labels)
+    with _lock:
+        stats = _timings.get(key)
+        if stats is None:
+            _timings[key] = {"count": 1, "total": value, "max": value}
+        else:
+            stats["count"] += 1
+            stats["total"] += value
+            stats["max"] = max(stats["max"], value)
+
+
+@contextmanager
+def timer(name: str, **labels: Any):
+    """Observe the wall-clock seconds spent inside the block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _format(key: Tuple[str, Tuple[Tuple[str, str], ...]]) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return a JSON-serializable copy of all counters and observations."""
+    with _lock:
+        return {
+            "counters": {_format(k): v for k, v in _counters.items()},
+            "observations": {
+                _format(k): {**v, "avg": v["total"] / v["count"]}
+                for k, v in _timings.items()
+            },
+        }
+
+
+def reset() -> None:
+    """Clear every metric (used by benchmarks and local tooling)."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -1,32 +1,119 @@
+import asyncio
 import logging
-import os
-from io import BytesIO
+import threading
 from supabase import Client
-from PIL import Image
-import time
+from typing import Optional, Tuple
+
+from cachetools import TTLCache
+
+from core.constants import STORAGE_UPLOAD_ATTEMPTS, STORAGE_UPLOAD_BACKOFF_SECONDS
+from core.utils import metrics
 
 logger = logging.getLogger(__name__)
 
 
-async def upload_to_supabase(
-    supabase: Client, image: Image, bucket: str, file_name: str
-) -> str:
-    """Upload an image to Supabase Storage and return its public URL."""
-    try:
-        # Convert PIL Image to bytes
-        img_byte_arr = BytesIO()
-        image.save(img_byte_arr, format="PNG")
-        img_byte_arr = img_byte_arr.getvalue()
+def _is_duplicate(error: Exception) -> bool:
+    return "duplicate" in str(error).lower() or "409" in str(error)
+
+
+# (bucket, object name) -> public URL of objects known to exist
+_known_objects: TTLCache = TTLCache(maxsize=4096, ttl=24 * 60 * 60)
+_known_objects_lock = threading.Lock()
+
+
+def _object_exists(supabase: Client, bucket: str, file_name: str) -> bool:
+    folder, _, name = file_name.rpartition("/")
+    entries = supabase.storage.from_(bucket).list(
+        folder or None, {"search": name, "limit": 100}
+    )
+    return any(entry.get("name") == name for entry in entries or [])
+
+
+async def stored_object_url(
+    supabase: Client, bucket: str, file_name: str
+) -> Optional[str]:
+    """
+    Public URL of `file_name` if it is already stored, else None. Objects seen
+    by this process are answered from memory; otherwise one list call (in a
+    worker thread) checks storage.
+    """
+    key = (bucket, file_name)
+    with _known_objects_lock:
+        url = _known_objects.get(key)
+    if url is not None:
+        return url
+    if not await asyncio.to_thread(_object_exists, supabase, bucket, file_name):
+        return None
+    url = supabase.storage.from_(bucket).get_public_url(file_name)
+    with _known_objects_lock:
+        _known_objects[key] = url
+    return url
+
+
+async def upload_bytes_if_absent(
+    supabase: Client,
+    bucket: str,
+    file_name: str,
+    data: bytes,
+    content_type: str,
+    attempts: int = STORAGE_UPLOAD_ATTEMPTS,
+) -> Tuple[str, bool]:
+    """
+    Upload `data` under a content-derived `file_name` unless it is already stored.
 
-        # Generate unique filename using timestamp
-        unique_file_name = f"{file_name.split('.')[0]}_{int(time.time() * 1000)}.png"
+    The name must identify the content (e.g. a hash), so an existing object can
+    be reused as-is. Objects seen by this process are remembered, so repeat
+    calls make no storage requests at all; otherwise the upload itself finds
+    out, as storage refuses to overwrite an existing object. Failed uploads
+    are retried with exponential backoff. Storage calls run in a worker
+    thread.
 
-        # Upload to Supabase
-        supabase.storage.from_(bucket).upload(unique_file_name, img_byte_arr)
+    Returns:
+        (public URL, whether this call wrote the object). Objects are shared
+        by everything with the same content and are never removed. A
+        "duplicate" error on a retry may mean an earlier attempt went through
+        without its response arriving, or that another request stored the
+        object meanwhile, so it does not count as written.
+    """
+    key = (bucket, file_name)
+    with _known_objects_lock:
+        url = _known_objects.get(key)
+    if url is not None:
+        metrics.increment("storage_uploads", bucket=bucket, result="known")
+        return url, False
 
-        # Get and return public URL
-        return supabase.storage.from_(bucket).get_public_url(unique_file_name)
+    created = True
+    for attempt in range(1, attempts + 1):
+        try:
+            await asyncio.to_thread(
+                supabase.storage.from_(bucket).upload,
+                file_name,
+                data,
+                {"content-type": content_type, "upsert": "false"},
+            )
+            break
+        except Exception as e:
+            if _is_duplicate(e):
+                created = False
+                break
+            if attempt == attempts:
+                metrics.increment("storage_uploads", bucket=bucket, result="failed")
+                logger.error(
+                    f"Error uploading {file_name} to Supabase after "
+                    f"{attempts} attempts: {str(e)}"
+                )
+                raise
+            metrics.increment("storage_upload_retries", bucket=bucket)
+            delay = STORAGE_UPLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            logger.warning(
+                f"Uploading {file_name} failed ({str(e)}), retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
 
-    except Exception as e:
-        logger.error(f"Error uploading to Supabase: {str(e)}")
-        raise
+    metrics.increment(
+        "storage_uploads", bucket=bucket, result="uploaded" if created else "exists"
+    )
+    url = supabase.storage.from_(bucket).get_public_url(file_name)
+    with _known_objects_lock:
+        _known_objects[key] = url
+    return url, created
@@ -0,0 +1,150 @@
+"""
+Supabase clients sharing one HTTP connection pool.
+
+Every supabase-py client used to open its own httpx pools (PostgREST, Storage,
+Auth and Functions each build one, with its own SSL context), and the API
+built a new client per request just to send the user's bearer token, so most
+requests paid a TLS handshake and ~40 ms of client construction before any
+work.
+
+All clients are now created on the process-wide `httpx.Client` from
+`http_client()`. A client on the shared pool is only a view: it holds its
+headers and sends them with each request, never on the pool, so the
+per-request client carrying a user's token (`supabase_client(token)`) costs
+well under a millisecond and reuses the warm connections of every other
+client.
+
+Configuration:
+    SUPABASE_HTTP_MAX_CONNECTIONS: Open connections across all clients
+        (default 20); further requests wait for a free one
+    SUPABASE_HTTP_MAX_KEEPALIVE: Idle connections kept open (default 10)
+    SUPABASE_HTTP_KEEPALIVE_SECONDS: How long an idle connection is kept
+        (default 30)
+    SUPABASE_HTTP_TIMEOUT_SECONDS: Read/write/pool timeout of every request
+        (default 120, PostgREST's old default; connecting times out after 10)
+
+Metrics: `supabase_http_requests` counts requests and
+`supabase_http_connections_opened` new connections; the difference was served
+on reused connections.
+
+Closing the pool on shutdown (`close_http_client()`) ends every client built
+on it; the next `http_client()` opens a new pool. Long-lived code therefore
+asks `service_client()` for the service-role client on each use instead of
+holding one, and gets a client on the current pool.
+
+Usage:
+    service_client().table("user_profiles")  # service role
+    user_supabase = supabase_client(token)    # acts as the token's user
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "20"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "10"))
+SUPABASE_HTTP_KEEPALIVE_SECONDS = float(
+    os.getenv("SUPABASE_HTTP_KEEPALIVE_SECONDS", "30")
+)
+SUPABASE_HTTP_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_HTTP_TIMEOUT_SECONDS", "120"))
+CONNECT_TIMEOUT_SECONDS = 10.0
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+_service_client: Optional[Client] = None
+_service_client_pool: Optional[httpx.Client] = None
+
+
+def _trace(event: str, info: Dict[str, Any]) -> None:
+    # httpcore reports connection lifecycle events; a TCP connect only happens
+    # when no pooled connection could be reused
+    if event == "connection.connect_tcp.complete":
+        metrics.increment("supabase_http_connections_opened")
+
+
+def _on_request(request: httpx.Request) -> None:
+    metrics.increment("supabase_http_requests")
+    request.extensions["trace"] = _trace
+
+
+def _create_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            SUPABASE_HTTP_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS
+        ),
+        follow_redirects=True,
+        event_hooks={"request": [_on_request]},
+    )
+
+
+def http_client() -> httpx.Client:
+    """Process-wide HTTP pool for Supabase, created on first use."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = _create_http_client()
+    return _http_client
+
+
+def _create_supabase_client(
+    pool: httpx.Client, access_token: Optional[str] = None
+) -> Client:
+    options = ClientOptions(httpx_client=pool)
+    if access_token:
+        options.headers["Authorization"] = f"Bearer {access_token}"
+    return create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+        options=options,
+    )
+
+
+def supabase_client(access_token: Optional[str] = None) -> Client:
+    """
+    Supabase client on the shared pool, with the service role key.
+
+    With `access_token`, requests carry the user's token instead, so row level
+    security applies as for that user.
+    """
+    return _create_supabase_client(http_client(), access_token)
+
+
+def service_client() -> Client:
+    """Process-wide service-role client on the current pool."""
+    global _service_client, _service_client_pool
+    pool = http_client()
+    with _http_client_lock:
+        client, client_pool = _service_client, _service_client_pool
+    if client is None or client_pool is not pool:
+        client = _create_supabase_client(pool)
+        with _http_client_lock:
+            _service_client, _service_client_pool = client, pool
+    return client
+
+
+def close_http_client() -> None:
+    """
+    Close the pool's connections (called on application shutdown). Clients
+    created before cannot be used afterwards; `service_client()` and
+    `supabase_client()` build on a new pool.
+    """
+    global _http_client
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+        logger.info("Closed the Supabase HTTP pool")
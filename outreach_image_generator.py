@@ -1,13 +1,23 @@
+import argparse
 import asyncio
+import json
 import os
 import time
 from dotenv import load_dotenv
 from PIL import Image
-from core.models.account_profile import AccountProfile
+from core.constants import OUTREACH_LLM_CONCURRENCY
+from core.content.image_generation.encoders import encode_image
+from core.content.image_generation.render_pool import shutdown_render_pool
 from core.content.image_generator import (
     generate_image_list_content,
     generate_image_list,
 )
+from core.content.outreach_batch import (
+    generate_outreach_batch,
+    load_newsletters,
+    outreach_profile,
+)
+from core.utils.logging_utils import configure_logging
 
 load_dotenv()
 
@@ -78,17 +88,8 @@ My content is seen by over 8 million people each month. Need help getting the wo
 async def generate_outreach_image(
     newsletter_content: str, output_dir: str = "outreach_images"
 ):
-    # Create a dummy AccountProfile (since we don't need a real one for this tool)
-    dummy_profile = AccountProfile(
-        account_id="outreach_tool",
-        beehiiv_api_key="",
-        subscribe_url="",
-        publication_id="",
-        custom_prompt="",
-    )
-
     # Generate content
-    content = await generate_image_list_content(newsletter_content, dummy_profile)
+    content = await generate_image_list_content(newsletter_content, outreach_profile())
 
     # Generate image
     image = generate_image_list(content, save_locally=False)
@@ -98,8 +99,12 @@ async def generate_outreach_image(
 
     # Save the image
     timestamp = int(time.time())
-    img_path = os.path.join(output_dir, f"outreach_image_{timestamp}.jpg")
-    image.save(img_path, "JPEG")
+    encoded = encode_image(image, "image_list")
+    img_path = os.path.join(
+        output_dir, f"outreach_image_{timestamp}.{encoded.extension}"
+    )
+    with open(img_path, "wb") as f:
+        f.write(encoded.data)
 
     print(f"Image saved: {img_path}")
     print("Generated content:")
@@ -109,10 +114,39 @@ async def generate_outreach_image(
 
 
 async def main():
+    parser = argparse.ArgumentParser(description="PostOnce Outreach Image Generator")
+    parser.add_argument(
+        "--batch",
+        metavar="SOURCE",
+        help="Directory of newsletter files or JSONL of {id, content} objects; "
+        "without it the included newsletter is used",
+    )
+    parser.add_argument("--output-dir", default="outreach_images")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=OUTREACH_LLM_CONCURRENCY,
+        help="Newsletters in their LLM stages at once (batch mode)",
+    )
+    args = parser.parse_args()
+
     print("PostOnce Outreach Image Generator")
-    print("Generating image from the included newsletter content...")
+    if args.batch:
+        configure_logging()
+        try:
+            summary = await generate_outreach_batch(
+                load_newsletters(args.batch), args.output_dir, args.concurrency
+            )
+        finally:
+            shutdown_render_pool()
+        print(json.dumps(summary, indent=2))
+        print(f"Images and manifest.jsonl written to: {args.output_dir}")
+        return
 
-    img_path, content = await generate_outreach_image(NEWSLETTER_CONTENT)
+    print("Generating image from the included newsletter content...")
+    img_path, content = await generate_outreach_image(
+        NEWSLETTER_CONTENT, args.output_dir
+    )
     print(f"\nImage generated and saved to: {img_path}")
     print("You can now send this image to the newsletter creator.")
 